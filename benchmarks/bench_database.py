@@ -0,0 +1,151 @@
+"""Benchmark lapisan database: sebelum vs sesudah tuning SQLite (WAL, pragma, index, summary dari rekap).
+
+Kedua sisi menjalankan SQL yang sama (kecuali summary), sehingga selisihnya murni efek pragma + index:
+halaman history (ORDER BY timestamp LIMIT), halaman terfilter, INSERT per transaksi, dan baca seluruh tabel.
+Summary: sebelum = COUNT total + COUNT status Rusak Berat (scan), sesudah = db.get_summary_stats (rekap ringkasan).
+create_laporan lengkap (laporan + deteksi + ringkasan) hanya diukur di sisi sesudah, sebagai informasi.
+
+Contoh:
+    python benchmarks/bench_database.py --rows 200000
+    python benchmarks/bench_database.py --dir /var/tmp   # Efek fsync (synchronous) terlihat di disk, bukan tmpfs
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+sys.path.insert(0, SRC_DIR)
+from scoring import STATUS_LAYAK, STATUS_PERLU_PERBAIKAN, STATUS_RUSAK_BERAT
+
+STATUSES = [STATUS_LAYAK, STATUS_PERLU_PERBAIKAN, STATUS_RUSAK_BERAT]
+GEDUNG = ["FPMIPA A", "FPMIPA B", "FPMIPA C"]
+
+# Skema lama (sebelum tuning): tanpa index selain primary key
+BASELINE_SCHEMA = """
+CREATE TABLE laporan_kerusakan (
+    id INTEGER PRIMARY KEY, timestamp DATETIME, gedung VARCHAR(50), ruangan VARCHAR(50),
+    jenis_kerusakan VARCHAR(100), confidence_score FLOAT, status VARCHAR(20), deskripsi TEXT
+)
+"""
+
+def make_rows(n, seed=42):
+    rnd = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for i in range(n):
+        yield (
+            (start + timedelta(minutes=rnd.randint(0, 60 * 24 * 365))).isoformat(sep=" "),
+            rnd.choice(GEDUNG), f"R-{rnd.randint(100, 499)}",
+            str({"sobek": rnd.randint(0, 3)}), float(rnd.randint(0, 100)), rnd.choice(STATUSES), "bench",
+        )
+
+def fill(path, n):
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO laporan_kerusakan (timestamp, gedung, ruangan, jenis_kerusakan, confidence_score, status, deskripsi) VALUES (?,?,?,?,?,?,?)",
+        make_rows(n),
+    )
+    conn.commit()
+    conn.close()
+
+def timeit(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+# Query yang sama untuk kedua sisi: halaman pertama history (tanpa / dengan filter) dan INSERT satu laporan
+PAGE_SQL = "SELECT * FROM laporan_kerusakan ORDER BY timestamp DESC, id DESC LIMIT 50"
+FILTERED_PAGE_SQL = "SELECT * FROM laporan_kerusakan WHERE status = :status ORDER BY timestamp DESC, id DESC LIMIT 50"
+INSERT_SQL = ("INSERT INTO laporan_kerusakan (timestamp, gedung, ruangan, jenis_kerusakan, confidence_score, status, deskripsi) "
+              "VALUES (:t, 'FPMIPA A', 'R-1', '{}', 100, :status, 'bench')")
+
+def common_ops(engine, repeat, writes):
+    import pandas as pd
+    from sqlalchemy import text
+
+    def read(sql):
+        with engine.connect() as c:
+            return c.execute(text(sql), {"status": STATUS_RUSAK_BERAT}).fetchall()
+
+    def insert():
+        for _ in range(writes):
+            with engine.begin() as c:
+                c.execute(text(INSERT_SQL), {"t": datetime.now(), "status": STATUS_LAYAK})
+
+    return {
+        "history_page": timeit(lambda: read(PAGE_SQL), repeat),
+        "history_page_status": timeit(lambda: read(FILTERED_PAGE_SQL), repeat),
+        "get_all_laporan_as_df": timeit(lambda: pd.read_sql("SELECT * FROM laporan_kerusakan ORDER BY timestamp DESC", engine), repeat),
+        f"insert_x{writes}": timeit(insert, 1),
+    }
+
+def bench_baseline(path, n, repeat, writes):
+    from sqlalchemy import create_engine, text
+
+    conn = sqlite3.connect(path)
+    conn.execute(BASELINE_SCHEMA)
+    conn.close()
+    fill(path, n)
+
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+    def summary():
+        with engine.connect() as c:
+            c.execute(text("SELECT COUNT(*) FROM laporan_kerusakan")).scalar()
+            c.execute(text("SELECT COUNT(*) FROM laporan_kerusakan WHERE status = :s"), {"s": STATUS_RUSAK_BERAT}).scalar()
+
+    return {"get_summary_stats": timeit(summary, repeat), **common_ops(engine, repeat, writes)}
+
+def bench_tuned(path, n, repeat, writes):
+    os.environ["SMARTREPORT_DB_PATH"] = path
+    import database as db
+
+    db.init_db()
+    fill(path, n)
+    db.init_db(force=True)  # Seperti start aplikasi berikutnya: statistik planner diperbarui (db.optimize)
+    db.rebuild_ringkasan()  # Di aplikasi rekap diperbarui tiap create_laporan; di sini data diisi langsung lewat sqlite3
+
+    results = {"get_summary_stats": timeit(db.get_summary_stats, repeat), **common_ops(db.engine, repeat, writes)}
+
+    def create():
+        for _ in range(writes):
+            db.create_laporan("FPMIPA A", "R-1", "{}", 100, STATUS_LAYAK, "bench", detections={"sobek": 1})
+
+    return results, timeit(create, 1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--dir", help="Folder file database benchmark (default: folder temp sistem)")
+    parser.add_argument("--json", help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        before = bench_baseline(os.path.join(tmp, "before.db"), args.rows, args.repeat, args.writes)
+        after, create = bench_tuned(os.path.join(tmp, "after.db"), args.rows, args.repeat, args.writes)
+
+    print(f"Rows: {args.rows:,}")
+    print(f"{'operasi':<28}{'sebelum (ms)':>14}{'sesudah (ms)':>14}{'speedup':>10}")
+    for key in before:
+        b, a = before[key] * 1000, after[key] * 1000
+        print(f"{key:<28}{b:>14.1f}{a:>14.1f}{b / a if a else float('inf'):>9.1f}x")
+    print(f"{f'create_laporan_x{args.writes}':<28}{'-':>14}{create * 1000:>14.1f}   (laporan + deteksi + ringkasan)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"rows": args.rows, "before": before, "after": after, "create_laporan": create}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark serah-terima frame antar proses: shmring.SharedFrameRing vs multiprocessing.Queue.
+
+Produsen (proses utama) mengirim N frame BGR ke satu proses konsumen yang menyentuh isi frame
+(sub-sampling + mean, seperti membaca piksel). Queue mem-pickle dan menyalin tiap frame;
+ring shared memory hanya menyalin sekali ke slot, konsumen membaca lewat view NumPy.
+
+Contoh:
+    python benchmarks/bench_shmring.py --frames 500 --sizes 480x360 1280x720 1920x1080
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import shmring
+
+def parse_size(text):
+    w, h = (int(x) for x in text.lower().split("x"))
+    return w, h
+
+def touch(frame):
+    return float(frame[::16, ::16].mean())
+
+# --- KONSUMEN (proses terpisah) ---
+def consume_queue(q, ready, out):
+    ready.set()
+    n = 0
+    while True:
+        item = q.get()
+        if item is None: break
+        touch(item[1])
+        n += 1
+    out.put((n, time.perf_counter()))
+
+def consume_shm(handle, hold, ready, out):
+    source = shmring.SharedFrameSource(handle, hold=hold)
+    ready.set()
+    n = 0
+    for _, frame in source:
+        touch(frame)
+        n += 1
+    source.close()
+    out.put((n, time.perf_counter()))
+
+# --- PRODUSEN ---
+def run(kind, frames, n, slots, ctx):
+    ready, out = ctx.Event(), ctx.Queue()
+    if kind == "queue":
+        q = ctx.Queue(maxsize=slots)
+        proc = ctx.Process(target=consume_queue, args=(q, ready, out))
+        publish = lambda i, f: q.put((i, f))
+        finish = lambda: q.put(None)
+        ring = None
+    else:
+        ring = shmring.SharedFrameRing.create(frames[0].shape, slots=slots)
+        proc = ctx.Process(target=consume_shm, args=(ring.handle, 1, ready, out))
+        publish = ring.publish
+        finish = ring.close
+
+    proc.start()
+    ready.wait()
+    started = time.perf_counter()
+    for i in range(1, n + 1):
+        publish(i, frames[i % len(frames)])
+    finish()
+    received, ended = out.get()
+    proc.join()
+    if ring: ring.unlink()
+    return received, ended - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300, help="Frame per percobaan")
+    parser.add_argument("--sizes", type=parse_size, nargs="+", default=[(480, 360), (1280, 720), (1920, 1080)])
+    parser.add_argument("--slots", type=int, default=shmring.DEFAULT_SLOTS, help="Slot ring / maxsize queue")
+    parser.add_argument("--json", help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    rng = np.random.default_rng(0)
+    results = []
+    print(f"{'ukuran':>11}{'metode':>8}{'frame/s':>10}{'MB/s':>9}{'speedup':>9}")
+    for w, h in args.sizes:
+        frames = [rng.integers(0, 256, (h, w, 3), dtype=np.uint8) for _ in range(4)]
+        mb = frames[0].nbytes / 1e6
+        base = None
+        for kind in ("queue", "shm"):
+            received, elapsed = run(kind, frames, args.frames, args.slots, ctx)
+            fps = received / elapsed
+            base = base or fps
+            row = {"size": f"{w}x{h}", "method": kind, "frames": received, "seconds": elapsed,
+                   "frames_per_s": fps, "mb_per_s": fps * mb, "speedup": fps / base}
+            results.append(row)
+            print(f"{row['size']:>11}{kind:>8}{fps:>10.0f}{row['mb_per_s']:>9.0f}{row['speedup']:>8.1f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"frames": args.frames, "slots": args.slots, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark DefectTracker vs agregasi "maksimum per frame" pada urutan box sintetis.
+
+Kamera menyapu (pan) ruangan berisi K kerusakan; tiap frame hanya sebagian yang terlihat,
+dengan jitter posisi dan deteksi yang kadang terlewat. Dibandingkan jumlah terhitung vs ground truth
+untuk beberapa jarak sampling, plus kecepatan update tracker.
+
+Contoh:
+    python benchmarks/bench_tracker.py --videos 50 --strides 5 15 30 60 90
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from tracker import DefectTracker
+
+CLASSES = ["sobek", "tanpa_meja", "dudukan_rusak"]
+VIEW_W, VIEW_H = 480, 360
+
+def make_video(rng, n_defects=12, n_frames=450, world_w=2400, miss_rate=0.1, jitter=3.0, fp_rate=0.05):
+    """Return (list per frame berisi prediksi, Counter ground truth, array kerusakan terlihat per frame).
+
+    `fp_rate`: peluang per frame muncul satu deteksi palsu (posisi & kelas acak, tidak berulang)."""
+    cls = rng.choice(len(CLASSES), n_defects, p=[0.6, 0.25, 0.15])
+    pos = np.column_stack([rng.uniform(40, world_w - 40, n_defects), rng.uniform(60, VIEW_H - 60, n_defects)])
+    size = rng.uniform(30, 80, (n_defects, 2))
+    speed = (world_w - VIEW_W) / n_frames
+
+    frames = []
+    for f in range(1, n_frames + 1):
+        cam = f * speed
+        x = pos[:, 0] - cam
+        visible = (x > size[:, 0] / 2) & (x < VIEW_W - size[:, 0] / 2) & (rng.random(n_defects) > miss_rate)
+        preds = [
+            {"class": CLASSES[cls[i]], "confidence": 0.8,
+             "x": x[i] + rng.normal(0, jitter), "y": pos[i, 1] + rng.normal(0, jitter),
+             "width": size[i, 0], "height": size[i, 1]}
+            for i in np.flatnonzero(visible)
+        ]
+        if rng.random() < fp_rate:
+            preds.append({"class": CLASSES[rng.integers(len(CLASSES))], "confidence": 0.5,
+                          "x": rng.uniform(40, VIEW_W - 40), "y": rng.uniform(40, VIEW_H - 40),
+                          "width": rng.uniform(30, 80), "height": rng.uniform(30, 80)})
+        frames.append(preds)
+
+    # Ground truth: kerusakan yang pernah masuk viewport
+    in_view = np.array([(pos[:, 0] - f * speed > size[:, 0] / 2) & (pos[:, 0] - f * speed < VIEW_W - size[:, 0] / 2)
+                        for f in range(1, n_frames + 1)])
+    return frames, Counter(CLASSES[c] for c in cls[in_view.any(axis=0)]), (cls, in_view)
+
+# Kerusakan yang masuk viewport di setidaknya satu frame sample: batas atas yang bisa dihitung metode apa pun
+def sampled_truth(view, stride):
+    cls, in_view = view
+    return Counter(CLASSES[c] for c in cls[in_view[stride - 1::stride].any(axis=0)])
+
+def count_max(frames, stride):
+    defects = Counter()
+    for f in range(stride, len(frames) + 1, stride):
+        for k, v in Counter(p["class"] for p in frames[f - 1]).items():
+            if v > defects[k]: defects[k] = v
+    return defects
+
+def count_track(frames, stride, **params):
+    tracker = DefectTracker(**params)
+    for f in range(stride, len(frames) + 1, stride):
+        tracker.update(f, frames[f - 1])
+    return tracker.counts()
+
+def error(counts, truth):
+    return sum(abs(counts[k] - truth[k]) for k in set(counts) | set(truth))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=30)
+    parser.add_argument("--strides", type=int, nargs="+", default=[5, 15, 30, 60, 90])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fp-rate", type=float, default=0.05, help="Peluang deteksi palsu per frame")
+    parser.add_argument("--min-hits", type=int, help="Timpa tracker.MIN_HITS")
+    parser.add_argument("--max-age", type=int, help="Timpa tracker.MAX_AGE")
+    parser.add_argument("--json", help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    videos = [make_video(rng, fp_rate=args.fp_rate) for _ in range(args.videos)]
+    truth_total = sum(sum(t.values()) for _, t, _ in videos)
+    params = {k: v for k, v in {"min_hits": args.min_hits, "max_age": args.max_age}.items() if v is not None}
+
+    results = []
+    print(f"{args.videos} video, total {truth_total} kerusakan unik (ground truth), deteksi palsu {args.fp_rate:.0%}/frame")
+    print("terlihat = kerusakan yang ada di frame sample (batas atas); error track dihitung terhadap kolom ini")
+    print(f"{'stride':>6}{'frame/video':>13}{'terlihat':>10}{'max: hitung':>13}{'max: error':>12}"
+          f"{'track: hitung':>15}{'track: error':>14}{'update/s':>11}")
+    for stride in args.strides:
+        m_total = m_err = t_total = t_err = s_total = updates = 0
+        t_time = 0.0
+        for frames, truth, view in videos:
+            seen = sampled_truth(view, stride)
+            m = count_max(frames, stride)
+            t0 = time.perf_counter()
+            t = count_track(frames, stride, **params)
+            t_time += time.perf_counter() - t0
+            updates += len(frames) // stride
+            s_total += sum(seen.values())
+            m_total += sum(m.values()); m_err += error(m, seen)
+            t_total += sum(t.values()); t_err += error(t, seen)
+        row = {"stride": stride, "frames_per_video": len(videos[0][0]) // stride, "sampled_truth": s_total,
+               "max_count": m_total, "max_error": m_err, "track_count": t_total, "track_error": t_err,
+               "updates_per_s": updates / t_time if t_time else 0}
+        results.append(row)
+        print(f"{stride:>6}{row['frames_per_video']:>13}{s_total:>10}{m_total:>13}{m_err:>12}"
+              f"{t_total:>15}{t_err:>14}{row['updates_per_s']:>11.0f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"videos": args.videos, "truth": truth_total, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
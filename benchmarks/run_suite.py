@@ -0,0 +1,174 @@
+"""Benchmark suite: pipeline audit (video sintetis + stub inference) dan lapisan database.
+
+Hasil ditulis ke JSON agar bisa dibandingkan antar commit.
+
+Contoh:
+    python benchmarks/run_suite.py --out bench.json
+    python benchmarks/run_suite.py --quick --out bench-quick.json
+    python benchmarks/run_suite.py --skip-db --latency 120 --inflight 1 4 8 16
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import synth_video
+from stub_server import StubServer
+from bench_database import make_rows
+
+QUICK_SPECS = [("360p-5s", 640, 360, 5), ("720p-5s", 1280, 720, 5)]
+DB_SIZES = [1_000, 100_000, 1_000_000]
+QUICK_DB_SIZES = [1_000, 10_000]
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=BENCH_DIR, text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+def median_time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+# --- PIPELINE (jalur yang sama dengan scanner: FrameSampler -> resize -> run_ai_workflow -> agregasi) ---
+def bench_pipeline(videos, stub, inflight_values, every):
+    import audit
+    import backends
+    import utils
+    from metrics import Metrics
+    from sampler import SamplingPolicy
+
+    utils.set_backend(backends.RemoteWorkflowBackend("bench", "bench", "bench", api_url=stub.url))
+    results = []
+    for name, path in videos.items():
+        for inflight in inflight_values:
+            cfg = {**audit.DEFAULT_SETTINGS, "max_inflight": inflight, "use_cache": False,
+                   "sampling_policy": SamplingPolicy.every_n(every) if every else None}
+            metrics = Metrics()
+            requests_before = stub.requests
+            t0 = time.perf_counter()
+            analysis = audit.analyze_video(path, cfg, audit.UPLOAD_SAMPLE_EVERY, metrics=metrics)
+            wall = time.perf_counter() - t0
+            row = {
+                "video": name, "max_inflight": inflight, "wall_s": wall,
+                "total_frames": analysis["total_frames"], "sampled": analysis["sampled"],
+                "video_fps": analysis["total_frames"] / wall, "analyzed_fps": analysis["sampled"] / wall,
+                "api_calls": stub.requests - requests_before, "defects": dict(analysis["defects"]),
+                "stages": {s["tahap"]: {"n": s["jumlah"], "mean_ms": s["rata2_ms"], "p95_ms": s["p95_ms"]} for s in metrics.stage_table()},
+            }
+            results.append(row)
+            print(f"  {name:<12} inflight={inflight:<3} {wall:7.2f}s  {row['video_fps']:8.1f} frame video/s  "
+                  f"{row['analyzed_fps']:6.1f} frame AI/s  {row['api_calls']} API")
+    return results
+
+# --- DATABASE (create_laporan, get_all_laporan_as_df, get_summary_stats, query_laporan) ---
+def _fill(path, n, offset):
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO laporan_kerusakan (timestamp, gedung, ruangan, jenis_kerusakan, confidence_score, status, deskripsi) VALUES (?,?,?,?,?,?,?)",
+        make_rows(n, seed=offset),
+    )
+    conn.commit()
+    conn.close()
+
+def bench_database(db_path, sizes, writes, repeat):
+    import database as db
+
+    db.init_db()
+    results, current = [], 0
+    for size in sorted(sizes):
+        # Tabel tumbuh bertahap: 1k -> 100k -> 1M (baris massal lewat sqlite3 langsung, seperti data historis)
+        t0 = time.perf_counter()
+        _fill(db_path, size - current, current)
+        current = size
+        with db.engine.begin() as conn: conn.exec_driver_sql("ANALYZE")
+        db.rebuild_ringkasan()  # Baris massal tidak lewat create_laporan: rekap get_summary_stats dihitung ulang
+        fill_s = time.perf_counter() - t0
+
+        def inserts():
+            for _ in range(writes):
+                db.create_laporan("FPMIPA A", "R-BENCH", "{'sobek': 1}", 85, "Layak Pakai ✅", "bench")
+
+        row = {
+            "rows": size, "fill_s": fill_s,
+            "create_laporan_ms": median_time(inserts, 1) / writes * 1000,
+            "get_all_laporan_as_df_s": median_time(db.get_all_laporan_as_df, repeat),
+            "get_summary_stats_ms": median_time(db.get_summary_stats, repeat) * 1000,
+            "query_laporan_page_ms": median_time(lambda: db.query_laporan(limit=50, offset=1000), repeat) * 1000,
+        }
+        current += writes
+        results.append(row)
+        print(f"  {size:>9,} baris: create {row['create_laporan_ms']:.2f} ms/laporan, get_all {row['get_all_laporan_as_df_s']:.2f}s, "
+              f"summary {row['get_summary_stats_ms']:.1f} ms, halaman {row['query_laporan_page_ms']:.1f} ms")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default="bench-results.json", help="File JSON hasil")
+    parser.add_argument("--quick", action="store_true", help="Video pendek dan DB kecil (untuk cek cepat)")
+    parser.add_argument("--videos-dir", default=os.path.join(tempfile.gettempdir(), "smartreport-bench-videos"),
+                        help="Cache video sintetis (dibuat sekali)")
+    parser.add_argument("--spec", action="append", type=synth_video.parse_spec, help="Video LEBARxTINGGIxDETIK (boleh berulang)")
+    parser.add_argument("--latency", type=float, default=80.0, help="Latensi stub inference (ms)")
+    parser.add_argument("--jitter", type=float, default=10.0, help="± jitter latensi stub (ms)")
+    parser.add_argument("--boxes", type=int, default=2, help="Box per respon stub")
+    parser.add_argument("--inflight", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--every", type=int, default=None, help="Sampling tiap N frame (default: seperti upload scanner)")
+    parser.add_argument("--db-sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--db-writes", type=int, default=200, help="Jumlah create_laporan per ukuran")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-pipeline", action="store_true")
+    parser.add_argument("--skip-db", action="store_true")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="smartreport-bench-")
+    db_path = os.path.join(tmp, "bench.db")
+    os.environ["SMARTREPORT_DB_PATH"] = db_path  # Harus sebelum modul database di-import
+
+    import cv2
+    report = {
+        "meta": {
+            "commit": git_commit(), "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(), "opencv": cv2.__version__,
+            "cpu_count": os.cpu_count(), "args": vars(args),
+        },
+        "pipeline": [], "database": [],
+    }
+
+    if not args.skip_pipeline:
+        specs = args.spec or (QUICK_SPECS if args.quick else synth_video.DEFAULT_SPECS)
+        print("Membuat video sintetis...")
+        videos = synth_video.make_videos(args.videos_dir, specs)
+        stub = StubServer(0, args.latency, args.jitter, args.boxes).start()
+        print(f"Pipeline (stub {stub.url}, latency {args.latency}±{args.jitter} ms):")
+        try:
+            report["pipeline"] = bench_pipeline(videos, stub, args.inflight, args.every)
+        finally:
+            stub.shutdown()
+
+    if not args.skip_db:
+        sizes = args.db_sizes or (QUICK_DB_SIZES if args.quick else DB_SIZES)
+        print("Database:")
+        report["database"] = bench_database(db_path, sizes, args.db_writes, args.repeat)
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"Hasil: {args.out}")
+
+if __name__ == "__main__":
+    main()
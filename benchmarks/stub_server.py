@@ -0,0 +1,74 @@
+"""Stub server inference lokal yang meniru respon Roboflow workflow.
+
+Latensi dan prediksi bisa diatur sehingga benchmark pipeline tidak bergantung pada jaringan/API sungguhan.
+
+Contoh:
+    python benchmarks/stub_server.py --port 9911 --latency 80 --boxes 3
+    # lalu di .streamlit/secrets.toml: ROBOFLOW_API_URL = "http://127.0.0.1:9911"
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CLASSES = ["sobek", "tanpa_meja", "dudukan_rusak"]
+
+# Prediksi tetap (box di tengah frame 480 px), kelas berputar: sobek, tanpa_meja, ...
+def canned_predictions(n_boxes):
+    return [
+        {"x": 60 + 80 * i, "y": 120, "width": 50, "height": 40, "class": CLASSES[i % len(CLASSES)],
+         "confidence": 0.9 - 0.05 * i, "class_id": i % len(CLASSES), "detection_id": f"stub-{i}"}
+        for i in range(n_boxes)
+    ]
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=9911, latency_ms=50.0, jitter_ms=0.0, boxes=1, host="127.0.0.1"):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.body = json.dumps({"outputs": [{"model_predictions": {"predictions": canned_predictions(boxes)}}]}).encode()
+        self.requests = 0
+        self._lock = threading.Lock()
+        super().__init__((host, port), StubHandler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="stub-inference", daemon=True).start()
+        return self
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        srv = self.server
+        with srv._lock: srv.requests += 1
+        delay = srv.latency_ms + (random.uniform(-srv.jitter_ms, srv.jitter_ms) if srv.jitter_ms else 0)
+        time.sleep(max(0.0, delay) / 1000)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(srv.body)))
+        self.end_headers()
+        self.wfile.write(srv.body)
+
+    def log_message(self, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=9911)
+    parser.add_argument("--latency", type=float, default=50.0, help="ms per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± ms acak")
+    parser.add_argument("--boxes", type=int, default=1, help="Jumlah box per respon")
+    args = parser.parse_args()
+    srv = StubServer(args.port, args.latency, args.jitter, args.boxes)
+    print(f"Stub inference di {srv.url} (latency {args.latency} ms, {args.boxes} box)")
+    srv.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Generate video sintetis (OpenCV) untuk benchmark: latar bertekstur dan beberapa objek bergerak."""
+import argparse
+import os
+import cv2
+import numpy as np
+
+# (nama, lebar, tinggi, detik)
+DEFAULT_SPECS = [("360p-10s", 640, 360, 10), ("720p-10s", 1280, 720, 10), ("1080p-30s", 1920, 1080, 30)]
+FPS = 30
+
+def make_video(path, width, height, seconds, fps=FPS, seed=0):
+    if os.path.exists(path): return path
+    rng = np.random.default_rng(seed)
+    # Latar statis bertekstur (encoder tidak bisa memampatkan jadi hampir nol seperti frame polos)
+    base = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+    objects = [(rng.uniform(0, width), rng.uniform(0, height), rng.uniform(-6, 6), rng.uniform(-3, 3),
+                tuple(int(c) for c in rng.integers(0, 255, 3))) for _ in range(6)]
+    size = max(20, width // 20)
+
+    tmp = path + ".tmp.mp4"
+    out = cv2.VideoWriter(tmp, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    try:
+        for f in range(int(seconds * fps)):
+            frame = base.copy()
+            for x, y, vx, vy, color in objects:
+                cx, cy = int((x + vx * f) % width), int((y + vy * f) % height)
+                cv2.rectangle(frame, (cx, cy), (cx + size, cy + size), color, -1)
+            cv2.putText(frame, str(f), (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+            out.write(frame)
+    finally:
+        out.release()
+    os.replace(tmp, path)
+    return path
+
+def make_videos(directory, specs=DEFAULT_SPECS):
+    os.makedirs(directory, exist_ok=True)
+    return {name: make_video(os.path.join(directory, f"{name}.mp4"), w, h, s) for name, w, h, s in specs}
+
+def parse_spec(text):
+    """'1280x720x10' -> ('720p-10s', 1280, 720, 10)"""
+    w, h, s = (int(v) for v in text.lower().split("x"))
+    return (f"{h}p-{s}s", w, h, s)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("directory")
+    parser.add_argument("--spec", action="append", type=parse_spec, help="LEBARxTINGGIxDETIK (boleh berulang)")
+    args = parser.parse_args()
+    for name, path in make_videos(args.directory, args.spec or DEFAULT_SPECS).items():
+        print(f"{name}: {path}")
@@ -0,0 +1,282 @@
+import json
+import time
+from collections import Counter
+import utils
+import pipeline
+import keyframe
+import cache
+import cascade
+import database as db
+import framestore
+import shmring
+from tracker import DefectTracker
+from metrics import Metrics
+from sampler import FrameSampler, SamplingPolicy, StrideController, ADAPTIVE_PREFETCH, DEFAULT_PREFETCH
+
+# --- KONFIGURASI ANALISIS ---
+# Modul ini tidak bergantung pada UI Streamlit, sehingga bisa dipakai scanner (inline),
+# job background (proses terpisah), maupun CLI.
+INFER_WIDTH = 480 # Lebar frame yang dikirim ke AI
+REC_SAMPLE_EVERY = 15 # Frame, mode rekam kamera
+UPLOAD_SAMPLE_EVERY = 30 # Frame, mode upload
+
+DEFAULT_SETTINGS = {
+    "max_inflight": pipeline.DEFAULT_MAX_INFLIGHT,
+    "sampling_policy": None, # None = default per mode (REC_SAMPLE_EVERY / UPLOAD_SAMPLE_EVERY)
+    "keyframe": False,
+    "keyframe_threshold": keyframe.DEFAULT_THRESHOLD,
+    "use_cache": True,
+    "count_mode": "max", # "max" = jumlah maksimum per frame, "track" = kerusakan unik lewat DefectTracker
+    "cascade": False, # Deteksi kecil / ragu dianalisis ulang dari crop resolusi asli (lihat cascade.py)
+}
+
+# --- SERIALISASI SETTING (untuk disimpan di tabel jobs) ---
+def settings_to_json(cfg):
+    data = dict(cfg)
+    if data.get("sampling_policy") is not None:
+        data["sampling_policy"] = data["sampling_policy"].to_dict()
+    return json.dumps(data)
+
+def settings_from_json(text):
+    cfg = {**DEFAULT_SETTINGS, **json.loads(text or "{}")}
+    if cfg.get("sampling_policy"):
+        cfg["sampling_policy"] = SamplingPolicy.from_dict(cfg["sampling_policy"])
+    return cfg
+
+# --- SUMBER FRAME ---
+def resolve_policy(cfg, default_every):
+    if cfg["sampling_policy"]: return cfg["sampling_policy"]
+    # Keyframe aktif: kandidat tetap stride default, selector hanya membuang frame yang mirip
+    # (panggilan API tidak pernah lebih banyak dari mode tanpa keyframe, penghematan dihitung dari stride yang sama)
+    return SamplingPolicy.every_n(default_every)
+
+# Setting yang mempengaruhi hasil analisis -> bagian dari kunci cache per video
+def video_settings(cfg, default_every):
+    return {
+        "policy": repr(resolve_policy(cfg, default_every)),
+        "width": INFER_WIDTH,
+        "keyframe": cfg["keyframe_threshold"] if cfg["keyframe"] else None,
+        "backend": utils.get_backend().identity,
+        "count": cfg["count_mode"],
+        # Hanya saat aktif, agar kunci cache video lama tetap berlaku
+        **({"cascade": True} if cfg["cascade"] else {}),
+    }
+
+# Sampler + (opsional) keyframe selector di depan inference.
+# `video_path` boleh juga framestore.FrameSource / file frame (.frames.npz) dari mode rekam ringan, atau
+# handle shmring ("shm://...") dari proses lain: frame sudah disampling & diperkecil, policy tidak diterapkan lagi.
+# Mode cascade: FrameSampler mengirim frame resolusi asli, diperkecil di CascadeDetector (crop diambil dari frame asli).
+# `start_frame`: frame sampai nomor ini sudah dianalisis (resume dari checkpoint) dan dilewati; `resumed`: jumlah sample
+# checkpoint (dihitung ke anggaran max_frames).
+def open_frame_source(video_path, cfg, default_every, growing=None, metrics=None, start_frame=0, resumed=0):
+    selector = keyframe.KeyframeSelector(cfg["keyframe_threshold"]) if cfg["keyframe"] else None
+    if isinstance(video_path, framestore.FrameSource):
+        vf = video_path
+    elif framestore.is_frame_file(video_path):
+        vf = framestore.FrameSource.from_file(video_path)
+    elif shmring.is_handle(video_path):
+        # Slot ring dipakai langsung (tanpa copy) selama masih di pipeline: request in-flight + frame yang ditampilkan
+        hold = (cfg["max_inflight"] + 1) * max(1, utils.get_backend().batch_size)
+        vf = shmring.SharedFrameSource(video_path, hold=hold)
+    else:
+        policy = resolve_policy(cfg, default_every)
+        vf = FrameSampler(video_path, policy, resize_width=None if cfg["cascade"] else INFER_WIDTH, growing=growing, metrics=metrics, start_frame=start_frame, resumed=resumed,
+                          prefetch=ADAPTIVE_PREFETCH if policy.is_adaptive else DEFAULT_PREFETCH)
+    frames = vf
+    if start_frame and not isinstance(vf, FrameSampler):
+        frames = ((idx, frame) for idx, frame in vf if idx > start_frame)
+    if selector: frames = selector.filter(frames)
+    return vf, frames, selector
+
+# --- INFERENCE ---
+# Fungsi deteksi per frame (dengan box); dengan cache, frame yang identik tidak memanggil API lagi.
+# `metrics`: panggilan backend yang sebenarnya (setelah cache) dicatat sebagai tahap "inference" + api_calls/api_errors.
+def make_detect_fn(cfg, metrics=None):
+    detect = utils.detect
+    if metrics: detect = metrics.timed("inference", detect, calls="api_calls", errors="api_errors")
+    if not cfg["use_cache"]: return detect
+    return cache.get_cache().cached_detect(detect, namespace=utils.get_backend().identity)
+
+def make_infer_fn(cfg, metrics=None):
+    detect = make_detect_fn(cfg, metrics)
+    if cfg["cascade"]:
+        detector = cascade.CascadeDetector(detect, INFER_WIDTH, metrics)
+        def infer(frame):
+            try:
+                low, preds = detector.detect(frame)
+            except Exception as e:
+                # Tahap 1 gagal (mis. error API): frame ditandai gagal seperti mode biasa, audit tetap jalan
+                print(f"Workflow Error: {e}")
+                if metrics: metrics.inc("workflow_errors")
+                return framestore.resize_to_width(frame, INFER_WIDTH), utils.FailedPredictions(e)
+            return utils.run_ai_workflow(low, lambda _: preds, metrics)
+    else:
+        infer = lambda frame: utils.run_ai_workflow(frame, detect, metrics)
+    return metrics.timed("frame", infer) if metrics else infer
+
+# Iterasi hasil inference sesuai urutan frame; backend yang mendukung batch (lokal) dikirimi beberapa frame sekaligus.
+# Mode cascade selalu per frame (jumlah crop tiap frame berbeda).
+def run_inference(frames, cfg, metrics=None):
+    batch_size = utils.get_backend().batch_size
+    if batch_size <= 1 or cfg["cascade"]:
+        return pipeline.iter_inference(frames, make_infer_fn(cfg, metrics), cfg["max_inflight"])
+
+    detect_batch = utils.detect_batch
+    if metrics: detect_batch = metrics.timed("inference", detect_batch, calls="api_calls", errors="api_errors")
+    if cfg["use_cache"]:
+        detect_batch = cache.get_cache().cached_detect_batch(detect_batch, namespace=utils.get_backend().identity)
+    return pipeline.iter_inference_batched(frames, lambda fs: utils.run_ai_workflow_batch(fs, detect_batch, metrics), batch_size, cfg["max_inflight"])
+
+# --- ANGGARAN PANGGILAN API ---
+# Frame berhenti dikirim begitu panggilan terpakai + cadangan frame yang belum selesai (in-flight) mencapai `max_calls`,
+# sehingga frame prefetch / in-flight tidak membuat anggaran terlampaui. Tiap frame dicadangkan panggilan maksimumnya
+# (`per_frame`: 1, mode cascade 1 + MAX_CROPS); frame dari cache tidak memakai cadangannya, jadi batas ini konservatif.
+# `counters`: Metrics.counters audit ini ("api_calls" dan "frames" = hasil frame yang sudah diterima).
+def limit_calls(frames, max_calls, counters, per_frame=1):
+    submitted = 0
+    for item in frames:
+        in_flight = submitted - counters["frames"]
+        if counters["api_calls"] + (in_flight + 1) * per_frame > max_calls:
+            break
+        submitted += 1
+        yield item
+
+# Confidence tertinggi per kelas (disimpan di tabel deteksi)
+def merge_confidences(confidences, preds):
+    for p in preds:
+        conf = p.get('confidence')
+        if conf is not None and conf > confidences.get(p['class'], -1):
+            confidences[p['class']] = float(conf)
+    return confidences
+
+# --- AGREGASI PER VIDEO ---
+# Dipakai untuk frame baru maupun frame dari checkpoint (urut frame), sehingga hasil resume sama dengan analisis utuh.
+class VideoAggregate:
+    def __init__(self, count_mode="max"):
+        self.defects = Counter()
+        self.confidences = {}
+        self.tracker = DefectTracker() if count_mode == "track" else None
+
+    def add(self, frame_idx, preds):
+        # Aggregasi: jumlah maksimum per kelas yang terlihat dalam satu frame
+        frame_c = Counter([p['class'] for p in preds])
+        for k, v in frame_c.items():
+            if v > self.defects[k]: self.defects[k] = v
+        merge_confidences(self.confidences, preds)
+        # Mode track: satu kerusakan fisik dihitung sekali walau muncul di banyak frame,
+        # dan kerusakan yang tidak pernah muncul bersamaan tetap terhitung semua
+        if self.tracker:
+            self.tracker.update(frame_idx, preds)
+            self.defects = self.tracker.counts()
+
+# --- CHECKPOINT ---
+# Hasil per frame ditulis ke DB per batch kecil (dan saat analisis berhenti karena apa pun),
+# dikunci dengan identitas video (cache.video_key) + nomor frame.
+CHECKPOINT_BATCH = 5       # Frame per transaksi
+CHECKPOINT_INTERVAL = 2.0  # Detik, batas maksimal frame tertahan di memori
+CHECKPOINT_FIELDS = ("class", "confidence", "x", "y", "width", "height")
+
+class Checkpointer:
+    def __init__(self, video_key, batch=CHECKPOINT_BATCH, interval=CHECKPOINT_INTERVAL):
+        self.video_key = video_key
+        self.batch = batch
+        self.interval = interval
+        self.total_frames = 0
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def load(self):
+        return db.load_checkpoint(self.video_key)
+
+    def add(self, frame_idx, preds):
+        self._pending.append((frame_idx, [{k: p[k] for k in CHECKPOINT_FIELDS if k in p} for p in preds]))
+        if len(self._pending) >= self.batch or time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self._pending and db.save_checkpoint(self.video_key, self._pending, self.total_frames):
+            self._pending = []
+        self._last_flush = time.monotonic()
+
+# --- ANALISIS SATU VIDEO ---
+# Audit dengan checkpoint yang punya frame gagal (error API): laporan jangan disimpan, checkpoint tetap ada
+# sehingga audit ulang melanjutkan dan mencoba lagi frame yang gagal.
+class AuditIncomplete(RuntimeError):
+    pass
+
+# on_frame(curr, total_frames, annotated, video_defects) dipanggil tiap frame yang selesai dianalisis (urut frame).
+# `metrics` (opsional, default baru): metrics.Metrics untuk timing per tahap; dikembalikan di hasil.
+# `checkpoint_key` (opsional): hasil per frame disimpan selama analisis; jika checkpoint untuk kunci ini sudah ada,
+# agregat dibangun ulang dari checkpoint dan analisis dilanjutkan setelah frame terakhirnya.
+# Pemanggil menghapus checkpoint (db.clear_checkpoint) setelah laporan tersimpan.
+# Frame yang gagal (utils.FailedPredictions) tidak masuk agregat; checkpoint berhenti maju di frame gagal pertama
+# (checkpoint = urutan frame sukses tanpa lubang) dan analyze_video melempar AuditIncomplete di akhir.
+# Policy adaptif (SamplingPolicy.adaptive): stride dihitung ulang tiap hasil frame oleh StrideController;
+# max_calls ditegakkan saat frame dikirim (limit_calls), bukan saat hasilnya masuk.
+# Hasil: stride efektif (frame video per frame dianalisis) dan jumlah panggilan API audit ini, untuk disimpan di laporan;
+# mode cascade: ringkasan panggilan / piksel tambahan dibanding pass resolusi asli (cascade.summarize).
+def analyze_video(video_path, cfg, default_every, growing=None, on_frame=None, metrics=None, checkpoint_key=None):
+    metrics = metrics or Metrics()
+    audit_metrics = Metrics(parent=metrics)  # Hitungan audit ini saja, walau `metrics` dipakai bersama (registry proses)
+    started = time.perf_counter()
+    agg = VideoAggregate(cfg["count_mode"])
+    checkpoint = Checkpointer(checkpoint_key) if checkpoint_key else None
+    resumed = checkpoint.load() if checkpoint else []
+    for idx, preds in resumed:
+        agg.add(idx, preds)
+    if resumed: metrics.inc("resumed_frames", len(resumed))
+    start_frame = resumed[-1][0] if resumed else 0
+
+    vf, frames, selector = open_frame_source(video_path, cfg, default_every, growing, audit_metrics, start_frame, len(resumed))
+    sampled = len(resumed)
+    failed = 0
+    controller = None
+    if isinstance(vf, FrameSampler) and vf.policy.is_adaptive:
+        controller = StrideController(vf.policy, vf.fps, vf.total_frames, cfg["max_inflight"])
+        vf.stride = controller.stride
+        if vf.policy.max_calls is not None:
+            per_frame = 1 + cascade.MAX_CROPS if cfg["cascade"] else 1
+            frames = limit_calls(frames, vf.policy.max_calls, audit_metrics.counters, per_frame)
+
+    try:
+        for curr, annotated, preds in run_inference(frames, cfg, audit_metrics):
+            audit_metrics.inc("frames")
+            if utils.is_failed(preds):
+                failed += 1
+                audit_metrics.inc("failed_frames")
+            else:
+                sampled += 1
+                agg.add(curr, preds)
+                if checkpoint and not failed:
+                    checkpoint.total_frames = vf.total_frames
+                    checkpoint.add(curr, preds)
+            if controller:
+                vf.stride = controller.observe(curr, preds, audit_metrics.counters["api_calls"])
+
+            if on_frame:
+                with audit_metrics.time("ui"): on_frame(curr, vf.total_frames, annotated, agg.defects)
+    finally:
+        # Juga saat gagal / dihentikan (rerun Streamlit, error API): frame yang sudah dibayar tidak hilang
+        if checkpoint: checkpoint.flush()
+        vf.close()
+        audit_metrics.inc("videos")
+        audit_metrics.inc("analysis_seconds", time.perf_counter() - started)
+
+    if failed and checkpoint:
+        raise AuditIncomplete(f"{failed} frame gagal dianalisis (error API). Progress tersimpan, jalankan audit lagi untuk melanjutkan.")
+
+    latency = audit_metrics.histograms.get("frame")
+    return {
+        "defects": agg.defects,
+        "confidences": agg.confidences,
+        "total_frames": vf.total_frames,
+        "sampled": sampled,
+        "resumed": len(resumed),
+        "failed": failed,
+        "stride": vf.total_frames / sampled if sampled else None,
+        "api_calls": audit_metrics.counters["api_calls"],
+        "latency": latency.mean() if latency else None,
+        "api_saved": selector.saved if selector else None,
+        "cascade": cascade.summarize(audit_metrics.counters),
+        "metrics": metrics,
+    }
@@ -0,0 +1,146 @@
+import cv2
+import numpy as np
+import threading
+
+# --- BACKEND INFERENCE ---
+# Semua backend mengembalikan bentuk hasil yang sama seperti Roboflow workflow:
+#   [{"predictions": [{"x", "y", "width", "height", "class", "confidence"}, ...]}]
+# (koordinat = titik tengah box, dalam piksel frame input) sehingga utils.parse_workflow_result tetap sama.
+class InferenceBackend:
+    name = "base"
+    batch_size = 1  # Ukuran batch yang efisien untuk backend ini
+
+    @property
+    def identity(self):
+        # Dipakai sebagai namespace cache: hasil backend/model berbeda tidak boleh tertukar
+        return self.name
+
+    def infer(self, frame):
+        return self.infer_batch([frame])[0]
+
+    def infer_batch(self, frames):
+        return [self.infer(f) for f in frames]
+
+# --- 1. REMOTE: ROBOFLOW WORKFLOW (HTTP) ---
+class RemoteWorkflowBackend(InferenceBackend):
+    name = "remote"
+
+    def __init__(self, api_key, workspace_name, workflow_id, api_url="https://detect.roboflow.com"):
+        from inference_sdk import InferenceHTTPClient
+        self.client = InferenceHTTPClient(api_url=api_url, api_key=api_key)
+        self.api_url = api_url
+        self.workspace_name = workspace_name
+        self.workflow_id = workflow_id
+
+    @property
+    def identity(self):
+        return f"remote:{self.workspace_name}/{self.workflow_id}"
+
+    def infer(self, frame):
+        return self.client.run_workflow(
+            workspace_name=self.workspace_name,
+            workflow_id=self.workflow_id,
+            images={"image": frame}
+        )
+
+    def infer_batch(self, frames):
+        # Workflow API menerima 1 gambar per request; paralelisme diatur oleh pipeline
+        return [self.infer(f) for f in frames]
+
+# --- 2. LOKAL: MODEL ONNX DI CPU (OpenCV DNN) ---
+# Mendukung output deteksi ekspor YOLO: (B, 4+nc, N) ala YOLOv8 atau (B, N, 5+nc) ala YOLOv5.
+class LocalOnnxBackend(InferenceBackend):
+    name = "local"
+
+    def __init__(self, model_path, class_names, input_size=640, conf_threshold=0.4, iou_threshold=0.5, batch_size=4):
+        self.model_path = model_path
+        self.class_names = list(class_names)
+        self.input_size = int(input_size)
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.batch_size = max(1, int(batch_size))
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self._lock = threading.Lock()  # cv2.dnn.Net tidak aman dipakai beberapa thread sekaligus
+
+    @property
+    def identity(self):
+        return f"local:{self.model_path}"
+
+    # Letterbox: resize dengan rasio tetap + padding ke input_size x input_size
+    def _letterbox(self, frame):
+        h, w = frame.shape[:2]
+        scale = min(self.input_size / w, self.input_size / h)
+        nw, nh = int(round(w * scale)), int(round(h * scale))
+        canvas = np.full((self.input_size, self.input_size, 3), 114, dtype=np.uint8)
+        canvas[:nh, :nw] = cv2.resize(frame, (nw, nh))
+        return canvas, scale
+
+    def infer_batch(self, frames):
+        results = []
+        for i in range(0, len(frames), self.batch_size):
+            chunk = frames[i:i + self.batch_size]
+            boxed = [self._letterbox(f) for f in chunk]
+            blob = cv2.dnn.blobFromImages([b for b, _ in boxed], 1 / 255.0, (self.input_size, self.input_size), swapRB=True, crop=False)
+            with self._lock:
+                self.net.setInput(blob)
+                out = self.net.forward()
+            for j, (_, scale) in enumerate(boxed):
+                results.append([{"predictions": self._decode(out[j], scale)}])
+        return results
+
+    def _decode(self, out, scale):
+        nc = len(self.class_names)
+        out = np.asarray(out)
+        if out.ndim == 3: out = out[0]
+        if out.shape[0] == 4 + nc and out.shape[1] != 4 + nc:
+            # YOLOv8: (4+nc, N) -> (N, 4+nc)
+            out = out.T
+        if out.shape[1] == 5 + nc:
+            # YOLOv5: objectness * class score
+            scores_all = out[:, 5:] * out[:, 4:5]
+        else:
+            scores_all = out[:, 4:4 + nc]
+
+        class_ids = scores_all.argmax(axis=1)
+        scores = scores_all[np.arange(len(class_ids)), class_ids]
+        keep = scores >= self.conf_threshold
+        if not keep.any(): return []
+
+        boxes = out[keep, :4] / scale  # cx, cy, w, h di koordinat frame asli
+        scores, class_ids = scores[keep], class_ids[keep]
+
+        xywh = np.column_stack([boxes[:, 0] - boxes[:, 2] / 2, boxes[:, 1] - boxes[:, 3] / 2, boxes[:, 2], boxes[:, 3]])
+        idxs = cv2.dnn.NMSBoxes(xywh.tolist(), scores.tolist(), self.conf_threshold, self.iou_threshold)
+
+        preds = []
+        for k in np.array(idxs).flatten():
+            cx, cy, bw, bh = boxes[k]
+            preds.append({
+                "x": float(cx), "y": float(cy), "width": float(bw), "height": float(bh),
+                "class": self.class_names[class_ids[k]],
+                "confidence": float(scores[k]),
+            })
+        return preds
+
+# --- FACTORY ---
+# `config` = mapping (mis. st.secrets). INFERENCE_BACKEND: "remote" (default) atau "local".
+def create_backend(config):
+    kind = str(config.get("INFERENCE_BACKEND", "remote")).lower()
+    if kind == "local":
+        return LocalOnnxBackend(
+            model_path=config["LOCAL_MODEL_PATH"],
+            class_names=config["LOCAL_MODEL_CLASSES"],
+            input_size=config.get("LOCAL_MODEL_INPUT", 640),
+            conf_threshold=config.get("LOCAL_CONF_THRESHOLD", 0.4),
+            batch_size=config.get("LOCAL_BATCH_SIZE", 4),
+        )
+    if kind == "remote":
+        return RemoteWorkflowBackend(
+            api_key=config["ROBOFLOW_API_KEY"],
+            workspace_name=config["ROBOFLOW_WORKSPACE"],
+            workflow_id=config["ROBOFLOW_WORKFLOW"],
+            api_url=config.get("ROBOFLOW_API_URL", "https://detect.roboflow.com"),
+        )
+    raise ValueError(f"INFERENCE_BACKEND tidak dikenal: {kind}")
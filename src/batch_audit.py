@@ -0,0 +1,225 @@
+"""Batch audit video tanpa Streamlit.
+
+Contoh:
+    python src/batch_audit.py /data/videos --gedung "FPMIPA A" --workers 4 --inflight 8
+    python src/batch_audit.py manifest.csv --every-seconds 1
+
+Manifest CSV (header: video,gedung,ruangan[,deskripsi]) atau JSON (list objek dengan key yang sama).
+Path video relatif dihitung dari folder manifest.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import database as db
+import audit
+import backends
+import cache
+import cascade
+import utils
+from metrics import Metrics
+from sampler import SamplingPolicy
+from scoring import calculate_score, get_rules
+
+# --- KONFIGURASI BATCH ---
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".webm"}
+DEFAULT_WORKERS = 2      # Proses analisis video paralel
+COMMIT_EVERY = 20        # Laporan ditulis ke DB per N video
+SECRETS_PATHS = [os.path.join(".streamlit", "secrets.toml"), os.path.expanduser(os.path.join("~", ".streamlit", "secrets.toml"))]
+CONFIG_KEYS = ["INFERENCE_BACKEND", "ROBOFLOW_API_KEY", "ROBOFLOW_WORKSPACE", "ROBOFLOW_WORKFLOW", "ROBOFLOW_API_URL",
+               "LOCAL_MODEL_PATH", "LOCAL_MODEL_CLASSES", "LOCAL_MODEL_INPUT", "LOCAL_CONF_THRESHOLD", "LOCAL_BATCH_SIZE"]
+
+# --- KONFIGURASI BACKEND ---
+# Sama seperti aplikasi: secrets.toml (lokasi yang sama dengan Streamlit), bisa ditimpa environment variable
+def load_config(path=None):
+    config = {}
+    for candidate in ([path] if path else SECRETS_PATHS):
+        if os.path.exists(candidate):
+            with open(candidate, "rb") as f:
+                config = tomllib.load(f)
+            break
+    else:
+        if path: raise FileNotFoundError(path)
+
+    for key in CONFIG_KEYS:
+        if key in os.environ: config[key] = os.environ[key]
+    if isinstance(config.get("LOCAL_MODEL_CLASSES"), str):
+        config["LOCAL_MODEL_CLASSES"] = [c.strip() for c in config["LOCAL_MODEL_CLASSES"].split(",")]
+    return config
+
+# --- DAFTAR VIDEO ---
+def _item(video, gedung, ruangan, deskripsi=None):
+    return {"video": video, "gedung": gedung, "ruangan": ruangan,
+            "deskripsi": deskripsi or f"Batch-Audit: {os.path.basename(video)}"}
+
+def load_manifest(path):
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = json.load(f) if path.lower().endswith(".json") else list(csv.DictReader(f))
+    return [
+        _item(os.path.join(base, r["video"]), r["gedung"], r["ruangan"], r.get("deskripsi"))
+        for r in rows
+    ]
+
+# Folder: semua video (tidak rekursif); ruangan = nama file, gedung = --gedung atau nama folder
+def scan_directory(path, gedung=None):
+    gedung = gedung or os.path.basename(os.path.abspath(path))
+    return [
+        _item(os.path.join(path, name), gedung, os.path.splitext(name)[0])
+        for name in sorted(os.listdir(path))
+        if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS
+    ]
+
+# --- WORKER (proses terpisah) ---
+def _init_worker(config):
+    utils.set_backend(backends.create_backend(config))
+
+def audit_video(item, cfg_json, default_every):
+    cfg = audit.settings_from_json(cfg_json)
+    started = time.perf_counter()
+    result = {**item, "defects": {}, "confidences": {}, "total_frames": 0, "sampled": 0, "resumed": 0,
+              "stride": None, "api_calls": 0, "cached": False, "error": None, "metrics": None, "video_key": None}
+    try:
+        # Identitas video (isi + setting): kunci cache dan checkpoint (video yang terputus dilanjutkan saat batch diulang)
+        video_key = result["video_key"] = cache.video_key(cache.hash_content(item["video"]), audit.video_settings(cfg, default_every))
+        if cfg["use_cache"]:
+            cached = cache.get_cache().get_video(video_key)
+            if cached is not None:
+                result.update(defects=cached, cached=True)
+                return result
+
+        analysis = audit.analyze_video(item["video"], cfg, default_every, checkpoint_key=video_key)
+        result["metrics"] = analysis["metrics"].snapshot()
+        result.update(
+            defects=dict(analysis["defects"]), confidences=analysis["confidences"],
+            total_frames=analysis["total_frames"], sampled=analysis["sampled"], resumed=analysis["resumed"],
+            # Panggilan backend yang sebenarnya (frame dari cache tidak dihitung)
+            stride=analysis["stride"], api_calls=analysis["api_calls"],
+        )
+        if cfg["use_cache"]: cache.get_cache().put_video(video_key, result["defects"])
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        result["elapsed"] = time.perf_counter() - started
+    return result
+
+# --- MAIN ---
+def _report(result):
+    rules = get_rules()
+    score, deduc, stat = calculate_score(result["defects"], rules)
+    return {"gedung": result["gedung"], "ruangan": result["ruangan"], "jenis_kerusakan": str(result["defects"]),
+            "confidence_score": score, "status": stat, "deskripsi": result["deskripsi"],
+            "detections": result["defects"], "confidences": result["confidences"],
+            "sampling_stride": result["stride"], "api_calls": result["api_calls"], "rule_version": rules.version}
+
+# Tulis laporan lalu hapus checkpoint video yang laporannya sudah tersimpan
+def _save(pending, stage_metrics):
+    with stage_metrics.time("db_write"):
+        ids = db.create_laporan_bulk([report for report, _ in pending])
+    if ids:
+        for _, key in pending:
+            if key: db.clear_checkpoint(key)
+    return len(ids)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Batch audit video ruangan tanpa Streamlit")
+    parser.add_argument("source", help="Folder video atau manifest (.csv/.json)")
+    parser.add_argument("--gedung", help="Nama gedung untuk mode folder (default: nama folder)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Jumlah proses analisis paralel")
+    parser.add_argument("--inflight", type=int, default=audit.DEFAULT_SETTINGS["max_inflight"],
+                        help="Request inference bersamaan per proses")
+    sampling = parser.add_mutually_exclusive_group()
+    sampling.add_argument("--every-n", type=int, help="Analisis tiap N frame")
+    sampling.add_argument("--every-seconds", type=float, help="Analisis tiap T detik")
+    sampling.add_argument("--max-frames", type=int, help="Maksimal K frame per video")
+    parser.add_argument("--target-seconds", type=float, help="Sampling adaptif: target waktu analisis per video (detik)")
+    parser.add_argument("--max-calls", type=int, help="Sampling adaptif: maksimal panggilan API per video")
+    parser.add_argument("--keyframe", action="store_true", help="Lewati frame yang mirip frame sebelumnya")
+    parser.add_argument("--cascade", action="store_true", help="Deteksi kecil / ragu dianalisis ulang dari crop resolusi asli")
+    parser.add_argument("--track", action="store_true", help="Hitung kerusakan unik dengan tracker (cocok untuk sampling jarang)")
+    parser.add_argument("--no-cache", action="store_true", help="Jangan pakai cache hasil inference")
+    parser.add_argument("--secrets", help="Path secrets.toml (default: .streamlit/secrets.toml)")
+    parser.add_argument("--metrics-out", help="Simpan metrik per tahap (format Prometheus) ke file ini")
+    parser.add_argument("--commit-every", type=int, default=COMMIT_EVERY, help="Tulis laporan ke DB per N video")
+    args = parser.parse_args(argv)
+    if (args.target_seconds or args.max_calls) and (args.every_n or args.every_seconds or args.max_frames):
+        parser.error("--target-seconds/--max-calls tidak bisa digabung dengan --every-n/--every-seconds/--max-frames")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    items = load_manifest(args.source) if os.path.isfile(args.source) else scan_directory(args.source, args.gedung)
+    if not items:
+        print("Tidak ada video untuk diproses.")
+        return 1
+
+    policy = None
+    if args.every_n: policy = SamplingPolicy.every_n(args.every_n)
+    elif args.every_seconds: policy = SamplingPolicy.every(args.every_seconds)
+    elif args.max_frames: policy = SamplingPolicy.budget(args.max_frames)
+    elif args.target_seconds or args.max_calls: policy = SamplingPolicy.adaptive(args.target_seconds, args.max_calls)
+    cfg = {**audit.DEFAULT_SETTINGS, "max_inflight": args.inflight, "sampling_policy": policy,
+           "keyframe": args.keyframe, "use_cache": not args.no_cache,
+           "count_mode": "track" if args.track else "max", "cascade": args.cascade}
+    cfg_json = audit.settings_to_json(cfg)
+    config = load_config(args.secrets)
+
+    db.init_db()
+    if cfg["use_cache"]: cache.get_cache()  # Tabel cache dibuat sekali di sini, sebelum worker dibuat
+    print(f"▶️ {len(items)} video, {args.workers} proses x {args.inflight} request inference")
+
+    started = time.perf_counter()
+    pending, saved, failed = [], 0, 0
+    totals = {"frames": 0, "sampled": 0, "api_calls": 0, "cached": 0}
+    stage_metrics = Metrics()
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=ctx, initializer=_init_worker, initargs=(config,)) as pool:
+        futures = [pool.submit(audit_video, item, cfg_json, audit.UPLOAD_SAMPLE_EVERY) for item in items]
+        for n, future in enumerate(as_completed(futures), 1):
+            r = future.result()
+            name = os.path.basename(r["video"])
+            if r["error"]:
+                failed += 1
+                print(f"[{n}/{len(items)}] ❌ {name}: {r['error']}")
+                continue
+
+            totals["frames"] += r["total_frames"]
+            totals["sampled"] += r["sampled"]
+            totals["api_calls"] += r["api_calls"]
+            totals["cached"] += r["cached"]
+            if r["metrics"]: stage_metrics.merge(r["metrics"])
+            report = _report(r)
+            pending.append((report, r["video_key"]))
+            source = "cache" if r["cached"] else f"{r['sampled']} frame, {r['api_calls']} API"
+            if r["resumed"]: source += f", {r['resumed']} dari checkpoint"
+            print(f"[{n}/{len(items)}] {r['gedung']} / {r['ruangan']}: {report['confidence_score']} {report['status']} "
+                  f"({source}, {r['elapsed']:.1f}s)")
+
+            if len(pending) >= args.commit_every:
+                saved += _save(pending, stage_metrics)
+                pending = []
+
+    saved += _save(pending, stage_metrics)
+    elapsed = time.perf_counter() - started
+
+    print("-" * 60)
+    print(f"Selesai dalam {elapsed:.1f}s: {saved} laporan tersimpan, {failed} gagal, {totals['cached']} dari cache")
+    print(f"Throughput: {len(items) / elapsed * 60:.1f} video/menit, "
+          f"{totals['frames'] / elapsed:.1f} frame video/s, {totals['sampled'] / elapsed:.1f} frame dianalisis/s")
+    print(f"API calls: {totals['api_calls']} ({totals['api_calls'] / elapsed:.1f}/s)")
+    summary = cascade.summarize(stage_metrics.counters)
+    if summary: print(f"Cascade: {cascade.describe(summary)}")
+    for row in stage_metrics.stage_table():
+        print(f"  {row['tahap']:<10} n={row['jumlah']:<6} rata2 {row['rata2_ms']:8.1f} ms  p95 {row['p95_ms']:8.1f} ms")
+    if args.metrics_out:
+        print(f"Metrik: {stage_metrics.export(args.metrics_out)}")
+    return 0 if not failed else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+from sqlalchemy import create_engine, Column, Integer, String, Float, Text, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker, declarative_base
+import hashlib
+import json
+import os
+import threading
+import time
+
+# --- KONFIGURASI CACHE ---
+# Di luar folder source (data lokal pengguna), bisa diganti lewat env
+CACHE_PATH = os.environ.get("SMARTREPORT_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "smartreport", "inference_cache.db"))
+MAX_CACHE_BYTES = 256 * 1024 * 1024  # Batas ukuran total hasil yang disimpan (LRU)
+EVICT_TO = 0.9  # Saat penuh, buang entri lama sampai tersisa 90% dari batas
+HASH_CHUNK = 1024 * 1024
+
+Base = declarative_base()
+
+# --- MODEL TABEL ---
+class CachedVideo(Base):
+    __tablename__ = "cache_video"
+    key = Column(String(64), primary_key=True)  # hash isi video + setting sampling/resize
+    result = Column(Text)                       # JSON hasil agregasi per video
+    size = Column(Integer)
+    last_access = Column(Float, index=True)
+
+class CachedFrame(Base):
+    __tablename__ = "cache_frame"
+    key = Column(String(64), primary_key=True)  # hash piksel frame + namespace model
+    result = Column(Text)                       # JSON list prediksi (dengan box)
+    size = Column(Integer)
+    last_access = Column(Float, index=True)
+
+# Beberapa proses (worker batch_audit / job) bisa membuka file cache baru bersamaan: create_all mengecek lalu membuat
+# tabel, sehingga proses lain bisa lebih dulu membuatnya di antara keduanya. "already exists" -> cek ulang.
+def create_tables(engine, attempts=3):
+    for attempt in range(attempts):
+        try:
+            Base.metadata.create_all(bind=engine)
+            return
+        except OperationalError as e:
+            if "already exists" not in str(e) or attempt == attempts - 1: raise
+
+# --- HASHING ---
+# `source` boleh path file atau file-like (mis. UploadedFile Streamlit)
+def hash_content(source):
+    h = hashlib.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                h.update(chunk)
+    else:
+        pos = source.tell()
+        source.seek(0)
+        for chunk in iter(lambda: source.read(HASH_CHUNK), b""):
+            h.update(chunk)
+        source.seek(pos)
+    return h.hexdigest()
+
+def video_key(content_hash, settings):
+    h = hashlib.sha256(content_hash.encode())
+    h.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+def frame_key(frame, namespace=""):
+    h = hashlib.blake2b(digest_size=20)
+    h.update(namespace.encode())
+    h.update(str(frame.shape).encode())
+    h.update(frame.tobytes())
+    return h.hexdigest()
+
+# --- CACHE HASIL INFERENCE ---
+class InferenceCache:
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30}, echo=False)
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        create_tables(self.engine)
+        self._lock = threading.Lock()
+        self._total = self.total_bytes()  # Perkiraan ukuran, dihitung ulang saat eviction
+        self.stats = {"video_hit": 0, "video_miss": 0, "frame_hit": 0, "frame_miss": 0, "evicted": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _get(self, model, key):
+        session = self.Session()
+        try:
+            row = session.get(model, key)
+            if row is None: return None
+            row.last_access = time.time()
+            session.commit()
+            return json.loads(row.result)
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Cache Read Error: {e}")
+            return None
+        finally:
+            session.close()
+
+    def _put(self, model, key, value):
+        payload = json.dumps(value)
+        session = self.Session()
+        try:
+            # Key yang ditimpa: ukuran lama dikurangi, bukan dijumlah dua kali
+            old_size = session.query(model.size).filter(model.key == key).scalar() or 0
+            session.merge(model(key=key, result=payload, size=len(payload), last_access=time.time()))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Cache Write Error: {e}")
+            return
+        finally:
+            session.close()
+
+        with self._lock:
+            self._total += len(payload) - old_size
+            over = self._total > self.max_bytes
+        if over: self.evict()
+
+    # --- Per video ---
+    def get_video(self, key):
+        value = self._get(CachedVideo, key)
+        self._count("video_hit" if value is not None else "video_miss")
+        return value
+
+    def put_video(self, key, result):
+        self._put(CachedVideo, key, result)
+
+    # --- Per frame ---
+    def get_frame(self, key):
+        value = self._get(CachedFrame, key)
+        self._count("frame_hit" if value is not None else "frame_miss")
+        return value
+
+    def put_frame(self, key, preds):
+        self._put(CachedFrame, key, preds)
+
+    # Bungkus fungsi detect(frame) -> preds agar frame yang sudah pernah dianalisis tidak memanggil API lagi
+    def cached_detect(self, detect_fn, namespace=""):
+        def _detect(frame):
+            key = frame_key(frame, namespace)
+            preds = self.get_frame(key)
+            if preds is None:
+                preds = detect_fn(frame)  # Error tidak di-cache
+                self.put_frame(key, preds)
+            return preds
+        return _detect
+
+    # Versi batch: hanya frame yang belum ada di cache yang dikirim ke detect_batch_fn
+    def cached_detect_batch(self, detect_batch_fn, namespace=""):
+        def _detect_batch(frames):
+            keys = [frame_key(f, namespace) for f in frames]
+            results = [self.get_frame(k) for k in keys]
+            missing = [i for i, r in enumerate(results) if r is None]
+            if missing:
+                fresh = detect_batch_fn([frames[i] for i in missing])
+                for i, preds in zip(missing, fresh):
+                    self.put_frame(keys[i], preds)
+                    results[i] = preds
+            return results
+        return _detect_batch
+
+    # --- LRU EVICTION (berdasarkan ukuran total) ---
+    def total_bytes(self):
+        session = self.Session()
+        try:
+            return sum(session.query(func.coalesce(func.sum(m.size), 0)).scalar() for m in (CachedVideo, CachedFrame))
+        finally:
+            session.close()
+
+    def evict(self):
+        session = self.Session()
+        try:
+            total = self.total_bytes()
+            target = int(self.max_bytes * EVICT_TO)
+            if total <= self.max_bytes:
+                with self._lock: self._total = total
+                return 0
+
+            # Hapus entri paling lama tidak diakses (gabungan kedua tabel) sampai di bawah target
+            rows = []
+            for m in (CachedVideo, CachedFrame):
+                rows += [(r.last_access, m, r.key, r.size) for r in session.query(m.last_access, m.key, m.size)]
+            rows.sort(key=lambda r: r[0])
+
+            removed = 0
+            for _, m, key, size in rows:
+                if total <= target: break
+                session.query(m).filter(m.key == key).delete()
+                total -= size
+                removed += 1
+            session.commit()
+            with self._lock:
+                self._total = total
+                self.stats["evicted"] += removed
+            return removed
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️ Cache Evict Error: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def clear(self):
+        session = self.Session()
+        try:
+            session.query(CachedVideo).delete()
+            session.query(CachedFrame).delete()
+            session.commit()
+            with self._lock: self._total = 0
+        finally:
+            session.close()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# Satu instance cache per proses
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = InferenceCache()
+        return _cache
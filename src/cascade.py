@@ -0,0 +1,127 @@
+import time
+import numpy as np
+from tracker import iou_matrix
+import framestore
+
+# --- KONFIGURASI CASCADE ---
+# Tahap 1: frame diperkecil (lebar inference biasa) -> deteksi murah.
+# Tahap 2: hanya area di sekitar deteksi yang ragu (confidence rendah) atau kecil (mis. sobek) yang
+# dipotong dari frame resolusi asli dan dianalisis ulang. Hasil kedua tahap digabung dengan NMS.
+REFINE_CONFIDENCE = 0.6   # Deteksi di bawah confidence ini dicek ulang
+SMALL_AREA = 0.01         # Deteksi dengan luas < fraksi ini dari frame dianggap kecil
+CROP_CONTEXT = 3.0        # Sisi crop = sisi box x faktor ini (konteks di sekitar kerusakan)
+CROP_MIN_SIZE = 320       # Sisi crop minimal (piksel resolusi asli)
+MAX_CROPS = 4             # Crop per frame (deteksi paling ragu didahulukan)
+MIN_UPSCALE = 1.25        # Frame asli harus minimal sekian kali lebih lebar dari frame tahap 1
+NMS_IOU = 0.5
+
+# --- NMS ---
+# Per kelas: box dengan confidence tertinggi dipertahankan, box lain yang tumpang tindih (IoU >= iou) dibuang
+def nms(preds, iou=NMS_IOU):
+    keep = []
+    for cls in {p['class'] for p in preds}:
+        group = sorted((p for p in preds if p['class'] == cls), key=lambda p: p['confidence'], reverse=True)
+        boxes = np.array([[p['x'], p['y'], p['width'], p['height']] for p in group], dtype=float)
+        overlap = iou_matrix(boxes, boxes)
+        suppressed = np.zeros(len(group), dtype=bool)
+        for i, p in enumerate(group):
+            if suppressed[i]: continue
+            keep.append(p)
+            suppressed |= overlap[i] >= iou
+    return keep
+
+# --- PEMILIHAN CROP ---
+def needs_refine(p, frame_area):
+    return p['confidence'] < REFINE_CONFIDENCE or p['width'] * p['height'] < SMALL_AREA * frame_area
+
+# Box (koordinat frame tahap 1) -> persegi crop (x1, y1, x2, y2) di resolusi asli, crop yang tumpang tindih digabung
+def crop_regions(preds, scale, native_shape):
+    nh, nw = native_shape[:2]
+    regions = []
+    for p in sorted(preds, key=lambda p: p['confidence'])[:MAX_CROPS]:
+        side = min(max(max(p['width'], p['height']) * scale * CROP_CONTEXT, CROP_MIN_SIZE), nw, nh)
+        cx = min(max(p['x'] * scale, side / 2), nw - side / 2)
+        cy = min(max(p['y'] * scale, side / 2), nh - side / 2)
+        regions.append([int(cx - side / 2), int(cy - side / 2), int(cx + side / 2), int(cy + side / 2)])
+
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(regions)):
+            for j in range(i + 1, len(regions)):
+                a, b = regions[i], regions[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    regions[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del regions[j]
+                    merged = True
+                    break
+            if merged: break
+    return regions
+
+# --- DETEKTOR CASCADE ---
+# detect_fn(frame) -> list prediksi (utils.detect / versi ber-cache); dipanggil untuk frame kecil dan tiap crop.
+# Dipakai bersamaan dari thread pipeline; statistik dicatat sebagai counter `metrics`:
+#   cascade_frames, cascade_crops (panggilan tambahan), cascade_low_pixels, cascade_crop_pixels,
+#   cascade_native_pixels (yang akan dikirim jika semua frame dianalisis di resolusi asli).
+class CascadeDetector:
+    def __init__(self, detect_fn, width, metrics=None):
+        self.detect_fn = detect_fn
+        self.width = width
+        self.metrics = metrics
+
+    def _inc(self, name, value=1):
+        if self.metrics: self.metrics.inc(name, value)
+
+    # Return (frame kecil, prediksi dalam koordinat frame kecil)
+    def detect(self, native):
+        start = time.perf_counter()
+        low = framestore.resize_to_width(native, self.width)
+        if self.metrics: self.metrics.observe("resize", time.perf_counter() - start)
+        preds = self.detect_fn(low)
+        self._inc("cascade_frames")
+        self._inc("cascade_low_pixels", low.shape[0] * low.shape[1])
+        self._inc("cascade_native_pixels", native.shape[0] * native.shape[1])
+
+        scale = native.shape[1] / low.shape[1]
+        candidates = [p for p in preds if needs_refine(p, low.shape[0] * low.shape[1])]
+        if scale < MIN_UPSCALE or not candidates:
+            return low, preds
+
+        refined = []
+        for x1, y1, x2, y2 in crop_regions(candidates, scale, native.shape):
+            crop = native[y1:y2, x1:x2]
+            self._inc("cascade_crops")
+            self._inc("cascade_crop_pixels", crop.shape[0] * crop.shape[1])
+            try:
+                crop_preds = self.detect_fn(np.ascontiguousarray(crop))
+            except Exception as e:
+                # Crop gagal: hasil tahap 1 tetap dipakai
+                print(f"Cascade Error: {e}")
+                self._inc("cascade_errors")
+                continue
+            for p in crop_preds:
+                refined.append({**p, "x": (p['x'] + x1) / scale, "y": (p['y'] + y1) / scale,
+                                "width": p['width'] / scale, "height": p['height'] / scale})
+        return low, nms(preds + refined)
+
+# Ringkasan biaya cascade dibanding satu pass resolusi asli per frame
+def summarize(counters):
+    frames = counters.get("cascade_frames", 0)
+    if not frames: return None
+    crops = counters.get("cascade_crops", 0)
+    pixels = counters.get("cascade_low_pixels", 0) + counters.get("cascade_crop_pixels", 0)
+    native = counters.get("cascade_native_pixels", 0)
+    return {
+        "frames": frames,
+        "calls": frames + crops,
+        "extra_calls": crops,                            # vs pass resolusi asli (1 panggilan per frame)
+        "pixels": pixels,
+        "full_res_pixels": native,
+        "extra_pixels": pixels - native,                 # Negatif = piksel yang dihemat
+        "pixel_ratio": pixels / native if native else None,
+    }
+
+def describe(summary):
+    return (f"{summary['extra_calls']} panggilan tambahan ({summary['calls']} vs {summary['frames']} pass resolusi asli), "
+            f"{summary['pixels'] / 1e6:.1f} MP dikirim vs {summary['full_res_pixels'] / 1e6:.1f} MP resolusi asli "
+            f"({summary['pixel_ratio']:.0%})")
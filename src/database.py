@@ -1,16 +1,41 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import create_engine, event, text, func, select, and_, or_, Column, Integer, String, Float, DateTime, Text, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import sessionmaker, declarative_base
-from datetime import datetime
+from datetime import datetime, timedelta
 import pandas as pd
+import ast
+import json
 import os
+import threading
+import spool
+from scoring import STATUS_LAYAK, STATUS_RUSAK_BERAT
 
 # --- KONFIGURASI PATH DATABASE (FIXED) ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "smartreport.db")
+DB_PATH = os.environ.get("SMARTREPORT_DB_PATH", os.path.join(BASE_DIR, "smartreport.db"))
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
 # Setup Engine
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False}, echo=False)
+engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False, "timeout": 30}, echo=False)
+
+# --- TUNING SQLITE ---
+# WAL: pembaca (halaman history/dashboard) tidak diblok oleh penulis (scanner / job worker).
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",      # Aman untuk WAL, jauh lebih sedikit fsync
+    "busy_timeout": 5000,         # ms, tunggu lock daripada langsung gagal
+    "cache_size": -32000,         # ~32 MB page cache per koneksi
+    "temp_store": "MEMORY",
+    "mmap_size": 268435456,       # 256 MB
+    "foreign_keys": "ON",
+}
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_conn, _):
+    cursor = dbapi_conn.cursor()
+    for key, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {key}={value}")
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -18,34 +43,195 @@ Base = declarative_base()
 class Laporan(Base):
     __tablename__ = "laporan_kerusakan"
     id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(DateTime, default=datetime.now)
-    gedung = Column(String(50))
+    timestamp = Column(DateTime, default=datetime.now, index=True)
+    gedung = Column(String(50), index=True)
     ruangan = Column(String(50))
     jenis_kerusakan = Column(String(100))
     confidence_score = Column(Float)
-    status = Column(String(20))
+    status = Column(String(20), index=True)
+    deskripsi = Column(Text, nullable=True)
+    sampling_stride = Column(Float, nullable=True)  # Stride efektif: frame video per frame yang dianalisis
+    api_calls = Column(Integer, nullable=True)      # Panggilan API inference selama audit (tanpa hit cache)
+    rule_version = Column(Integer, nullable=True)   # Versi aturan skor (scoring_rules.json) saat skor dihitung; NULL = tidak diketahui (laporan lama)
+
+# Satu baris per (laporan, kelas kerusakan): jumlah maksimum per frame dan confidence tertinggi.
+# Versi terstruktur dari `jenis_kerusakan`, sehingga rekap per kelas/gedung/periode cukup dengan SQL.
+class Deteksi(Base):
+    __tablename__ = "deteksi"
+    id = Column(Integer, primary_key=True)
+    laporan_id = Column(Integer, ForeignKey("laporan_kerusakan.id", ondelete="CASCADE"), nullable=False)
+    kelas = Column(String(50), nullable=False)
+    jumlah = Column(Integer, nullable=False)
+    max_confidence = Column(Float, nullable=True)  # NULL untuk data lama (hasil backfill) / hasil dari cache video
+    __table_args__ = (
+        UniqueConstraint("laporan_id", "kelas", name="uq_deteksi_laporan_kelas"),
+        Index("ix_deteksi_kelas_laporan", "kelas", "laporan_id"),
+    )
+
+# Rekap laporan yang diperbarui inkremental oleh create_laporan (transaksi yang sama),
+# sehingga dashboard cukup membaca beberapa baris, berapa pun ukuran laporan_kerusakan.
+# dimensi: "total" (kunci ""), "status", "gedung", "hari" (YYYY-MM-DD)
+class Ringkasan(Base):
+    __tablename__ = "ringkasan"
+    dimensi = Column(String(20), primary_key=True)
+    kunci = Column(String(50), primary_key=True)
+    jumlah = Column(Integer, default=0, nullable=False)          # Jumlah laporan
+    perlu_tindakan = Column(Integer, default=0, nullable=False)  # Laporan dengan status selain Layak Pakai
+    total_skor = Column(Float, default=0.0, nullable=False)      # Untuk rata-rata skor = total_skor / jumlah
+
+# Versi data per tabel, naik setiap kali isi tabel berubah (dalam transaksi yang sama).
+# Dipakai sebagai kunci cache di UI, berlaku lintas proses (scanner, job worker, CLI).
+class DataVersion(Base):
+    __tablename__ = "data_version"
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, default=0)
+
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    status = Column(String(20), default="queued")  # queued, running, done, failed
+    progress = Column(Float, default=0.0)
+    video_path = Column(Text)
+    gedung = Column(String(50))
+    ruangan = Column(String(50))
     deskripsi = Column(Text, nullable=True)
+    settings = Column(Text)                  # JSON setting analisis
+    result = Column(Text, nullable=True)     # JSON hasil (sementara selama running, final saat done)
+    preview_path = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    laporan_id = Column(Integer, nullable=True)
+    metrics = Column(Text, nullable=True)    # JSON snapshot metrics.Metrics (timing per tahap, counter)
+    owner_pid = Column(Integer, nullable=True)  # Proses yang memegang job: server Streamlit (queued) / worker (running)
+
+# Checkpoint analisis per video: hasil per frame ditulis selagi analisis berjalan,
+# sehingga audit yang terputus (rerun, browser tertutup, API gagal) bisa dilanjutkan.
+class Checkpoint(Base):
+    __tablename__ = "checkpoint"
+    video_key = Column(String(64), primary_key=True)   # cache.video_key: hash isi video + setting analisis
+    total_frames = Column(Integer, default=0)
+    last_frame = Column(Integer, default=0)            # Frame terakhir yang sudah dianalisis (urut)
+    frames = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.now, index=True)
+
+class CheckpointFrame(Base):
+    __tablename__ = "checkpoint_frame"
+    video_key = Column(String(64), ForeignKey("checkpoint.video_key", ondelete="CASCADE"), primary_key=True)
+    frame_idx = Column(Integer, primary_key=True)
+    preds = Column(Text)                               # JSON list prediksi (class, confidence, box)
 
 # --- FUNGSI CRUD ---
-def init_db():
-    Base.metadata.create_all(bind=engine)
+# Cukup sekali per proses (create_all, cek skema, migrasi); force=True untuk menjalankan ulang (mis. tombol reset DB)
+_initialized = False
+_init_lock = threading.Lock()
+
+def init_db(force=False):
+    global _initialized
+    with _init_lock:
+        if _initialized and not force: return
+        Base.metadata.create_all(bind=engine)
+        upgrade_schema()
+        optimize()
+        fail_orphaned_jobs()
+        backfill_deteksi()
+        if get_ringkasan("total") == {}: rebuild_ringkasan()
+        prune_checkpoints()
+        _initialized = True
+
+# Upgrade skema untuk database lama (idempotent). create_all tidak menambah index ke tabel yang sudah ada.
+SCHEMA_INDEXES = {
+    "ix_laporan_kerusakan_timestamp": "CREATE INDEX IF NOT EXISTS ix_laporan_kerusakan_timestamp ON laporan_kerusakan (timestamp)",
+    "ix_laporan_kerusakan_status": "CREATE INDEX IF NOT EXISTS ix_laporan_kerusakan_status ON laporan_kerusakan (status)",
+    "ix_laporan_kerusakan_gedung": "CREATE INDEX IF NOT EXISTS ix_laporan_kerusakan_gedung ON laporan_kerusakan (gedung)",
+}
+
+# Kolom yang ditambahkan setelah tabel dibuat: (tabel, kolom) -> DDL
+SCHEMA_COLUMNS = {
+    ("jobs", "metrics"): "ALTER TABLE jobs ADD COLUMN metrics TEXT",
+    ("jobs", "owner_pid"): "ALTER TABLE jobs ADD COLUMN owner_pid INTEGER",
+    ("laporan_kerusakan", "sampling_stride"): "ALTER TABLE laporan_kerusakan ADD COLUMN sampling_stride FLOAT",
+    ("laporan_kerusakan", "api_calls"): "ALTER TABLE laporan_kerusakan ADD COLUMN api_calls INTEGER",
+    ("laporan_kerusakan", "rule_version"): "ALTER TABLE laporan_kerusakan ADD COLUMN rule_version INTEGER",
+}
+
+def upgrade_schema():
+    with engine.begin() as conn:
+        for (table, column), ddl in SCHEMA_COLUMNS.items():
+            columns = {r[1] for r in conn.execute(text(f"PRAGMA table_info({table})"))}
+            if column not in columns: conn.execute(text(ddl))
+
+        existing = {r[0] for r in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+        missing = [name for name in SCHEMA_INDEXES if name not in existing]
+        for name in missing:
+            conn.execute(text(SCHEMA_INDEXES[name]))
+        # Statistik untuk query planner, cukup sekali setelah index baru dibuat
+        if missing:
+            conn.execute(text("ANALYZE"))
+
+# Statistik query planner (ANALYZE) diperbarui saat jumlah laporan sudah >= ANALYZE_GROWTH x jumlah saat ANALYZE terakhir
+# (dicek sekali per proses di init_db). Tanpa statistik terbaru (mis. index dibuat saat tabel masih kosong) planner
+# memilih index status + sort untuk halaman history terfilter, bukan scan index timestamp.
+ANALYZE_GROWTH = 2
+ANALYZE_MIN_ROWS = 1000
+
+def optimize():
+    with engine.begin() as conn:
+        rows = conn.execute(text("SELECT COUNT(*) FROM laporan_kerusakan")).scalar()
+        last = conn.execute(text("SELECT version FROM data_version WHERE name = 'analyze_rows'")).scalar()
+        if last is not None and rows < max(last, ANALYZE_MIN_ROWS) * ANALYZE_GROWTH: return False
+        conn.execute(text("ANALYZE"))
+        conn.execute(text("INSERT INTO data_version (name, version) VALUES ('analyze_rows', :rows) "
+                          "ON CONFLICT(name) DO UPDATE SET version = excluded.version"), {"rows": rows})
+        return True
+
+# `jenis_kerusakan` lama berupa str(dict) -> dict {kelas: jumlah}. Data rusak/kosong -> {}.
+def parse_jenis_kerusakan(value):
+    try:
+        data = ast.literal_eval(value) if value else {}
+    except (ValueError, SyntaxError):
+        return {}
+    if not isinstance(data, dict): return {}
+    return {str(k): int(v) for k, v in data.items() if isinstance(v, (int, float)) and v > 0}
+
+def _deteksi_rows(laporan_id, detections, confidences=None):
+    confidences = confidences or {}
+    return [
+        Deteksi(laporan_id=laporan_id, kelas=kelas, jumlah=int(jumlah), max_confidence=confidences.get(kelas))
+        for kelas, jumlah in detections.items() if jumlah > 0
+    ]
 
 # [FIX] Nama parameter disamakan dengan field tabel (jenis -> jenis_kerusakan, confidence -> confidence_score)
-def create_laporan(gedung, ruangan, jenis_kerusakan, confidence_score, status, deskripsi=""):
+# `detections` {kelas: jumlah} (default: hasil parse jenis_kerusakan), `confidences` {kelas: confidence tertinggi}.
+# `sampling_stride` / `api_calls`: stride efektif dan jumlah panggilan API audit (hasil audit.analyze_video).
+# `rule_version`: versi aturan skor yang menghasilkan confidence_score/status, diambil saat skor dihitung
+# (ScoringRules.version), bukan saat disimpan. None = tidak diketahui (dianggap usang oleh rescore).
+# Baris laporan dan baris deteksi disimpan dalam satu transaksi.
+def create_laporan(gedung, ruangan, jenis_kerusakan, confidence_score, status, deskripsi="", detections=None, confidences=None,
+                   sampling_stride=None, api_calls=None, rule_version=None):
     session = SessionLocal()
     try:
         new_report = Laporan(
+            timestamp=datetime.now(),
             gedung=gedung, 
             ruangan=ruangan, 
             jenis_kerusakan=jenis_kerusakan,  # Sekarang cocok
             confidence_score=confidence_score, # Sekarang cocok
             status=status, 
-            deskripsi=deskripsi
+            deskripsi=deskripsi,
+            sampling_stride=sampling_stride,
+            api_calls=api_calls,
+            rule_version=rule_version,
         )
         session.add(new_report)
+        session.flush()
+        if detections is None: detections = parse_jenis_kerusakan(jenis_kerusakan)
+        session.add_all(_deteksi_rows(new_report.id, detections, confidences))
+        _update_ringkasan(session, [new_report])
+        _bump_version(session, "laporan")
         session.commit()
         session.refresh(new_report)
-        return True
+        return new_report.id
     except Exception as e:
         session.rollback()
         print(f"❌ Error Saving to DB: {e}")
@@ -53,21 +239,518 @@ def create_laporan(gedung, ruangan, jenis_kerusakan, confidence_score, status, d
     finally:
         session.close()
 
+# Simpan banyak laporan dalam satu transaksi (mis. batch audit CLI).
+# `reports`: list dict dengan key sama seperti argumen create_laporan. Return list id (kosong jika gagal).
+def create_laporan_bulk(reports):
+    if not reports: return []
+    session = SessionLocal()
+    try:
+        rows = [
+            Laporan(timestamp=r.get("timestamp") or datetime.now(), gedung=r["gedung"], ruangan=r["ruangan"], jenis_kerusakan=r["jenis_kerusakan"],
+                    confidence_score=r["confidence_score"], status=r["status"], deskripsi=r.get("deskripsi", ""),
+                    sampling_stride=r.get("sampling_stride"), api_calls=r.get("api_calls"),
+                    rule_version=r.get("rule_version"))
+            for r in reports
+        ]
+        session.add_all(rows)
+        session.flush()
+        ids = [row.id for row in rows]
+        for laporan_id, r in zip(ids, reports):
+            detections = r.get("detections")
+            if detections is None: detections = parse_jenis_kerusakan(r["jenis_kerusakan"])
+            session.add_all(_deteksi_rows(laporan_id, detections, r.get("confidences")))
+        _update_ringkasan(session, rows)
+        _bump_version(session, "laporan")
+        session.commit()
+        return ids
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Error Saving to DB: {e}")
+        return []
+    finally:
+        session.close()
+
+# Migrasi sekali jalan: isi tabel deteksi dari jenis_kerusakan laporan lama.
+# Ditandai di data_version ("deteksi_backfill") agar tidak diulang; seluruhnya dalam satu transaksi.
+BACKFILL_BATCH = 5000
+
+def backfill_deteksi():
+    session = SessionLocal()
+    try:
+        if session.get(DataVersion, "deteksi_backfill") is not None: return 0
+        done = {r[0] for r in session.query(Deteksi.laporan_id).distinct()}
+        added = 0
+        query = session.query(Laporan.id, Laporan.jenis_kerusakan).order_by(Laporan.id).yield_per(BACKFILL_BATCH)
+        batch = []
+        for laporan_id, jenis in query:
+            if laporan_id in done: continue
+            batch.extend({"laporan_id": laporan_id, "kelas": d.kelas, "jumlah": d.jumlah, "max_confidence": None}
+                         for d in _deteksi_rows(laporan_id, parse_jenis_kerusakan(jenis)))
+            if len(batch) >= BACKFILL_BATCH:
+                session.execute(Deteksi.__table__.insert(), batch)
+                added += len(batch)
+                batch = []
+        if batch:
+            session.execute(Deteksi.__table__.insert(), batch)
+            added += len(batch)
+        session.add(DataVersion(name="deteksi_backfill", version=1))
+        session.commit()
+        if added: print(f"✅ Backfill deteksi: {added} baris")
+        return added
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Error Backfill Deteksi: {e}")
+        return 0
+    finally:
+        session.close()
+
 def get_all_laporan_as_df():
     try:
         return pd.read_sql("SELECT * FROM laporan_kerusakan ORDER BY timestamp DESC", engine)
     except Exception as e:
         print(f"⚠️ Error Reading DB: {e}")
-        init_db()
+        init_db(force=True)
         return pd.DataFrame(columns=["id", "timestamp", "gedung", "ruangan", "jenis_kerusakan", "confidence_score", "status", "deskripsi"])
 
+# Dari rekap ringkasan (diperbarui di transaksi create_laporan): dua lookup primary key, bukan scan tabel laporan
 def get_summary_stats():
+    total = get_ringkasan("total", "").get("", {}).get("jumlah", 0)
+    critical = get_ringkasan("status", STATUS_RUSAK_BERAT).get(STATUS_RUSAK_BERAT, {}).get("jumlah", 0)
+    return total, critical
+
+# --- RINGKASAN (ROLLUP DASHBOARD) ---
+def _ringkasan_keys(laporan):
+    return [("total", ""), ("status", laporan.status or ""), ("gedung", laporan.gedung or ""),
+            ("hari", laporan.timestamp.strftime("%Y-%m-%d"))]
+
+# Tambahkan laporan baru ke rekap (upsert per dimensi/kunci)
+def _update_ringkasan(session, laporan_rows):
+    deltas = {}
+    for lap in laporan_rows:
+        perlu = int(lap.status != STATUS_LAYAK)
+        for key in _ringkasan_keys(lap):
+            d = deltas.setdefault(key, [0, 0, 0.0])
+            d[0] += 1
+            d[1] += perlu
+            d[2] += lap.confidence_score or 0
+    session.execute(
+        text("INSERT INTO ringkasan (dimensi, kunci, jumlah, perlu_tindakan, total_skor) VALUES (:dimensi, :kunci, :jumlah, :perlu, :skor) "
+             "ON CONFLICT(dimensi, kunci) DO UPDATE SET jumlah = jumlah + excluded.jumlah, "
+             "perlu_tindakan = perlu_tindakan + excluded.perlu_tindakan, total_skor = total_skor + excluded.total_skor"),
+        [{"dimensi": k[0], "kunci": k[1], "jumlah": d[0], "perlu": d[1], "skor": d[2]} for k, d in deltas.items()],
+    )
+
+# Hitung ulang seluruh rekap dari laporan_kerusakan (mis. setelah data diubah manual / migrasi)
+RINGKASAN_REBUILD = {
+    "total": "''",
+    "status": "COALESCE(status, '')",
+    "gedung": "COALESCE(gedung, '')",
+    "hari": "strftime('%Y-%m-%d', timestamp)",
+}
+
+def rebuild_ringkasan():
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM ringkasan"))
+        conn.execute(text("INSERT INTO ringkasan (dimensi, kunci, jumlah, perlu_tindakan, total_skor) VALUES ('total', '', 0, 0, 0)"))
+        for dimensi, expr in RINGKASAN_REBUILD.items():
+            conn.execute(
+                text(f"INSERT INTO ringkasan (dimensi, kunci, jumlah, perlu_tindakan, total_skor) "
+                     f"SELECT :dimensi, {expr}, COUNT(*), SUM(CASE WHEN status = :layak THEN 0 ELSE 1 END), COALESCE(SUM(confidence_score), 0) "
+                     f"FROM laporan_kerusakan WHERE timestamp IS NOT NULL OR :dimensi != 'hari' GROUP BY 2 "
+                     f"ON CONFLICT(dimensi, kunci) DO UPDATE SET jumlah = excluded.jumlah, "
+                     f"perlu_tindakan = excluded.perlu_tindakan, total_skor = excluded.total_skor"),
+                {"dimensi": dimensi, "layak": STATUS_LAYAK},
+            )
+
+# {kunci: {"jumlah", "perlu_tindakan", "total_skor"}} untuk satu dimensi.
+# `kunci` (opsional): hanya baris itu (lookup primary key, mis. hari ini), bukan seluruh dimensi.
+def get_ringkasan(dimensi, kunci=None):
+    session = SessionLocal()
+    try:
+        rows = session.query(Ringkasan).filter(Ringkasan.dimensi == dimensi)
+        if kunci is not None: rows = rows.filter(Ringkasan.kunci == kunci)
+        return {r.kunci: {"jumlah": r.jumlah, "perlu_tindakan": r.perlu_tindakan, "total_skor": r.total_skor} for r in rows}
+    except Exception as e:
+        print(f"⚠️ Error Reading Ringkasan: {e}")
+        return {}
+    finally:
+        session.close()
+
+# --- VERSI DATA (INVALIDASI CACHE) ---
+def _bump_version(session, name):
+    session.execute(
+        text("INSERT INTO data_version (name, version) VALUES (:name, 1) "
+             "ON CONFLICT(name) DO UPDATE SET version = version + 1"),
+        {"name": name},
+    )
+
+def get_data_version(name="laporan"):
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT version FROM data_version WHERE name = :name"), {"name": name}).scalar() or 0
+    except Exception as e:
+        print(f"⚠️ Error Reading Data Version: {e}")
+        return 0
+
+# --- QUERY LAPORAN (FILTER, SORT, PAGINASI DI SQL) ---
+LAPORAN_COLUMNS = ["id", "timestamp", "gedung", "ruangan", "jenis_kerusakan", "confidence_score", "status", "deskripsi",
+                   "sampling_stride", "api_calls", "rule_version"]
+SORT_COLUMNS = {"timestamp": Laporan.timestamp, "confidence_score": Laporan.confidence_score,
+                "gedung": Laporan.gedung, "status": Laporan.status, "id": Laporan.id}
+
+# Tanggal (tanpa jam) -> awal hari; untuk batas akhir -> awal hari berikutnya (eksklusif)
+def _day_start(d, next_day=False):
+    if isinstance(d, datetime): return d
+    return datetime.combine(d + timedelta(days=1) if next_day else d, datetime.min.time())
+
+# Filter: None = tanpa filter, list (boleh kosong) = IN (...). Rentang tanggal inklusif.
+def _laporan_filters(status=None, gedung=None, date_from=None, date_to=None):
+    conds = []
+    if status is not None: conds.append(Laporan.status.in_(list(status)))
+    if gedung is not None: conds.append(Laporan.gedung.in_(list(gedung)))
+    if date_from is not None: conds.append(Laporan.timestamp >= _day_start(date_from))
+    if date_to is not None:
+        if isinstance(date_to, datetime): conds.append(Laporan.timestamp <= date_to)
+        else: conds.append(Laporan.timestamp < _day_start(date_to, next_day=True))
+    return conds
+
+# Satu halaman laporan. Paginasi OFFSET (`offset`) atau keyset (`after` = (nilai kolom sort, id) baris terakhir
+# halaman sebelumnya); keyset tetap cepat di halaman jauh karena memakai index, bukan melewati baris.
+def query_laporan(status=None, gedung=None, date_from=None, date_to=None,
+                  sort="timestamp", descending=True, limit=50, offset=0, after=None):
+    col = SORT_COLUMNS[sort]
+    stmt = select(*[getattr(Laporan, c) for c in LAPORAN_COLUMNS]).where(*_laporan_filters(status, gedung, date_from, date_to))
+
+    if after is not None:
+        value, last_id = after
+        # Nilai dari baris DataFrame (pd.Timestamp / numpy int) tidak terbanding benar di SQLite: ubah ke tipe Python
+        if isinstance(value, pd.Timestamp): value = value.to_pydatetime()
+        elif hasattr(value, "item"): value = value.item()
+        last_id = int(last_id)
+        if descending:
+            stmt = stmt.where(or_(col < value, and_(col == value, Laporan.id < last_id)))
+        else:
+            stmt = stmt.where(or_(col > value, and_(col == value, Laporan.id > last_id)))
+    elif offset:
+        stmt = stmt.offset(offset)
+
+    order = [col.desc(), Laporan.id.desc()] if descending else [col.asc(), Laporan.id.asc()]
+    stmt = stmt.order_by(*order).limit(limit)
+    try:
+        return pd.read_sql(stmt, engine)
+    except Exception as e:
+        print(f"⚠️ Error Reading DB: {e}")
+        return pd.DataFrame(columns=LAPORAN_COLUMNS)
+
+def count_laporan(status=None, gedung=None, date_from=None, date_to=None):
+    session = SessionLocal()
+    try:
+        return session.query(func.count(Laporan.id)).filter(*_laporan_filters(status, gedung, date_from, date_to)).scalar()
+    except Exception as e:
+        print(f"⚠️ Error Reading DB: {e}")
+        return 0
+    finally:
+        session.close()
+
+# --- EXPORT (STREAMING PER CHUNK) ---
+EXPORT_CHUNK = 5000
+CLASS_PREFIX = "jumlah_"  # Kolom jumlah per kelas: jumlah_<kelas>
+
+# Semua kelas yang pernah terdeteksi (index deteksi), urut nama
+def get_kelas_list():
+    session = SessionLocal()
+    try:
+        return [r[0] for r in session.query(Deteksi.kelas).distinct().order_by(Deteksi.kelas)]
+    finally:
+        session.close()
+
+def _kelas_counts(conn, ids, classes):
+    rows = conn.execute(select(Deteksi.laporan_id, Deteksi.kelas, Deteksi.jumlah).where(Deteksi.laporan_id.in_(ids))).all()
+    counts = pd.DataFrame(rows, columns=["laporan_id", "kelas", "jumlah"])
+    wide = counts.pivot_table(index="laporan_id", columns="kelas", values="jumlah", aggfunc="sum") if rows else pd.DataFrame()
+    return wide.reindex(index=ids, columns=classes).fillna(0).astype("int64")
+
+# Yield DataFrame per `chunksize` laporan (urut id): kolom LAPORAN_COLUMNS + jumlah_<kelas> + total_kerusakan.
+# Filter sama dengan query_laporan. `classes`: kolom kelas yang tetap di setiap chunk (default: get_kelas_list()).
+def iter_laporan_chunks(status=None, gedung=None, date_from=None, date_to=None, chunksize=EXPORT_CHUNK, classes=None):
+    classes = get_kelas_list() if classes is None else classes
+    stmt = (select(*[getattr(Laporan, c) for c in LAPORAN_COLUMNS])
+            .where(*_laporan_filters(status, gedung, date_from, date_to)).order_by(Laporan.id))
+    with engine.connect().execution_options(stream_results=True) as conn:
+        for chunk in pd.read_sql(stmt, conn, chunksize=chunksize):
+            counts = _kelas_counts(conn, chunk["id"].tolist(), classes)
+            chunk["timestamp"] = pd.to_datetime(chunk["timestamp"])
+            for kelas in classes:
+                chunk[CLASS_PREFIX + kelas] = counts[kelas].to_numpy()
+            chunk["total_kerusakan"] = counts.sum(axis=1).to_numpy()
+            yield chunk
+
+# --- RESCORE (HITUNG ULANG SKOR DENGAN VERSI ATURAN LAIN) ---
+# Per batch `batch` laporan (urut id): jumlah per kelas dari tabel deteksi -> skor/status dihitung vektor
+# (ScoringRules.score_counts) -> UPDATE executemany dalam satu transaksi per batch.
+# `only_outdated`: hanya laporan yang rule_version-nya berbeda, sehingga rescore yang terputus cukup dijalankan ulang.
+# `dry_run`: hanya hitung, tanpa menulis. Setelah selesai, rekap dashboard dibangun ulang dan versi data dinaikkan.
+# Return {"rows": laporan diproses, "changed": laporan yang skor/statusnya berubah}.
+RESCORE_BATCH = 5000
+
+def rescore_laporan(rules, batch=RESCORE_BATCH, only_outdated=True, dry_run=False, on_batch=None):
+    last_id, rows, changed = 0, 0, 0
+    while True:
+        stmt = select(Laporan.id, Laporan.confidence_score, Laporan.status).where(Laporan.id > last_id).order_by(Laporan.id).limit(batch)
+        if only_outdated:
+            stmt = stmt.where(or_(Laporan.rule_version.is_(None), Laporan.rule_version != rules.version))
+        with engine.connect() as conn:
+            chunk = pd.DataFrame(conn.execute(stmt).all(), columns=["id", "confidence_score", "status"])
+            if chunk.empty: break
+            counts = _kelas_counts(conn, chunk["id"].tolist(), rules.classes)
+
+        score, _, status = rules.score_counts(counts)
+        diff = (chunk["confidence_score"].to_numpy() != score) | (chunk["status"].to_numpy() != status)
+        if not dry_run:
+            with engine.begin() as conn:
+                conn.execute(
+                    text("UPDATE laporan_kerusakan SET confidence_score = :skor, status = :status, rule_version = :versi WHERE id = :id"),
+                    [{"id": i, "skor": float(sc), "status": st, "versi": rules.version}
+                     for i, sc, st in zip(chunk["id"].tolist(), score.tolist(), status.tolist())],
+                )
+        rows += len(chunk)
+        changed += int(diff.sum())
+        last_id = int(chunk["id"].iloc[-1])
+        if on_batch: on_batch(rows, changed)
+
+    if rows and not dry_run:
+        rebuild_ringkasan()
+        with engine.begin() as conn:
+            _bump_version(conn, "laporan")
+    return {"rows": rows, "changed": changed}
+
+# Jumlah laporan per versi aturan skor ({versi atau None: jumlah})
+def count_by_rule_version():
+    session = SessionLocal()
+    try:
+        rows = session.query(Laporan.rule_version, func.count(Laporan.id)).group_by(Laporan.rule_version).order_by(Laporan.rule_version)
+        return {version: n for version, n in rows}
+    except Exception as e:
+        print(f"⚠️ Error Reading DB: {e}")
+        return {}
+    finally:
+        session.close()
+
+# Pilihan filter langsung dari index (SELECT DISTINCT), tanpa memuat seluruh tabel
+def get_filter_options():
+    session = SessionLocal()
+    try:
+        return {
+            "status": [r[0] for r in session.query(Laporan.status).distinct().order_by(Laporan.status) if r[0] is not None],
+            "gedung": [r[0] for r in session.query(Laporan.gedung).distinct().order_by(Laporan.gedung) if r[0] is not None],
+        }
+    except Exception as e:
+        print(f"⚠️ Error Reading DB: {e}")
+        return {"status": [], "gedung": []}
+    finally:
+        session.close()
+
+# --- REKAP DETEKSI (AGREGASI DI SQL) ---
+AGG_GROUPS = {
+    "kelas": Deteksi.kelas,
+    "gedung": Laporan.gedung,
+    "ruangan": Laporan.ruangan,
+    "status": Laporan.status,
+    "hari": func.strftime("%Y-%m-%d", Laporan.timestamp),
+    "bulan": func.strftime("%Y-%m", Laporan.timestamp),
+}
+
+# Rekap jumlah kerusakan, mis. "berapa sobek per gedung bulan ini":
+#   aggregate_deteksi(("gedung",), kelas=["sobek"], date_from=date.today().replace(day=1))
+# Kolom hasil: kolom group_by + jumlah (total), laporan (jumlah laporan), max_confidence.
+def aggregate_deteksi(group_by=("kelas",), kelas=None, status=None, gedung=None, date_from=None, date_to=None):
+    keys = [AGG_GROUPS[g].label(g) for g in group_by]
+    stmt = (
+        select(*keys,
+               func.sum(Deteksi.jumlah).label("jumlah"),
+               func.count(func.distinct(Deteksi.laporan_id)).label("laporan"),
+               func.max(Deteksi.max_confidence).label("max_confidence"))
+        .join(Laporan, Laporan.id == Deteksi.laporan_id)
+        .where(*_laporan_filters(status, gedung, date_from, date_to))
+    )
+    if kelas is not None: stmt = stmt.where(Deteksi.kelas.in_(list(kelas)))
+    stmt = stmt.group_by(*keys).order_by(*keys)
+    try:
+        return pd.read_sql(stmt, engine)
+    except Exception as e:
+        print(f"⚠️ Error Reading DB: {e}")
+        return pd.DataFrame(columns=[*group_by, "jumlah", "laporan", "max_confidence"])
+
+def get_deteksi(laporan_id):
+    session = SessionLocal()
+    try:
+        rows = session.query(Deteksi).filter(Deteksi.laporan_id == laporan_id).order_by(Deteksi.kelas)
+        return {d.kelas: {"jumlah": d.jumlah, "max_confidence": d.max_confidence} for d in rows}
+    finally:
+        session.close()
+
+# --- FUNGSI JOB (ANALISIS BACKGROUND) ---
+JOB_FIELDS = ["id", "created_at", "updated_at", "status", "progress", "video_path", "gedung", "ruangan",
+              "deskripsi", "settings", "result", "preview_path", "error", "laporan_id", "metrics", "owner_pid"]
+
+def _job_to_dict(job):
+    return {f: getattr(job, f) for f in JOB_FIELDS}
+
+def create_job(video_path, gedung, ruangan, settings, deskripsi=""):
+    session = SessionLocal()
+    try:
+        job = Job(video_path=video_path, gedung=gedung, ruangan=ruangan, settings=settings, deskripsi=deskripsi, status="queued", progress=0.0,
+                  owner_pid=os.getpid())
+        session.add(job)
+        session.commit()
+        return job.id
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Error Creating Job: {e}")
+        return None
+    finally:
+        session.close()
+
+def update_job(job_id, **fields):
+    session = SessionLocal()
+    try:
+        session.query(Job).filter(Job.id == job_id).update({**fields, "updated_at": datetime.now()})
+        session.commit()
+        return True
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Error Updating Job {job_id}: {e}")
+        return False
+    finally:
+        session.close()
+
+def get_job(job_id):
     session = SessionLocal()
     try:
-        total = session.query(Laporan).count()
-        critical = session.query(Laporan).filter(Laporan.status == "Critical").count()
-        return total, critical
+        job = session.get(Job, job_id)
+        return _job_to_dict(job) if job else None
+    finally:
+        session.close()
+
+# Pool worker job hidup di proses server Streamlit: setelah server restart (atau worker crash) job queued/running
+# tidak akan pernah selesai. Job yang prosesnya sudah mati ditandai gagal; checkpoint tetap ada sehingga
+# audit ulang video yang sama melanjutkan dari frame terakhir. Segmen shared memory job tersebut (mode rekam, biasanya
+# dihapus worker saat job selesai) ikut dihapus. Return jumlah job yang ditandai.
+ORPHANED_JOB_ERROR = "Job terhenti (server dimulai ulang atau worker berhenti). Jalankan analisis lagi untuk melanjutkan."
+
+def fail_orphaned_jobs():
+    session = SessionLocal()
+    try:
+        active = session.query(Job.id, Job.owner_pid, Job.video_path).filter(Job.status.in_(["queued", "running"])).all()
+        orphaned = [(job_id, path) for job_id, pid, path in active if not pid or not spool.pid_alive(pid)]
+        if orphaned:
+            (session.query(Job).filter(Job.id.in_([job_id for job_id, _ in orphaned]), Job.status.in_(["queued", "running"]))
+             .update({"status": "failed", "error": ORPHANED_JOB_ERROR, "updated_at": datetime.now()}, synchronize_session=False))
+            session.commit()
+            shm_handles = [path for _, path in orphaned if path and path.startswith("shm://")]
+            if shm_handles:
+                import shmring  # OpenCV/NumPy hanya dimuat jika memang ada segmen yang harus dihapus
+                for handle in shm_handles: shmring.unlink_handle(handle)
+        return len(orphaned)
     except Exception as e:
-        return 0, 0
+        session.rollback()
+        print(f"❌ Error Checking Jobs: {e}")
+        return 0
+    finally:
+        session.close()
+
+# Snapshot metrics semua job (untuk agregat / export Prometheus)
+def get_job_metrics():
+    session = SessionLocal()
+    try:
+        return [r[0] for r in session.query(Job.metrics).filter(Job.metrics.isnot(None))]
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+def get_recent_jobs(limit=20):
+    session = SessionLocal()
+    try:
+        return [_job_to_dict(j) for j in session.query(Job).order_by(Job.id.desc()).limit(limit)]
+    finally:
+        session.close()
+
+# --- CHECKPOINT ANALISIS ---
+CHECKPOINT_MAX_AGE_DAYS = 7  # Checkpoint yang tidak dilanjutkan selama ini dibuang
+
+# Return list (frame_idx, preds) urut frame; [] jika belum ada
+def load_checkpoint(video_key):
+    session = SessionLocal()
+    try:
+        rows = (session.query(CheckpointFrame.frame_idx, CheckpointFrame.preds)
+                .filter(CheckpointFrame.video_key == video_key).order_by(CheckpointFrame.frame_idx))
+        return [(idx, json.loads(preds)) for idx, preds in rows]
+    except Exception as e:
+        print(f"⚠️ Error Reading Checkpoint: {e}")
+        return []
+    finally:
+        session.close()
+
+# Ringkasan checkpoint (untuk UI): {"frames", "last_frame", "total_frames"} atau None
+def get_checkpoint(video_key):
+    session = SessionLocal()
+    try:
+        cp = session.get(Checkpoint, video_key)
+        return {"frames": cp.frames, "last_frame": cp.last_frame, "total_frames": cp.total_frames} if cp else None
+    finally:
+        session.close()
+
+# frames: list (frame_idx, preds). Satu transaksi per batch; frame yang sudah ada dilewati.
+def save_checkpoint(video_key, frames, total_frames=0):
+    if not frames: return True
+    session = SessionLocal()
+    try:
+        session.execute(
+            text("INSERT INTO checkpoint (video_key, total_frames, last_frame, frames, updated_at) VALUES (:key, :total, 0, 0, :now) "
+                 "ON CONFLICT(video_key) DO UPDATE SET total_frames = excluded.total_frames, updated_at = excluded.updated_at"),
+            {"key": video_key, "total": total_frames, "now": datetime.now()},
+        )
+        session.execute(
+            text("INSERT INTO checkpoint_frame (video_key, frame_idx, preds) VALUES (:key, :idx, :preds) "
+                 "ON CONFLICT(video_key, frame_idx) DO NOTHING"),
+            [{"key": video_key, "idx": idx, "preds": json.dumps(preds)} for idx, preds in frames],
+        )
+        session.execute(
+            text("UPDATE checkpoint SET last_frame = MAX(last_frame, :last), "
+                 "frames = (SELECT COUNT(*) FROM checkpoint_frame WHERE video_key = :key) WHERE video_key = :key"),
+            {"key": video_key, "last": max(idx for idx, _ in frames)},
+        )
+        session.commit()
+        return True
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Error Saving Checkpoint: {e}")
+        return False
+    finally:
+        session.close()
+
+def clear_checkpoint(video_key):
+    session = SessionLocal()
+    try:
+        session.query(CheckpointFrame).filter(CheckpointFrame.video_key == video_key).delete()
+        session.query(Checkpoint).filter(Checkpoint.video_key == video_key).delete()
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Error Clearing Checkpoint: {e}")
+    finally:
+        session.close()
+
+def prune_checkpoints(max_age_days=CHECKPOINT_MAX_AGE_DAYS):
+    session = SessionLocal()
+    try:
+        stale = select(Checkpoint.video_key).where(Checkpoint.updated_at < datetime.now() - timedelta(days=max_age_days))
+        session.query(CheckpointFrame).filter(CheckpointFrame.video_key.in_(stale)).delete(synchronize_session=False)
+        removed = session.query(Checkpoint).filter(Checkpoint.video_key.in_(stale)).delete(synchronize_session=False)
+        session.commit()
+        return removed
+    except Exception as e:
+        session.rollback()
+        print(f"⚠️ Error Pruning Checkpoint: {e}")
+        return 0
+    finally:
+        session.close()
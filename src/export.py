@@ -0,0 +1,99 @@
+"""Export laporan (dengan jumlah kerusakan per kelas) ke CSV / Parquet, per chunk.
+
+Contoh:
+    python src/export.py laporan.csv
+    python src/export.py laporan.parquet --gedung "FPMIPA A" --status "Rusak Berat 🛑" --dari 2025-01-01 --sampai 2025-06-30
+    python src/export.py - --chunksize 10000 > laporan.csv
+
+Memori terbatas berapa pun ukuran tabel: db.iter_laporan_chunks membaca hasil query per `chunksize` baris
+(cursor streaming) dan tiap chunk langsung ditulis.
+"""
+import argparse
+import importlib.util
+import os
+import sys
+from datetime import date
+import database as db
+
+# --- KONFIGURASI EXPORT ---
+FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+# Parquet hanya jika pyarrow terpasang (opsional)
+def available_formats():
+    return [fmt for fmt in FORMATS if fmt != "parquet" or importlib.util.find_spec("pyarrow")]
+
+def format_from_path(path, default="csv"):
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    return ext if ext in FORMATS else default
+
+# --- WRITER ---
+def _parquet_schema(classes):
+    import pyarrow as pa
+    fields = [("id", pa.int64()), ("timestamp", pa.timestamp("us")), ("gedung", pa.string()), ("ruangan", pa.string()),
+              ("jenis_kerusakan", pa.string()), ("confidence_score", pa.float64()), ("status", pa.string()),
+              ("deskripsi", pa.string()), ("sampling_stride", pa.float64()), ("api_calls", pa.int64()),
+              ("rule_version", pa.int64())]
+    fields += [(db.CLASS_PREFIX + k, pa.int64()) for k in classes] + [("total_kerusakan", pa.int64())]
+    return pa.schema(fields)
+
+# `out`: path atau file biner. Return jumlah baris yang ditulis.
+def export_laporan(out, fmt="csv", chunksize=db.EXPORT_CHUNK, **filters):
+    classes = db.get_kelas_list()
+    chunks = db.iter_laporan_chunks(chunksize=chunksize, classes=classes, **filters)
+    rows = 0
+
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Export Parquet membutuhkan pyarrow (pip install pyarrow)")
+        schema = _parquet_schema(classes)
+        with pq.ParquetWriter(out, schema) as writer:
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                rows += len(chunk)
+            if not rows: writer.write_table(schema.empty_table())
+        return rows
+
+    header = True
+    f = open(out, "wb") if isinstance(out, str) else out
+    try:
+        for chunk in chunks:
+            f.write(chunk.to_csv(index=False, header=header).encode("utf-8"))
+            header = False
+            rows += len(chunk)
+        if header:
+            f.write((",".join(db.LAPORAN_COLUMNS + [db.CLASS_PREFIX + k for k in classes] + ["total_kerusakan"]) + "\n").encode("utf-8"))
+    finally:
+        if isinstance(out, str): f.close()
+    return rows
+
+# --- CLI ---
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export laporan kerusakan ke CSV / Parquet")
+    parser.add_argument("out", help="File tujuan (.csv / .parquet), atau - untuk CSV ke stdout")
+    parser.add_argument("--format", choices=list(FORMATS), help="Default: dari ekstensi file (csv)")
+    parser.add_argument("--status", action="append", help="Filter status (boleh berulang)")
+    parser.add_argument("--gedung", action="append", help="Filter gedung (boleh berulang)")
+    parser.add_argument("--dari", type=date.fromisoformat, help="Tanggal awal (YYYY-MM-DD, inklusif)")
+    parser.add_argument("--sampai", type=date.fromisoformat, help="Tanggal akhir (YYYY-MM-DD, inklusif)")
+    parser.add_argument("--chunksize", type=int, default=db.EXPORT_CHUNK, help="Baris per chunk")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    fmt = args.format or format_from_path(args.out)
+    if args.out == "-" and fmt != "csv":
+        print("Parquet tidak bisa ditulis ke stdout.", file=sys.stderr)
+        return 1
+
+    db.init_db()
+    out = sys.stdout.buffer if args.out == "-" else args.out
+    rows = export_laporan(out, fmt, args.chunksize, status=args.status, gedung=args.gedung,
+                          date_from=args.dari, date_to=args.sampai)
+    if args.out != "-": print(f"✅ {rows} laporan -> {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from collections import deque
+import cv2
+import numpy as np
+import spool
+
+# --- KONFIGURASI FRAME REKAMAN ---
+# Mode rekam ringan: hanya frame yang akan dianalisis yang disimpan, sudah diperkecil ke lebar inference.
+# Fase PROCESSING tidak perlu encode/decode video sama sekali.
+RECORD_FPS = 20.0            # FPS acuan rekaman kamera (sama dengan header VideoWriter arsip)
+MAX_BUFFER_FRAMES = 150      # Batas frame di memori (~75 MB pada 480x360); frame tertua dibuang jika penuh
+FRAME_FILE_EXT = ".frames.npz"
+
+# --- ARSIP REKAMAN (OPSIONAL) ---
+# Video penuh disimpan di luar folder source, dengan kuota & umur sendiri (lebih longgar dari file spool).
+ARCHIVE_DIR = os.environ.get("SMARTREPORT_ARCHIVE_DIR", os.path.join(os.path.expanduser("~"), ".local", "share", "smartreport", "recordings"))
+ARCHIVE_QUOTA_BYTES = 5 * 1024 ** 3      # 5 GB
+ARCHIVE_MAX_AGE = 7 * 24 * 3600          # 7 hari
+
+_archive_manager = None
+_archive_lock = threading.Lock()
+
+def get_archive_manager():
+    global _archive_manager
+    with _archive_lock:
+        if _archive_manager is None:
+            _archive_manager = spool.TempArtifactManager(ARCHIVE_DIR, ARCHIVE_QUOTA_BYTES, ARCHIVE_MAX_AGE)
+        return _archive_manager
+
+# Path arsip baru (aktif sampai release_archive); arsip lama yang kadaluarsa / melebihi kuota dibersihkan dulu
+def new_archive_path():
+    manager = get_archive_manager()
+    manager.cleanup()
+    return manager.new_path(".mp4", kind=f"rec-{time.strftime('%Y%m%d-%H%M%S')}")
+
+# Rekaman selesai ditulis: file tetap disimpan, tapi boleh dihapus cleanup (umur / kuota)
+def release_archive(path):
+    get_archive_manager().release(path, delete=False)
+
+def resize_to_width(frame, width):
+    h, w = frame.shape[:2]
+    if not width or w == width: return frame
+    return cv2.resize(frame, (width, int(h * (width / w))))
+
+def is_frame_file(path):
+    return isinstance(path, str) and path.endswith(FRAME_FILE_EXT)
+
+# --- RING BUFFER FRAME SAMPLE ---
+# offer() dipanggil untuk SETIAP frame kamera (thread callback WebRTC); hanya tiap `stride` frame
+# yang diperkecil dan disimpan. Nomor frame 1-based, sama seperti FrameSampler (`idx % stride == 0`).
+class FrameRing:
+    def __init__(self, stride, width, capacity=MAX_BUFFER_FRAMES, metrics=None):
+        self.stride = max(1, int(stride))
+        self.width = width
+        self.metrics = metrics
+        self.frames = deque(maxlen=capacity)
+        self.seen = 0       # Semua frame kamera yang masuk (= total_frames video)
+        self.dropped = 0    # Frame sample yang terbuang karena buffer penuh
+        self._lock = threading.Lock()
+
+    def offer(self, frame):
+        with self._lock:
+            self.seen += 1
+            idx = self.seen
+        if idx % self.stride: return False
+
+        start = time.perf_counter()
+        small = resize_to_width(frame, self.width)
+        if self.metrics: self.metrics.observe("resize", time.perf_counter() - start)
+        with self._lock:
+            if len(self.frames) == self.frames.maxlen: self.dropped += 1
+            self.frames.append((idx, small))
+        return True
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.frames)
+
+    @property
+    def total_frames(self):
+        return self.seen
+
+    # File frame ringkas (npz tanpa kompresi): dipakai job background di proses lain.
+    # Satu array per frame karena resolusi WebRTC bisa berubah di tengah rekaman.
+    def save(self, path):
+        frames = self.snapshot()
+        with open(path, "wb") as f:
+            np.savez(f, total_frames=np.int64(self.seen), index=np.array([i for i, _ in frames], dtype=np.int64),
+                     **{f"f{n}": frame for n, (_, frame) in enumerate(frames)})
+        return path
+
+    def source(self):
+        return FrameSource(self.snapshot(), self.seen)
+
+# --- SUMBER FRAME (pengganti FrameSampler untuk frame yang sudah disampling saat rekam) ---
+class FrameSource:
+    def __init__(self, frames, total_frames):
+        self.frames = frames
+        self.total_frames = total_frames
+        self.decoded = len(frames)
+        self.grabbed = 0
+
+    @classmethod
+    def from_file(cls, path):
+        with np.load(path) as data:
+            index = data["index"].tolist()
+            frames = [(idx, data[f"f{n}"]) for n, idx in enumerate(index)]
+            return cls(frames, int(data["total_frames"]))
+
+    def __iter__(self):
+        return iter(self.frames)
+
+    def close(self):
+        pass
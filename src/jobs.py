@@ -0,0 +1,125 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import database as db
+import audit
+import cache
+import spool
+import shmring
+import preview
+from metrics import Metrics
+from scoring import calculate_score, get_rules
+
+# --- KONFIGURASI JOB ---
+JOB_WORKERS = 2          # Jumlah proses worker analisis video
+PROGRESS_INTERVAL = 1.0  # Detik, jeda minimal antar update progress ke tabel jobs
+PREVIEW_WIDTH = 480      # Lebar JPEG preview yang ditulis worker
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Pool proses dibuat sekali per proses Streamlit. Pakai "spawn" agar worker tidak mewarisi
+# thread server Streamlit (fork + thread = rawan deadlock).
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=JOB_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+# --- ENQUEUE ---
+# Simpan job di tabel jobs lalu jalankan di worker. UI cukup polling db.get_job(job_id).
+# `video_key` (opsional): kunci cache per video, hasil akhir ikut disimpan ke cache.
+# `cleanup`: hapus file video setelah selesai (file spool/rekaman sementara).
+# `checkpoint_key` (opsional): hasil per frame di-checkpoint; job ulang untuk video yang sama melanjutkan analisis.
+def submit_audit(video_path, gedung, ruangan, cfg, default_every, deskripsi="", video_key=None, cleanup=True, checkpoint_key=None):
+    settings = json.loads(audit.settings_to_json(cfg))
+    settings.update({"default_every": default_every, "video_key": video_key, "cleanup": cleanup, "checkpoint_key": checkpoint_key})
+
+    if cfg["use_cache"]: cache.get_cache()  # Tabel cache dibuat di proses ini, bukan bersamaan oleh beberapa worker
+    job_id = db.create_job(video_path, gedung, ruangan, json.dumps(settings), deskripsi)
+    if job_id is None: return None
+    get_executor().submit(run_job, job_id)
+    return job_id
+
+def _result_json(analysis):
+    return json.dumps({
+        "defects": dict(analysis["defects"]),
+        "confidences": analysis["confidences"],
+        "total_frames": analysis["total_frames"],
+        "sampled": analysis["sampled"],
+        "resumed": analysis["resumed"],
+        "stride": analysis["stride"],
+        "api_calls": analysis["api_calls"],
+        "api_saved": analysis["api_saved"],
+        "cascade": analysis["cascade"],
+    })
+
+# --- WORKER (berjalan di proses terpisah) ---
+def run_job(job_id):
+    db.init_db()
+    job = db.get_job(job_id)
+    if job is None: return
+
+    settings = json.loads(job["settings"] or "{}")
+    cfg = audit.settings_from_json(job["settings"])
+    # File sementara diambil alih worker: tetap dianggap dipakai walau proses Streamlit yang membuatnya berhenti
+    if settings.get("cleanup"): spool.get_manager().claim(job["video_path"])
+    preview_path = os.path.join(spool.get_manager().root, f"preview-job{job_id}.jpg")
+    db.update_job(job_id, status="running", progress=0.0, preview_path=preview_path, owner_pid=os.getpid())
+
+    last_update = [0.0]
+    metrics = Metrics()
+
+    def on_frame(curr, total_frames, annotated, video_defects):
+        now = time.time()
+        if now - last_update[0] < PROGRESS_INTERVAL: return
+        last_update[0] = now
+
+        # Preview kecil untuk UI (JPEG), tulis ke file sementara lalu rename supaya UI tidak membaca file setengah jadi
+        jpeg = preview.encode_jpeg(annotated, PREVIEW_WIDTH)
+        if jpeg:
+            tmp = preview_path + ".tmp"
+            with open(tmp, "wb") as f: f.write(jpeg)
+            os.replace(tmp, preview_path)
+
+        progress = min(curr / total_frames, 1.0) if total_frames else 0.0
+        db.update_job(job_id, progress=progress, result=json.dumps({"defects": dict(video_defects)}),
+                      metrics=json.dumps(metrics.snapshot()))
+
+    try:
+        analysis = audit.analyze_video(job["video_path"], cfg, settings.get("default_every", audit.UPLOAD_SAMPLE_EVERY), on_frame=on_frame, metrics=metrics,
+                                      checkpoint_key=settings.get("checkpoint_key"))
+        video_defects = analysis["defects"]
+
+        rules = get_rules()
+        score, deduc, stat = calculate_score(video_defects, rules)
+        with metrics.time("db_write"):
+            laporan_id = db.create_laporan(job["gedung"], job["ruangan"], str(dict(video_defects)), score, stat, job["deskripsi"],
+                                          detections=video_defects, confidences=analysis["confidences"],
+                                          sampling_stride=analysis["stride"], api_calls=analysis["api_calls"], rule_version=rules.version)
+        # Laporan tidak tersimpan -> job gagal (checkpoint dipertahankan untuk dicoba lagi)
+        if not laporan_id:
+            raise RuntimeError("Laporan gagal disimpan ke database")
+        if settings.get("checkpoint_key"):
+            db.clear_checkpoint(settings["checkpoint_key"])
+        if cfg["use_cache"] and settings.get("video_key"):
+            cache.get_cache().put_video(settings["video_key"], dict(video_defects))
+
+        db.update_job(job_id, status="done", progress=1.0, result=_result_json(analysis), laporan_id=laporan_id,
+                      metrics=json.dumps(metrics.snapshot()))
+    except Exception as e:
+        print(f"❌ Job {job_id} gagal: {e}")
+        metrics.inc("job_errors")
+        db.update_job(job_id, status="failed", error=str(e), metrics=json.dumps(metrics.snapshot()))
+    finally:
+        if settings.get("cleanup"):
+            spool.get_manager().release(job["video_path"])
+        # Segmen shared memory (mode rekam) milik job: dihapus di sini setelah frame selesai dipakai, berhasil atau gagal
+        if shmring.is_handle(job["video_path"]):
+            shmring.unlink_handle(job["video_path"])
+        if os.path.exists(preview_path):
+            os.remove(preview_path)
@@ -0,0 +1,41 @@
+import cv2
+import numpy as np
+
+# --- KONFIGURASI KEYFRAME ---
+DEFAULT_THRESHOLD = 8.0   # Rata-rata selisih piksel (0-255) minimal agar frame dianggap "baru"
+THUMB_SIZE = 32           # Frame diperkecil ke THUMB_SIZE x THUMB_SIZE grayscale sebelum dibandingkan
+
+# --- SELEKSI KEYFRAME ---
+# Frame yang hampir sama dengan frame terakhir yang DIKIRIM ke AI tidak perlu dianalisis lagi.
+# Skor = mean absolute difference dari thumbnail grayscale (murah, cukup NumPy).
+class KeyframeSelector:
+    def __init__(self, threshold=DEFAULT_THRESHOLD, size=THUMB_SIZE):
+        self.threshold = threshold
+        self.size = size
+        self.last_thumb = None
+        self.seen = 0
+        self.sent = 0
+
+    @property
+    def saved(self):
+        # Jumlah panggilan API yang dihemat
+        return self.seen - self.sent
+
+    def thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, (self.size, self.size), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def accept(self, frame):
+        self.seen += 1
+        thumb = self.thumbnail(frame)
+        if self.last_thumb is not None and np.abs(thumb - self.last_thumb).mean() < self.threshold:
+            return False
+        self.last_thumb = thumb
+        self.sent += 1
+        return True
+
+    def filter(self, frames):
+        # Bungkus iterable (frame_idx, frame), hanya teruskan keyframe
+        for idx, frame in frames:
+            if self.accept(frame):
+                yield idx, frame
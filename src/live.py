@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import Counter, deque
+
+# --- KONFIGURASI LIVE ---
+MAX_ERROR_RATIO = 0.2  # Bagian frame yang gagal dianalisis (error API) maksimal agar hasil live boleh disimpan
+
+# --- ANTRIAN "FRAME TERBARU MENANG" ---
+# Producer (callback WebRTC) tidak pernah menunggu: jika antrian penuh, frame paling lama dibuang.
+class LatestFrameQueue:
+    def __init__(self, maxsize=1):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            if not self._items and not self.closed:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+# --- ANALISIS LIVE SELAMA MEREKAM ---
+# Worker mengambil frame terbaru dari antrian, menjalankan detect_fn(frame) -> list prediksi (dengan box),
+# lalu mengagregasi jumlah kerusakan per kelas (maksimum per frame, sama seperti mode rekam -> proses).
+class LiveAnalyzer:
+    def __init__(self, detect_fn, workers=1, queue_size=1, selector=None):
+        self.detect_fn = detect_fn
+        self.selector = selector  # Opsional: keyframe.KeyframeSelector
+        self.queue = LatestFrameQueue(queue_size)
+        self.video_defects = Counter()
+        self.confidences = {}
+        self.last_boxes = []
+        self.last_shape = None
+        self.frames_analyzed = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._work, name=f"live-ai-{i}", daemon=True) for i in range(max(1, workers))]
+        self._started = False
+
+    def start(self):
+        if not self._started:
+            self._started = True
+            for t in self._threads: t.start()
+
+    def submit(self, frame):
+        self.queue.put(frame)
+
+    def _work(self):
+        while True:
+            frame = self.queue.get(timeout=0.5)
+            if frame is None:
+                if self.queue.closed: return
+                continue
+            if self.selector is not None:
+                with self._lock:
+                    keep = self.selector.accept(frame)
+                if not keep: continue
+
+            try:
+                boxes = self.detect_fn(frame)
+            except Exception as e:
+                print(f"Live Workflow Error: {e}")
+                with self._lock: self.errors += 1
+                continue
+
+            frame_c = Counter([p['class'] for p in boxes])
+            with self._lock:
+                self.frames_analyzed += 1
+                for k, v in frame_c.items():
+                    if v > self.video_defects[k]: self.video_defects[k] = v
+                for p in boxes:
+                    if p.get('confidence') is not None and p['confidence'] > self.confidences.get(p['class'], -1):
+                        self.confidences[p['class']] = float(p['confidence'])
+                self.last_boxes = boxes
+                self.last_shape = frame.shape[:2]
+
+    def overlay(self):
+        with self._lock:
+            return list(self.last_boxes), self.last_shape
+
+    def snapshot(self):
+        with self._lock:
+            return Counter(self.video_defects)
+
+    def confidence_snapshot(self):
+        with self._lock:
+            return dict(self.confidences)
+
+    # Alasan hasil live tidak boleh disimpan sebagai laporan (None = boleh): belum ada frame yang berhasil
+    # dianalisis (kamera belum aktif / semua error), atau terlalu banyak frame gagal
+    def incomplete_reason(self):
+        with self._lock:
+            analyzed, errors = self.frames_analyzed, self.errors
+        if analyzed == 0:
+            return "Tidak ada frame yang berhasil dianalisis" + (f" ({errors} error API)" if errors else "")
+        if errors / (analyzed + errors) > MAX_ERROR_RATIO:
+            return f"{errors} dari {analyzed + errors} frame gagal dianalisis (error API)"
+        return None
+
+    # Hentikan penerimaan frame, tunggu frame yang tersisa selesai dianalisis, lalu kembalikan hasil akhir
+    def finish(self, timeout=10):
+        self.queue.close()
+        deadline = time.time() + timeout
+        for t in self._threads:
+            if t.is_alive(): t.join(max(0, deadline - time.time()))
+        return self.snapshot()
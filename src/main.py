@@ -1,7 +1,35 @@
+import importlib
+import time
 import streamlit as st
 from streamlit_option_menu import option_menu
-from views import home, scanner, history
 import database as db
+import metrics
+
+# --- HALAMAN ---
+# Modul halaman baru di-import saat halaman dibuka (scanner memuat OpenCV, WebRTC, dst.)
+PAGES = {
+    "Dashboard": "views.home",
+    "Scanner AI": "views.scanner",
+    "Data Laporan": "views.history",
+    "Pengaturan": "views.settings",
+}
+
+# Waktu import modul (hanya mahal saat pertama kali per proses) dan render show() -> metrik page_import.* / page_render.*
+def load_page(name):
+    started = time.perf_counter()
+    module = importlib.import_module(PAGES[name])
+    elapsed = time.perf_counter() - started
+    metrics.get_registry().observe(f"page_import.{PAGES[name]}", elapsed)
+    return module, elapsed
+
+def show_page(name, module):
+    started = time.perf_counter()
+    try:
+        module.show()
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.get_registry().observe(f"page_render.{PAGES[name]}", elapsed)
+    return elapsed
 
 # --- CONFIG HALAMAN ---
 st.set_page_config(
@@ -11,6 +39,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"  # Sidebar terbuka otomatis di Desktop
 )
 
+# Skema DB disiapkan sekali per proses (bukan di setiap show())
+db.init_db()
+
 # --- CSS SETUP ---
 st.markdown("""
     <style>
@@ -46,7 +77,7 @@ with st.sidebar:
     # Menu Pilihan
     selected = option_menu(
         menu_title=None,
-        options=["Dashboard", "Scanner AI", "Data Laporan", "Pengaturan"],
+        options=list(PAGES),
         icons=["grid-fill", "camera-video-fill", "file-earmark-text-fill", "gear-fill"],
         default_index=0,
         styles={
@@ -71,23 +102,21 @@ with st.sidebar:
     st.caption("© 2025 FPMIPA System")
 
 # --- PAGE ROUTING ---
-if selected == "Dashboard":
-    home.show()
-
-elif selected == "Scanner AI":
-    scanner.show()
+page, import_time = load_page(selected)
 
-elif selected == "Data Laporan":
+if selected == "Data Laporan":
     # Debugging error database jika ada
     try:
-        history.show()
+        render_time = show_page(selected, page)
     except Exception as e:
+        render_time = None
         st.error(f"Terjadi kesalahan memuat database: {e}")
         # Tombol darurat untuk reset DB jika rusak
         if st.button("Reset Database"):
-            db.init_db()
+            db.init_db(force=True)
             st.rerun()
+else:
+    render_time = show_page(selected, page)
 
-elif selected == "Pengaturan":
-    st.title("⚙️ Pengaturan")
-    st.info("Menu konfigurasi user.")
\ No newline at end of file
+if render_time is not None:
+    st.sidebar.caption(f"⏱️ Import {import_time * 1000:.0f} ms · Render {render_time * 1000:.0f} ms")
@@ -0,0 +1,206 @@
+import bisect
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- KONFIGURASI METRIK ---
+# Batas bucket histogram (detik), dari decode per frame (ms) sampai panggilan API lambat
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROM_PREFIX = "smartreport"
+
+# Tahap pipeline yang diukur (nama histogram)
+STAGES = {
+    "decode": "grab/read frame dari video",
+    "resize": "resize frame ke lebar inference",
+    "inference": "panggilan backend AI (network / model lokal)",
+    "frame": "total per frame: cache + inference + gambar box",
+    "draw": "menggambar box ke frame",
+    "ui": "update UI / progress (on_frame)",
+    "db_write": "create_laporan",
+    "page_import": "import modul halaman (mahal hanya sekali per proses)",
+    "page_render": "render show() halaman",
+}
+
+# --- HISTOGRAM ---
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Bucket terakhir = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    # Perkiraan kuantil dari bucket (interpolasi linear di dalam bucket)
+    def quantile(self, q):
+        if not self.count: return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= target and n:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * (target - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def merge(self, other):
+        for i, n in enumerate(other.counts): self.counts[i] += n
+        self.sum += other.sum
+        self.count += other.count
+
+    def to_dict(self):
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data):
+        h = cls(data["buckets"])
+        h.counts, h.sum, h.count = list(data["counts"]), data["sum"], data["count"]
+        return h
+
+# --- REGISTRY METRIK ---
+# Ringan dan thread-safe: dipakai per job (disimpan ke tabel jobs) dan per proses (get_registry()).
+# `parent` (opsional): semua inc/observe diteruskan juga ke parent, mis. metrik satu audit di dalam registry proses.
+class Metrics:
+    def __init__(self, parent=None):
+        self.counters = Counter()
+        self.histograms = {}
+        self.parent = parent
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+        if self.parent is not None: self.parent.inc(name, value)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            if stage not in self.histograms: self.histograms[stage] = Histogram()
+            self.histograms[stage].observe(seconds)
+        if self.parent is not None: self.parent.observe(stage, seconds)
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    # Bungkus fungsi: durasi -> histogram `stage`, jumlah panggilan / error -> counter
+    def timed(self, stage, fn, calls=None, errors=None):
+        def _timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                if errors: self.inc(errors)
+                raise
+            finally:
+                self.observe(stage, time.perf_counter() - start)
+                if calls: self.inc(calls)
+            return result
+        return _timed
+
+    def fps(self):
+        seconds = self.counters.get("analysis_seconds", 0)
+        return self.counters.get("frames", 0) / seconds if seconds else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return {"counters": dict(self.counters),
+                    "histograms": {k: h.to_dict() for k, h in self.histograms.items()}}
+
+    @classmethod
+    def from_snapshot(cls, data):
+        m = cls()
+        if data: m.merge(data)
+        return m
+
+    def merge(self, other):
+        data = other.snapshot() if isinstance(other, Metrics) else other
+        with self._lock:
+            self.counters.update(data.get("counters", {}))
+            for k, h in data.get("histograms", {}).items():
+                if k not in self.histograms: self.histograms[k] = Histogram(h["buckets"])
+                self.histograms[k].merge(Histogram.from_dict(h))
+        return self
+
+    # Ringkasan per tahap untuk tabel UI (ms)
+    def stage_table(self):
+        with self._lock:
+            return [
+                {"tahap": k, "keterangan": STAGES.get(k, STAGES.get(k.split(".")[0], "")), "jumlah": h.count, "rata2_ms": h.mean() * 1000,
+                 "p50_ms": h.quantile(0.5) * 1000, "p95_ms": h.quantile(0.95) * 1000, "total_s": h.sum}
+                for k, h in sorted(self.histograms.items())
+            ]
+
+    # --- EXPORT PROMETHEUS (text exposition format) ---
+    def to_prometheus(self, prefix=PROM_PREFIX):
+        snap = self.snapshot()
+        lines = []
+        for name, value in sorted(snap["counters"].items()):
+            metric = f"{prefix}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+
+        metric = f"{prefix}_stage_seconds"
+        if snap["histograms"]:
+            lines += [f"# HELP {metric} Durasi per tahap pipeline audit", f"# TYPE {metric} histogram"]
+        for stage, h in sorted(snap["histograms"].items()):
+            cumulative = 0
+            for le, n in zip([*h["buckets"], "+Inf"], h["counts"]):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {h["sum"]}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {h["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, prefix=PROM_PREFIX):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f: f.write(self.to_prometheus(prefix))
+        os.replace(tmp, path)
+        return path
+
+_registry = Metrics()
+
+# Registry per proses (analisis inline di proses Streamlit, mode live)
+def get_registry():
+    return _registry
+
+# --- ENDPOINT LOKAL /metrics ---
+# `collect()` -> Metrics yang akan diekspor (dipanggil tiap request, mis. gabungan registry + job dari DB)
+_server = None
+_server_lock = threading.Lock()
+
+def start_http_server(collect, port=9108, host="127.0.0.1"):
+    global _server
+    with _server_lock:
+        if _server is not None: return _server
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = collect().to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        _server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+        return _server
@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+
+# --- KONFIGURASI PIPELINE ---
+DEFAULT_MAX_INFLIGHT = 4  # Jumlah request inference yang boleh berjalan bersamaan
+
+# --- PIPELINE INFERENCE KONKUREN ---
+# Frame terus di-decode selagi N request ke API masih berjalan,
+# hasil dikembalikan SESUAI URUTAN FRAME (bukan urutan selesai).
+def iter_inference(frames, infer_fn, max_inflight=DEFAULT_MAX_INFLIGHT):
+    """Yield (frame_idx, annotated, preds) dari iterable (frame_idx, frame) secara berurutan."""
+    max_inflight = max(1, int(max_inflight))
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="inference") as pool:
+        try:
+            for idx, frame in frames:
+                pending.append((idx, pool.submit(infer_fn, frame)))
+
+                # Batasi jumlah request in-flight: tunggu yang paling lama dulu
+                while len(pending) >= max_inflight:
+                    done_idx, fut = pending.popleft()
+                    annotated, preds = fut.result()
+                    yield done_idx, annotated, preds
+
+            while pending:
+                done_idx, fut = pending.popleft()
+                annotated, preds = fut.result()
+                yield done_idx, annotated, preds
+        finally:
+            # Kalau consumer berhenti di tengah jalan, jangan tunggu sisa request
+            for _, fut in pending:
+                fut.cancel()
+
+# Sama seperti iter_inference, tapi frame dikelompokkan per `batch_size` dan
+# batch_fn(list_frame) -> list (annotated, preds) dipanggil sekali per batch.
+def iter_inference_batched(frames, batch_fn, batch_size, max_inflight=DEFAULT_MAX_INFLIGHT):
+    def batches():
+        buf = []
+        for idx, frame in frames:
+            buf.append((idx, frame))
+            if len(buf) >= batch_size:
+                yield buf
+                buf = []
+        if buf: yield buf
+
+    def run(batch):
+        return list(zip([i for i, _ in batch], batch_fn([f for _, f in batch])))
+
+    for _, results, _ in iter_inference(((0, b) for b in batches()), lambda b: (run(b), None), max_inflight):
+        for idx, (annotated, preds) in results:
+            yield idx, annotated, preds
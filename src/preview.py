@@ -0,0 +1,62 @@
+import time
+import cv2
+
+# --- KONFIGURASI PREVIEW ---
+PREVIEW_FPS = 4          # Maksimal refresh UI per detik selama analisis
+PREVIEW_WIDTH = 480      # Lebar JPEG preview
+PREVIEW_QUALITY = 70     # Kualitas JPEG (0-100)
+PROGRESS_ONLY_FPS = 1    # Refresh progress saat preview gambar dimatikan
+
+# Frame BGR (OpenCV) -> bytes JPEG kecil. cv2.imencode membaca BGR langsung, tanpa cvtColor.
+def encode_jpeg(frame, width=PREVIEW_WIDTH, quality=PREVIEW_QUALITY):
+    h, w = frame.shape[:2]
+    if width and w > width:
+        frame = cv2.resize(frame, (width, int(h * width / w)), interpolation=cv2.INTER_AREA)
+    ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes() if ok else None
+
+# --- RENDERER PREVIEW ANALISIS ---
+# Dipakai sebagai on_frame untuk audit.analyze_video. Semua widget (gambar, progress, teks, JSON) diperbarui
+# bersamaan paling banyak `max_fps` kali per detik; frame di antaranya dilewati tanpa encode.
+# max_fps=0 -> mode tanpa preview: hanya progress yang diperbarui (PROGRESS_ONLY_FPS).
+# Slot berupa placeholder Streamlit (st.empty / st.progress); slot None dilewati.
+class PreviewRenderer:
+    def __init__(self, image_slot=None, progress_slot=None, text_slot=None, json_slot=None,
+                 max_fps=PREVIEW_FPS, width=PREVIEW_WIDTH, quality=PREVIEW_QUALITY):
+        self.image_slot = image_slot if max_fps else None
+        self.json_slot = json_slot if max_fps else None
+        self.progress_slot = progress_slot
+        self.text_slot = text_slot
+        self.interval = 1.0 / (max_fps or PROGRESS_ONLY_FPS)
+        self.width = width
+        self.quality = quality
+        self.rendered = 0
+        self.skipped = 0
+        self._last = 0.0
+        self._last_json = None
+
+    def __call__(self, curr, total_frames, annotated, video_defects):
+        self.update(curr, total_frames, annotated, video_defects)
+
+    def update(self, curr, total_frames, annotated, video_defects, force=False):
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            self.skipped += 1
+            return False
+        self._last = now
+        self.rendered += 1
+
+        if self.image_slot is not None and annotated is not None:
+            jpeg = encode_jpeg(annotated, self.width, self.quality)
+            if jpeg: self.image_slot.image(jpeg, width='stretch')
+        if self.progress_slot is not None and total_frames:
+            self.progress_slot.progress(min(curr / total_frames, 1.0))
+        if self.text_slot is not None:
+            self.text_slot.caption(f"Analyzing Frame: {curr}/{total_frames}")
+        # JSON hanya dikirim ulang jika isinya berubah
+        if self.json_slot is not None:
+            data = dict(video_defects)
+            if data != self._last_json:
+                self._last_json = data
+                self.json_slot.json(data)
+        return True
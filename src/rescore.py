@@ -0,0 +1,45 @@
+"""Hitung ulang skor & status seluruh laporan dengan versi aturan skor tertentu (scoring_rules.json).
+
+Contoh:
+    python src/rescore.py                 # versi aktif, hanya laporan dengan versi aturan lain
+    python src/rescore.py --versi 2 --dry-run
+    python src/rescore.py --semua --batch 10000
+
+Jumlah kerusakan per kelas diambil dari tabel deteksi, skor dihitung vektor per batch dan ditulis dengan
+UPDATE per batch. Rescore yang terputus cukup dijalankan ulang (laporan yang sudah diperbarui dilewati).
+"""
+import argparse
+import sys
+import time
+import database as db
+import scoring
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Hitung ulang skor laporan dengan aturan skor berversi")
+    parser.add_argument("--versi", type=int, help="Versi aturan (default: versi aktif di scoring_rules.json)")
+    parser.add_argument("--semua", action="store_true", help="Termasuk laporan yang sudah memakai versi ini")
+    parser.add_argument("--batch", type=int, default=db.RESCORE_BATCH, help="Laporan per batch / transaksi")
+    parser.add_argument("--dry-run", action="store_true", help="Hanya hitung perubahan, tanpa menulis ke DB")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        rules = scoring.get_rules(args.versi)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}", file=sys.stderr)
+        return 1
+
+    db.init_db()
+    print(f"▶️ Aturan skor v{rules.version}" + (f" ({rules.keterangan})" if rules.keterangan else "")
+          + (" — dry run" if args.dry_run else ""))
+    started = time.perf_counter()
+    result = db.rescore_laporan(rules, batch=args.batch, only_outdated=not args.semua, dry_run=args.dry_run,
+                                on_batch=lambda rows, changed: print(f"  {rows} laporan, {changed} berubah", end="\r"))
+    if result["rows"]: print()
+    print(f"✅ {result['rows']} laporan diproses, {result['changed']} skor/status berubah "
+          f"({time.perf_counter() - started:.1f}s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+import cv2
+import queue
+import threading
+import time
+
+# --- KONFIGURASI SAMPLER ---
+DEFAULT_FPS = 30.0      # Dipakai jika metadata FPS video kosong/rusak
+SEEK_MIN_STRIDE = 90    # Jarak antar sample (frame) minimal sebelum pakai seek, bukan grab()
+DEFAULT_PREFETCH = 8    # Jumlah frame hasil decode yang boleh antri di depan consumer
+GROWING_POLL = 0.2      # Detik, jeda cek ulang file yang masih ditulis
+
+_END = object()
+
+# --- KEBIJAKAN SAMPLING ---
+class SamplingPolicy:
+    """Pilih frame mana yang dianalisis: tiap N frame, tiap T detik, maksimal K frame per video,
+    atau adaptif terhadap anggaran waktu proses / panggilan API per audit (lihat StrideController)."""
+
+    def __init__(self, every_n_frames=None, every_seconds=None, max_frames=None, target_seconds=None, max_calls=None):
+        fixed = sum(x is not None for x in (every_n_frames, every_seconds, max_frames))
+        adaptive = target_seconds is not None or max_calls is not None
+        if fixed + adaptive != 1:
+            raise ValueError("Pilih tepat satu: every_n_frames, every_seconds, max_frames, atau anggaran adaptif (target_seconds / max_calls)")
+        self.every_n_frames = every_n_frames
+        self.every_seconds = every_seconds
+        self.max_frames = max_frames
+        self.target_seconds = target_seconds
+        self.max_calls = max_calls
+
+    @classmethod
+    def every_n(cls, n):
+        return cls(every_n_frames=n)
+
+    @classmethod
+    def every(cls, seconds):
+        return cls(every_seconds=seconds)
+
+    @classmethod
+    def budget(cls, k):
+        return cls(max_frames=k)
+
+    @classmethod
+    def adaptive(cls, target_seconds=None, max_calls=None):
+        return cls(target_seconds=target_seconds, max_calls=max_calls)
+
+    @property
+    def is_adaptive(self):
+        return self.target_seconds is not None or self.max_calls is not None
+
+    # Stride awal. Mode adaptif: perkiraan dari anggaran sebelum ada latensi terukur (StrideController memperbarui)
+    def stride(self, fps, total_frames):
+        fps = fps if fps and fps > 0 else DEFAULT_FPS
+        if self.every_n_frames is not None:
+            step = self.every_n_frames
+        elif self.every_seconds is not None:
+            step = round(self.every_seconds * fps)
+        elif self.is_adaptive:
+            samples = min(b for b in (self.max_calls, self.target_seconds and self.target_seconds / ADAPTIVE_INITIAL_LATENCY) if b)
+            step = total_frames / samples if total_frames > 0 else fps
+        else:
+            # Dibulatkan ke atas agar jumlah sample <= K; jumlah frame tidak diketahui -> anggap 1 sample per detik
+            step = -(-total_frames // self.max_frames) if total_frames > 0 else fps
+        return max(1, int(step))
+
+    def to_dict(self):
+        return {"every_n_frames": self.every_n_frames, "every_seconds": self.every_seconds, "max_frames": self.max_frames,
+                "target_seconds": self.target_seconds, "max_calls": self.max_calls}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __repr__(self):
+        if self.every_n_frames is not None: return f"every_n({self.every_n_frames})"
+        if self.every_seconds is not None: return f"every({self.every_seconds}s)"
+        if self.is_adaptive: return f"adaptive({self.target_seconds}s, {self.max_calls} calls)"
+        return f"budget({self.max_frames})"
+
+# --- SAMPLING ADAPTIF ---
+ADAPTIVE_INITIAL_LATENCY = 0.5  # Detik per frame sebelum ada pengukuran
+ADAPTIVE_MIN_STRIDE = 3
+ADAPTIVE_MAX_STRIDE = 300       # Batas atas selama anggaran waktu masih ada / sudah habis (cakupan video tetap terjaga)
+ADAPTIVE_PREFETCH = 2           # Antrian decode pendek agar stride baru cepat berlaku
+DENSIFY_FACTOR = 3              # Stride dibagi ini setelah deteksi berubah...
+DENSIFY_SPAN = 3                # ...untuk sekian sample berikutnya
+
+# Hitung ulang stride setiap hasil frame masuk (urut frame):
+#   sisa sample = min(sisa panggilan API, sisa waktu x throughput terukur), stride = sisa frame / sisa sample.
+# Throughput = frame selesai per detik wall-clock (latensi run_ai_workflow + paralelisme + decode sekaligus).
+# Saat kelas/jumlah deteksi berubah, beberapa sample berikutnya dirapatkan; anggarannya otomatis
+# diambil dari bagian video selanjutnya karena stride dasar dihitung dari sisa anggaran.
+class StrideController:
+    def __init__(self, policy, fps, total_frames, max_inflight=1):
+        self.policy = policy
+        self.fps = fps if fps and fps > 0 else DEFAULT_FPS
+        self.total_frames = total_frames
+        self.max_inflight = max(1, max_inflight)
+        self.started = time.perf_counter()
+        self.samples = 0
+        self.calls = 0
+        self.latency = ADAPTIVE_INITIAL_LATENCY / self.max_inflight  # Detik wall-clock per frame (EWMA)
+        self.stride = self._stride(0)
+        self._dense_left = 0
+        self._last_counts = None
+        self._last_time = self.started
+
+    def _remaining_samples(self):
+        budgets = []
+        if self.policy.max_calls is not None:
+            # Frame dari cache tidak memanggil API -> konversi sisa panggilan ke sisa sample
+            calls_per_sample = self.calls / self.samples if self.samples else 1.0
+            budgets.append((self.policy.max_calls - self.calls) / max(calls_per_sample, 0.05))
+        if self.policy.target_seconds is not None:
+            remaining = self.policy.target_seconds - (time.perf_counter() - self.started)
+            budgets.append(remaining / self.latency)
+        return min(budgets)
+
+    def _stride(self, frame_idx):
+        if not self.total_frames:
+            return self.policy.stride(self.fps, 0)
+        if self.policy.max_calls is not None and self.calls >= self.policy.max_calls:
+            return self.total_frames + 1  # Anggaran API habis: tidak ada sample lagi
+        remaining_frames = max(self.total_frames - frame_idx, 1)
+        stride = remaining_frames / max(self._remaining_samples(), 1e-9)
+        return int(min(max(stride, ADAPTIVE_MIN_STRIDE), ADAPTIVE_MAX_STRIDE))
+
+    # Dipanggil untuk setiap hasil frame; return stride baru
+    def observe(self, frame_idx, preds, calls):
+        now = time.perf_counter()
+        self.latency = 0.7 * self.latency + 0.3 * (now - self._last_time) if self.samples else now - self.started
+        self._last_time = now
+        self.samples += 1
+        self.calls = calls
+
+        counts = {}
+        for p in preds: counts[p['class']] = counts.get(p['class'], 0) + 1
+        if self._last_counts is not None and counts != self._last_counts:
+            self._dense_left = DENSIFY_SPAN
+        self._last_counts = counts
+
+        stride = self._stride(frame_idx)
+        if self._dense_left and stride <= self.total_frames:
+            stride = max(ADAPTIVE_MIN_STRIDE, stride // DENSIFY_FACTOR)
+            self._dense_left -= 1
+        self.stride = stride
+        return stride
+
+# --- FRAME SAMPLER ---
+# Hanya frame yang terpilih yang di-retrieve (decode penuh + konversi BGR).
+# Frame lain cukup di-grab(), dan untuk jarak sample yang jauh langsung seek ke posisi frame.
+# Decoding berjalan di thread prefetch sehingga tumpang tindih dengan inference.
+class FrameSampler:
+    # `growing`: objek dengan Event `.done` (mis. spool.Spool) jika file masih ditulis saat decoding mulai
+    # `metrics` (opsional): metrics.Metrics, mencatat durasi tahap "decode" dan "resize"
+    # `start_frame`: lanjutkan setelah frame ini (resume dari checkpoint); `resumed`: jumlah sample dari checkpoint,
+    # ikut dihitung ke anggaran max_frames
+    # `stride` boleh diubah selama decoding (StrideController); berlaku untuk sample berikutnya
+    def __init__(self, video_path, policy, resize_width=None, prefetch=DEFAULT_PREFETCH, growing=None, metrics=None, start_frame=0, resumed=0):
+        self.video_path = video_path
+        self.start_frame = start_frame
+        self.resumed = resumed
+        self.metrics = metrics
+        self.growing = growing
+        self.policy = policy
+        self.resize_width = resize_width
+        self.prefetch = max(1, prefetch)
+
+        self.cap = cv2.VideoCapture(video_path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+        self.total_frames = max(0, int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+        self.stride = policy.stride(self.fps, self.total_frames)
+        self.decoded = 0    # Frame yang benar-benar di-retrieve
+        self.grabbed = 0    # Frame yang hanya di-grab (dilewati tanpa decode BGR)
+
+        self._queue = queue.Queue(maxsize=self.prefetch)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _resize(self, frame):
+        if not self.resize_width: return frame
+        start = time.perf_counter()
+        h, w = frame.shape[:2]
+        new_h = int(h * (self.resize_width / w))
+        frame = cv2.resize(frame, (self.resize_width, new_h))
+        if self.metrics: self.metrics.observe("resize", time.perf_counter() - start)
+        return frame
+
+    def _put(self, item):
+        # Jangan blok selamanya kalau consumer sudah berhenti
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    # File masih ditulis dan decoder kehabisan data: tunggu sebentar lalu buka ulang di posisi yang sama
+    def _wait_for_data(self, curr):
+        if self.growing is None or self._stop.is_set(): return False
+        was_done = self.growing.done.is_set()
+        if not was_done:
+            self.growing.done.wait(GROWING_POLL)
+        self.cap.release()
+        self.cap = cv2.VideoCapture(self.video_path)
+        if curr: self.cap.set(cv2.CAP_PROP_POS_FRAMES, curr)
+        if not self.total_frames:
+            self.total_frames = max(0, int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+        # Setelah file selesai ditulis cukup satu kali coba ulang
+        if was_done: self.growing = None
+        return True
+
+    def _decode_loop(self):
+        # Nomor frame 1-based, sample di frame ke-stride, 2*stride, ... (sama seperti `curr % stride == 0`)
+        curr = 0    # Posisi decoder (jumlah frame yang sudah dilewati/dibaca)
+        last = 0    # Nomor frame sample terakhir
+        if self.start_frame > 0:
+            curr = last = self.start_frame
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, curr)
+        try:
+            while not self._stop.is_set():
+                # Mode budget: berhenti setelah K sample termasuk sample dari checkpoint (juga saat jumlah frame tidak diketahui)
+                if self.policy.max_frames is not None and self.resumed + self.decoded >= self.policy.max_frames: break
+                cap = self.cap
+                target = last + self.stride
+                start = time.perf_counter()
+
+                # Jarak sample jauh -> seek langsung (dicek tiap sample karena stride bisa berubah)
+                if self.total_frames > 0 and target - curr >= SEEK_MIN_STRIDE:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, target - 1)
+                    curr = target - 1  # Read gagal -> buka ulang di posisi target, bukan posisi sebelum seek
+                else:
+                    ok = True
+                    while curr < target - 1:
+                        ok = cap.grab()
+                        if not ok: break
+                        curr += 1
+                        self.grabbed += 1
+                    if not ok:
+                        if self._wait_for_data(curr): continue
+                        break
+
+                ret, frame = cap.read()
+                if not ret:
+                    if self._wait_for_data(curr): continue
+                    break
+                curr = last = target
+                self.decoded += 1
+                if self.metrics: self.metrics.observe("decode", time.perf_counter() - start)
+
+                if not self._put((curr, self._resize(frame))): break
+        except Exception as e:
+            self._put(e)
+        finally:
+            self._put(_END)
+
+    def __iter__(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._decode_loop, name="frame-sampler", daemon=True)
+            self._thread.start()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _END: break
+                if isinstance(item, Exception): raise item
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.cap.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
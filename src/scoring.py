@@ -0,0 +1,150 @@
+import json
+import os
+import threading
+import numpy as np
+
+# --- STATUS ---
+STATUS_RUSAK_BERAT = "Rusak Berat 🛑"
+STATUS_PERLU_PERBAIKAN = "Perlu Perbaikan ⚠️"
+STATUS_LAYAK = "Layak Pakai ✅"
+
+# --- KONFIGURASI ATURAN SKOR ---
+# Aturan skor berversi di file JSON; versi "active" dipakai audit baru, versi lain bisa dipakai
+# untuk menghitung ulang laporan lama (rescore.py). Tiap laporan menyimpan rule_version yang dipakai.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RULES_PATH = os.environ.get("SMARTREPORT_SCORING_RULES", os.path.join(BASE_DIR, "scoring_rules.json"))
+
+# Dipakai jika file aturan tidak ada (sama dengan aturan awal yang dulu tertulis di kode)
+DEFAULT_RULES = {
+    "active": 1,
+    "versions": [{
+        "version": 1,
+        "keterangan": "Aturan awal",
+        "critical": {"dudukan_rusak": 90, "tanpa_meja": 70},
+        "per_item": {"sobek": 15},
+        "rusak_berat_below": 50,
+        "layak_from": 85,
+    }],
+}
+
+# --- ATURAN SKOR ---
+# critical: {kelas: potongan} -> jika ada, potongan terbesar dipakai dan status langsung Rusak Berat
+# per_item: {kelas: potongan per kerusakan} -> dijumlahkan jika tidak ada kerusakan critical
+# Skor = 100 - potongan (maks 100); skor < rusak_berat_below -> Rusak Berat, < layak_from -> Perlu Perbaikan
+class ScoringRules:
+    def __init__(self, version, critical, per_item, rusak_berat_below, layak_from, keterangan=""):
+        self.version = int(version)
+        # Urut potongan terbesar dulu: kerusakan critical terparah yang menentukan
+        self.critical = dict(sorted(critical.items(), key=lambda kv: kv[1], reverse=True))
+        self.per_item = dict(per_item)
+        self.rusak_berat_below = rusak_berat_below
+        self.layak_from = layak_from
+        self.keterangan = keterangan
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["version"], data.get("critical", {}), data.get("per_item", {}),
+                   data["rusak_berat_below"], data["layak_from"], data.get("keterangan", ""))
+
+    @property
+    def classes(self):
+        return list(dict.fromkeys([*self.critical, *self.per_item]))
+
+    # Satu audit: {kelas: jumlah} -> (skor, potongan, status)
+    def score(self, unique_counts):
+        deduction = 0
+        is_critical_failure = False
+
+        for kelas, critical_deduction in self.critical.items():
+            if unique_counts.get(kelas, 0) > 0:
+                is_critical_failure = True
+                deduction = critical_deduction
+                break
+
+        if not is_critical_failure:
+            for kelas, per_item in self.per_item.items():
+                deduction += unique_counts.get(kelas, 0) * per_item
+
+        deduction = min(100, deduction)
+        final_score = max(0, 100 - deduction)
+
+        if is_critical_failure or final_score < self.rusak_berat_below:
+            status = STATUS_RUSAK_BERAT
+        elif final_score < self.layak_from:
+            status = STATUS_PERLU_PERBAIKAN
+        else:
+            status = STATUS_LAYAK
+
+        return final_score, deduction, status
+
+    # Versi vektor untuk banyak laporan sekaligus (rescore): `counts` DataFrame, satu kolom jumlah per kelas
+    # (kolom yang tidak ada = 0). Return (skor, potongan, status) berupa array NumPy, hasil sama dengan score().
+    def score_counts(self, counts):
+        n = len(counts)
+        col = lambda kelas: counts[kelas].to_numpy(dtype=float) if kelas in counts else np.zeros(n)
+
+        critical = np.zeros(n, dtype=bool)
+        critical_deduction = np.zeros(n)
+        for kelas, d in reversed(self.critical.items()):
+            hit = col(kelas) > 0
+            critical_deduction = np.where(hit, d, critical_deduction)  # Urutan terbalik: yang terparah menang
+            critical |= hit
+
+        per_item = np.zeros(n)
+        for kelas, d in self.per_item.items():
+            per_item += col(kelas) * d
+
+        deduction = np.minimum(100, np.where(critical, critical_deduction, per_item))
+        final_score = np.maximum(0, 100 - deduction)
+        status = np.select([critical | (final_score < self.rusak_berat_below), final_score < self.layak_from],
+                           [STATUS_RUSAK_BERAT, STATUS_PERLU_PERBAIKAN], STATUS_LAYAK)
+        return final_score, deduction, status
+
+    def to_dict(self):
+        return {"version": self.version, "keterangan": self.keterangan, "critical": self.critical, "per_item": self.per_item,
+                "rusak_berat_below": self.rusak_berat_below, "layak_from": self.layak_from}
+
+    def __repr__(self):
+        return f"ScoringRules(v{self.version})"
+
+# --- LOAD CONFIG ---
+# Dibaca ulang otomatis jika file berubah (mtime), tanpa restart aplikasi
+_rules = None
+_rules_mtime = None
+_rules_lock = threading.Lock()
+
+def load_rules(path=None):
+    path = path or RULES_PATH
+    data = DEFAULT_RULES
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    versions = {int(v["version"]): ScoringRules.from_dict(v) for v in data["versions"]}
+    active = int(data["active"])
+    if active not in versions:
+        raise ValueError(f"Versi aturan aktif {active} tidak ada di {path}")
+    return versions, active
+
+def _load_cached():
+    global _rules, _rules_mtime
+    mtime = os.path.getmtime(RULES_PATH) if os.path.exists(RULES_PATH) else None
+    with _rules_lock:
+        if _rules is None or mtime != _rules_mtime:
+            _rules, _rules_mtime = load_rules(), mtime
+        return _rules
+
+# Aturan versi tertentu (default: versi aktif)
+def get_rules(version=None):
+    versions, active = _load_cached()
+    version = active if version is None else int(version)
+    if version not in versions:
+        raise KeyError(f"Versi aturan skor {version} tidak ditemukan")
+    return versions[version]
+
+def list_rules():
+    versions, active = _load_cached()
+    return [versions[v] for v in sorted(versions)], active
+
+# --- LOGIKA SKOR ---
+def calculate_score(unique_counts, rules=None):
+    return (rules or get_rules()).score(unique_counts)
@@ -0,0 +1,193 @@
+import time
+from collections import deque
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+
+# --- KONFIGURASI RING SHARED MEMORY ---
+# Serah-terima frame BGR ukuran tetap antar proses tanpa pickle / file: produsen menyalin frame sekali ke
+# shared memory, konsumen membaca lewat view NumPy (tanpa copy). Satu produsen + satu konsumen per ring;
+# untuk beberapa worker, buat satu ring per worker.
+DEFAULT_SLOTS = 16
+POLL_INTERVAL = 0.0005   # Detik, jeda polling saat ring penuh (produsen) / kosong (konsumen)
+HANDLE_PREFIX = "shm://"
+
+# Header int64 di awal segmen
+_WRITE, _READ, _CLOSED, _DROPPED, _TOTAL = range(5)
+_CTRL = 5
+
+def is_handle(path):
+    return isinstance(path, str) and path.startswith(HANDLE_PREFIX)
+
+# "shm://<nama>/<slots>/<tinggi>x<lebar>x<kanal>" -> (nama, slots, shape)
+def parse_handle(handle):
+    name, slots, shape = handle[len(HANDLE_PREFIX):].split("/")
+    return name, int(slots), tuple(int(x) for x in shape.split("x"))
+
+# --- RING BUFFER ---
+# Protokol nomor urut (seq): produsen hanya menulis _WRITE, konsumen hanya menulis _READ.
+#   publish: tunggu slot bebas (seq - _READ < slots) -> tulis data + meta slot -> _WRITE = seq + 1
+#   konsumen: frame seq siap jika seq < _WRITE; view slot valid sampai release(seq) (_READ = seq + 1)
+# Karena produsen tidak pernah menimpa slot yang belum di-release, view konsumen aman dipakai tanpa copy.
+class SharedFrameRing:
+    def __init__(self, shm, slots, shape, owner=False):
+        self.shm = shm
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.owner = owner
+        ctrl_bytes = _CTRL * 8
+        meta_bytes = slots * 2 * 8
+        self.ctrl = np.ndarray((_CTRL,), np.int64, shm.buf, 0)
+        self.meta = np.ndarray((slots, 2), np.int64, shm.buf, ctrl_bytes)        # seq, frame_idx per slot
+        self.data = np.ndarray((slots, *self.shape), np.uint8, shm.buf, ctrl_bytes + meta_bytes)
+        self._claimed = int(self.ctrl[_READ])
+
+    @classmethod
+    def create(cls, shape, slots=DEFAULT_SLOTS):
+        shape = tuple(int(x) for x in shape)
+        size = (_CTRL + slots * 2) * 8 + slots * int(np.prod(shape))
+        ring = cls(shared_memory.SharedMemory(create=True, size=size), slots, shape, owner=True)
+        ring.ctrl[:] = 0
+        ring.meta[:] = -1
+        return ring
+
+    @classmethod
+    def attach(cls, handle):
+        name, slots, shape = parse_handle(handle)
+        return cls(shared_memory.SharedMemory(name=name), slots, shape)
+
+    @property
+    def handle(self):
+        return f"{HANDLE_PREFIX}{self.shm.name}/{self.slots}/{'x'.join(map(str, self.shape))}"
+
+    @property
+    def total_frames(self):
+        return int(self.ctrl[_TOTAL])
+
+    @property
+    def dropped(self):
+        return int(self.ctrl[_DROPPED])
+
+    def pending(self):
+        return int(self.ctrl[_WRITE]) - int(self.ctrl[_READ])
+
+    # --- PRODUSEN ---
+    # block=False: ring penuh -> frame dibuang (callback kamera tidak boleh menunggu), return None
+    def publish(self, frame_idx, frame, block=True, timeout=None):
+        seq = int(self.ctrl[_WRITE])
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while seq - int(self.ctrl[_READ]) >= self.slots:
+            if not block or (deadline is not None and time.monotonic() > deadline):
+                self.ctrl[_DROPPED] += 1
+                return None
+            time.sleep(POLL_INTERVAL)
+
+        slot = seq % self.slots
+        if frame.shape != self.shape:
+            # Slot berukuran tetap: frame dengan resolusi lain (mis. WebRTC berganti resolusi) diskalakan
+            frame = cv2.resize(frame, (self.shape[1], self.shape[0]))
+        self.data[slot] = frame
+        self.meta[slot] = (seq, frame_idx)
+        self.ctrl[_TOTAL] = max(int(self.ctrl[_TOTAL]), frame_idx)
+        self.ctrl[_WRITE] = seq + 1  # Dipublikasikan setelah data lengkap
+        return seq
+
+    def close(self, total_frames=None):
+        if total_frames is not None: self.ctrl[_TOTAL] = total_frames
+        self.ctrl[_CLOSED] = 1
+
+    # --- KONSUMEN ---
+    # Return (seq, frame_idx, view) berikutnya, atau None jika produsen sudah close dan ring habis.
+    def claim(self, timeout=None):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        seq = self._claimed
+        while seq >= int(self.ctrl[_WRITE]):
+            if self.ctrl[_CLOSED] and seq >= int(self.ctrl[_WRITE]): return None
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Tidak ada frame baru di {self.handle}")
+            time.sleep(POLL_INTERVAL)
+        slot = seq % self.slots
+        self._claimed = seq + 1
+        return seq, int(self.meta[slot, 1]), self.data[slot]
+
+    # Bebaskan semua slot sampai `seq` (berurutan) agar boleh ditimpa produsen
+    def release(self, seq):
+        if seq + 1 > int(self.ctrl[_READ]): self.ctrl[_READ] = seq + 1
+
+    # --- LIFECYCLE ---
+    def detach(self):
+        self.ctrl = self.meta = self.data = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # Masih ada view yang dipegang konsumen; mapping dilepas saat view di-GC
+
+    def unlink(self):
+        self.detach()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+# Hapus segmen lewat handle, dari proses mana pun (worker yang selesai memakai frame, atau pembersihan job yatim).
+# Return False jika segmen sudah tidak ada.
+def unlink_handle(handle):
+    name, _, _ = parse_handle(handle)
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    shm.unlink()
+    return True
+
+# Tulis sekumpulan frame (idx, frame) sekaligus ke ring baru yang cukup untuk semuanya (produsen tidak menunggu)
+def publish_frames(frames, total_frames=None):
+    ring = SharedFrameRing.create(frames[0][1].shape, slots=len(frames))
+    for idx, frame in frames:
+        ring.publish(idx, frame)
+    ring.close(total_frames)
+    return ring
+
+# --- SUMBER FRAME (pengganti FrameSampler untuk analyze_video) ---
+# `hold`: jumlah frame terakhir yang tetap dipegang (belum di-release) karena masih dipakai pipeline
+# (request in-flight + frame yang sedang ditampilkan). Jika ring terlalu kecil untuk itu, frame di-copy.
+class SharedFrameSource:
+    def __init__(self, handle, hold=1, timeout=None):
+        self.ring = SharedFrameRing.attach(handle)
+        self.copy = hold >= self.ring.slots
+        self.hold = 0 if self.copy else hold
+        self.timeout = timeout
+        self.decoded = 0
+        self.grabbed = 0
+        self._total = 0
+
+    @property
+    def total_frames(self):
+        return self.ring.total_frames if self.ring.ctrl is not None else self._total
+
+    def __iter__(self):
+        held = deque()
+        try:
+            while True:
+                item = self.ring.claim(self.timeout)
+                if item is None: break
+                seq, idx, view = item
+                self.decoded += 1
+                if self.copy:
+                    frame = view.copy()
+                    self.ring.release(seq)
+                else:
+                    frame = view
+                    held.append(seq)
+                    while len(held) > self.hold:
+                        self.ring.release(held.popleft())
+                yield idx, frame
+        finally:
+            if held: self.ring.release(held[-1])
+
+    def close(self):
+        if self.ring.ctrl is None: return
+        self._total = self.ring.total_frames
+        self.ring.detach()
@@ -0,0 +1,214 @@
+import os
+import struct
+import tempfile
+import threading
+import time
+import uuid
+
+# --- KONFIGURASI FILE SEMENTARA ---
+SPOOL_DIR = os.path.join(tempfile.gettempdir(), "smartreport")
+CHUNK_SIZE = 4 * 1024 * 1024          # Upload disalin ke disk per 4 MB
+MAX_TOTAL_BYTES = 2 * 1024 ** 3       # Kuota total file sementara (2 GB)
+MAX_AGE_SECONDS = 6 * 3600            # File lebih tua dari ini dihapus saat cleanup
+STREAM_HEAD_BYTES = 2 * 1024 * 1024   # Minimal data tertulis sebelum decoding boleh mulai (container streamable)
+
+# --- MANAJER ARTEFAK SEMENTARA ---
+# Semua video upload (spool) dan hasil rekaman kamera ditaruh di SPOOL_DIR,
+# dibersihkan berdasarkan umur dan kuota disk. File yang masih dipakai tidak pernah dihapus cleanup.
+# Kepemilikan dicatat sebagai file penanda di `root/.active/` (isi: PID pemilik), sehingga terlihat oleh semua proses:
+# file yang diserahkan ke worker job di-claim() worker dan di-release() dari proses mana pun.
+# Penanda dengan PID yang sudah mati (proses crash / restart server) dianggap tidak aktif lagi.
+class TempArtifactManager:
+    def __init__(self, root=SPOOL_DIR, quota_bytes=MAX_TOTAL_BYTES, max_age=MAX_AGE_SECONDS):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.max_age = max_age
+        self.active_dir = os.path.join(self.root, ".active")
+        os.makedirs(self.active_dir, exist_ok=True)
+
+    def _marker(self, path):
+        return os.path.join(self.active_dir, os.path.basename(path))
+
+    def new_path(self, suffix="", kind="tmp"):
+        path = os.path.join(self.root, f"{kind}-{uuid.uuid4().hex}{suffix}")
+        self.claim(path)
+        return path
+
+    # Tandai file dipakai proses ini (mis. worker job yang menerima file dari proses Streamlit)
+    def claim(self, path):
+        with open(self._marker(path), "w") as f:
+            f.write(str(os.getpid()))
+
+    def is_active(self, path):
+        try:
+            with open(self._marker(path)) as f:
+                pid = int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return False
+        return pid_alive(pid)
+
+    def release(self, path, delete=True):
+        if not path: return
+        try:
+            os.remove(self._marker(path))
+        except FileNotFoundError:
+            pass
+        if delete and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"⚠️ Gagal menghapus file sementara {path}: {e}")
+
+    def _files(self):
+        files = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if not os.path.isfile(path): continue
+            files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def usage(self):
+        files = self._files()
+        return len(files), sum(size for _, size, _ in files)
+
+    def cleanup(self, now=None):
+        now = now or time.time()
+        removed = 0
+        kept = []
+        for mtime, size, path in sorted(self._files()):
+            # File yang masih dipakai (penanda dengan PID hidup) tidak dihapus, berapa pun umurnya
+            if self.is_active(path): continue
+            if now - mtime > self.max_age:
+                self.release(path)
+                removed += 1
+            else:
+                kept.append((mtime, size, path))
+
+        # Masih di atas kuota -> hapus yang paling lama dulu
+        total = sum(size for _, size, _ in self._files())
+        for _, size, path in kept:
+            if total <= self.quota_bytes: break
+            self.release(path)
+            total -= size
+            removed += 1
+
+        # Penanda yatim (file sudah hilang, atau pemilik sudah mati)
+        for name in os.listdir(self.active_dir):
+            path = os.path.join(self.root, name)
+            if not os.path.exists(path) or not self.is_active(path):
+                self.release(path, delete=False)
+        return removed
+
+# Proses dengan PID ini masih berjalan (juga dipakai tabel jobs untuk mendeteksi job yatim)
+def pid_alive(pid):
+    if pid <= 0: return False
+    if pid == os.getpid(): return True
+    # Windows: os.kill(pid, 0) menghentikan proses, bukan mengecek -> penanda dianggap aktif sampai di-release
+    if os.name == "nt": return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Ada, milik user lain
+    except OSError:
+        return False
+    return True
+
+_manager = None
+_manager_lock = threading.Lock()
+
+# Satu manager per proses
+def get_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = TempArtifactManager()
+        return _manager
+
+# --- DETEKSI CONTAINER STREAMABLE ---
+# MP4 bisa dibaca sebelum selesai ditulis hanya jika atom 'moov' ada sebelum 'mdat' (faststart).
+# AVI menyimpan header/index awal di depan (RIFF), jadi frame awal bisa langsung di-decode.
+def is_streamable(head):
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return True
+
+    pos = 0
+    while pos + 8 <= len(head):
+        size, kind = struct.unpack(">I4s", head[pos:pos + 8])
+        if kind == b"moov": return True
+        if kind == b"mdat": return False
+        if size == 1 and pos + 16 <= len(head):
+            size = struct.unpack(">Q", head[pos + 8:pos + 16])[0]
+        if size < 8: return False
+        pos += size
+    return False
+
+# --- SPOOL UPLOAD KE DISK ---
+# Menyalin file-like (mis. UploadedFile Streamlit) ke disk per chunk di background thread,
+# tanpa membuat salinan penuh isi file di memori.
+class Spool:
+    def __init__(self, source, manager=None, suffix=".mp4", chunk_size=CHUNK_SIZE):
+        self.manager = manager or get_manager()
+        self.path = self.manager.new_path(suffix, kind="upload")
+        self.source = source
+        self.chunk_size = chunk_size
+        self.bytes_written = 0
+        self.streamable = False
+        self.error = None
+        self.done = threading.Event()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._copy, name="upload-spool", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _copy(self):
+        try:
+            # BytesIO (UploadedFile): baca lewat memoryview, tanpa salinan dan tanpa mengubah posisi file
+            if hasattr(self.source, "getbuffer"):
+                buf = self.source.getbuffer()
+                chunks = (buf[i:i + self.chunk_size] for i in range(0, len(buf), self.chunk_size))
+                head = bytes(buf[:64 * 1024])
+            else:
+                self.source.seek(0)
+                head = self.source.read(64 * 1024)
+                self.source.seek(0)
+                chunks = iter(lambda: self.source.read(self.chunk_size), b"")
+            self.streamable = is_streamable(head)
+
+            with open(self.path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    f.flush()
+                    self.bytes_written += len(chunk)
+                    if self.streamable and self.bytes_written >= STREAM_HEAD_BYTES:
+                        self._ready.set()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+            self._ready.set()
+
+    # Tunggu sampai file boleh mulai di-decode: selesai ditulis, atau cukup header untuk container streamable
+    def wait_ready(self, timeout=None):
+        self._ready.wait(timeout)
+        if self.error: raise self.error
+        return self.path
+
+    def wait(self, timeout=None):
+        self.done.wait(timeout)
+        if self.error: raise self.error
+        return self.path
+
+    def release(self):
+        self.done.wait()
+        self.manager.release(self.path)
+
+def spool_upload(source, manager=None, suffix=".mp4", chunk_size=CHUNK_SIZE):
+    return Spool(source, manager, suffix, chunk_size).start()
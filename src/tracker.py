@@ -0,0 +1,178 @@
+import numpy as np
+from collections import Counter
+
+# --- KONFIGURASI TRACKER ---
+IOU_THRESHOLD = 0.3    # IoU minimal (terhadap posisi prediksi track) untuk dianggap objek yang sama
+MAX_DISTANCE = 1.0     # Jarak pusat maksimal, dalam satuan ukuran box, jika IoU terlalu kecil (sample jarang)
+MAX_AGE = 30           # Frame video; track yang tidak terlihat lebih lama dari ini (dan dari 2x jarak sample) dianggap hilang
+MIN_HITS = 2           # Jumlah deteksi minimal agar track dihitung sebagai kerusakan unik (deteksi palsu sesaat tidak dihitung)
+CONFIRM_MAX_STRIDE = 20  # Frame video; jika jarak sample (median) lebih dari ini min_hits dianggap 1
+# Dasar angka di atas: benchmarks/bench_tracker.py (30 video, 5% deteksi palsu/frame, error terhadap kerusakan yang
+# terlihat di frame sample). Error per stride 1/5/15/30/60/90: 35/14/35/84/49/57 (sebelumnya MIN_HITS=1, MAX_AGE=90:
+# 656/128/84/83/53/50). MIN_HITS=2 pada stride >= 60 menghilangkan hampir semua kerusakan (hanya terlihat di 1 sample),
+# karena itu dimatikan di atas CONFIRM_MAX_STRIDE. Mulai stride ~30 akurasi turun: deteksi palsu tidak bisa dibedakan
+# dari kerusakan yang terlihat sekali, dan setiap deteksi palsu ikut terhitung.
+VELOCITY_SMOOTHING = 0.5
+MOTION_TOLERANCE = 0.5 # Satuan ukuran box; selisih perpindahan yang dianggap "gerakan yang sama" saat voting gerak kamera
+
+def _xyxy(cxcywh):
+    c, wh = cxcywh[:, :2], cxcywh[:, 2:] / 2
+    return np.concatenate([c - wh, c + wh], axis=1)
+
+# Matriks IoU (T x D) sekaligus lewat broadcasting
+def iou_matrix(a, b):
+    a, b = _xyxy(a), _xyxy(b)
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+# Jarak pusat (T x D), dinormalisasi dengan rata-rata ukuran kedua box
+def distance_matrix(a, b):
+    d = np.linalg.norm(a[:, None, :2] - b[None, :, :2], axis=2)
+    scale = (a[:, None, 2:].mean(axis=2) + b[None, :, 2:].mean(axis=2)) / 2
+    return d / np.maximum(scale, 1e-9)
+
+# --- TRACKER KERUSAKAN ---
+# Mencocokkan box antar frame sample (per kelas) agar satu kerusakan fisik dihitung sekali,
+# walaupun beberapa kerusakan tidak pernah muncul di frame yang sama.
+# Posisi track diprediksi dengan kecepatan konstan (kamera bergerak), sehingga tetap cocok saat sample jarang.
+class DefectTracker:
+    def __init__(self, iou_threshold=IOU_THRESHOLD, max_distance=MAX_DISTANCE, max_age=MAX_AGE, min_hits=MIN_HITS):
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self.min_hits = min_hits
+
+        # Track aktif, disimpan sebagai array sejajar
+        self.boxes = np.zeros((0, 4))          # cx, cy, w, h
+        self.velocity = np.zeros((0, 2))       # piksel per frame
+        self.last_frame = np.zeros(0, dtype=np.int64)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.classes = np.zeros(0, dtype=np.int64)
+        self.ids = np.zeros(0, dtype=np.int64)
+
+        self.global_velocity = np.zeros(2)     # Perkiraan gerak kamera (median kecepatan track yang cocok)
+        self._class_ids = {}
+        self._next_id = 0
+        # Semua track (termasuk yang sudah hilang), index = id track: dasar counts()
+        self.track_hits = np.zeros(0, dtype=np.int64)
+        self.track_classes = np.zeros(0, dtype=np.int64)
+        self._gaps = []          # Jarak frame antar update (perkiraan stride sampling)
+        self._last_update = None
+
+    def _class_id(self, name):
+        return self._class_ids.setdefault(name, len(self._class_ids))
+
+    # Track yang baru terlihat sekali belum punya kecepatan sendiri -> pakai perkiraan gerak kamera
+    def predict(self, frame_idx):
+        pred = self.boxes.copy()
+        velocity = np.where((self.hits > 1)[:, None], self.velocity, self.global_velocity)
+        pred[:, :2] += velocity * (frame_idx - self.last_frame)[:, None]
+        return pred
+
+    # Sisa pergeseran bersama (kamera berbelok/berubah kecepatan): voting perpindahan semua pasangan kelas sama,
+    # perpindahan yang disepakati paling banyak pasangan (minimal 2) dipakai. Seluruhnya lewat broadcasting.
+    def _motion_offset(self, pred, dets, same_class):
+        disp = (dets[None, :, :2] - pred[:, None, :2])[same_class]
+        if len(disp) < 2: return np.zeros(2)
+        tol = MOTION_TOLERANCE * np.mean(np.concatenate([pred[:, 2:], dets[:, 2:]]))
+        close = np.linalg.norm(disp[:, None, :] - disp[None, :, :], axis=2) <= tol
+        votes = close.sum(axis=1)
+        best = int(np.argmax(votes))
+        zero_votes = int((np.linalg.norm(disp, axis=1) <= tol).sum())
+        if votes[best] < 2 or votes[best] <= zero_votes: return np.zeros(2)
+        return disp[close[best]].mean(axis=0)
+
+    # Greedy matching: pasangan dengan skor tertinggi dulu. IoU cukup -> skor 1 + IoU,
+    # jika tidak, jarak pusat cukup dekat -> skor (0, 1]. Kelas berbeda tidak pernah dicocokkan.
+    def _match(self, pred, dets, det_classes):
+        if not len(pred) or not len(dets):
+            return []
+        same_class = self.classes[:, None] == det_classes[None, :]
+        pred = pred.copy()
+        pred[:, :2] += self._motion_offset(pred, dets, same_class)
+        iou = iou_matrix(pred, dets)
+        dist = distance_matrix(pred, dets)
+        score = np.where(iou >= self.iou_threshold, 1.0 + iou,
+                         np.where(dist <= self.max_distance, 1.0 - dist / (self.max_distance + 1e-9), 0.0))
+        score[~same_class] = 0.0
+
+        pairs = []
+        order = np.argsort(-score, axis=None)
+        flat = score.ravel()
+        used_t = np.zeros(len(pred), dtype=bool)
+        used_d = np.zeros(len(dets), dtype=bool)
+        for k in order:
+            if flat[k] <= 0: break
+            t, d = divmod(int(k), len(dets))
+            if used_t[t] or used_d[d]: continue
+            used_t[t] = used_d[d] = True
+            pairs.append((t, d))
+        return pairs
+
+    # preds: list dict prediksi (class, x, y, width, height). Return id track untuk tiap prediksi.
+    def update(self, frame_idx, preds):
+        if self._last_update is not None: self._gaps.append(frame_idx - self._last_update)
+        self._last_update = frame_idx
+
+        # Buang track yang sudah terlalu lama tidak terlihat (minimal satu jarak sample, agar sample jarang tetap tersambung)
+        alive = frame_idx - self.last_frame <= max(self.max_age, 2 * self._gaps[-1] if self._gaps else 0)
+        if not alive.all():
+            self.boxes, self.velocity = self.boxes[alive], self.velocity[alive]
+            self.last_frame, self.hits = self.last_frame[alive], self.hits[alive]
+            self.classes, self.ids = self.classes[alive], self.ids[alive]
+
+        if not preds:
+            return []
+        dets = np.array([[p['x'], p['y'], p['width'], p['height']] for p in preds], dtype=float)
+        det_classes = np.array([self._class_id(p['class']) for p in preds], dtype=np.int64)
+
+        pred = self.predict(frame_idx)
+        pairs = self._match(pred, dets, det_classes)
+        assigned = np.full(len(dets), -1, dtype=np.int64)
+
+        if pairs:
+            t_idx = np.array([t for t, _ in pairs])
+            d_idx = np.array([d for _, d in pairs])
+            gap = np.maximum(frame_idx - self.last_frame[t_idx], 1)[:, None]
+            new_v = (dets[d_idx, :2] - self.boxes[t_idx, :2]) / gap
+            # Track baru (hits == 1) belum punya kecepatan -> pakai kecepatan terukur langsung
+            first = (self.hits[t_idx] == 1)[:, None]
+            self.velocity[t_idx] = np.where(first, new_v, VELOCITY_SMOOTHING * self.velocity[t_idx] + (1 - VELOCITY_SMOOTHING) * new_v)
+            self.global_velocity = np.median(new_v, axis=0)
+            self.boxes[t_idx] = dets[d_idx]
+            self.last_frame[t_idx] = frame_idx
+            self.hits[t_idx] += 1
+            self.track_hits[self.ids[t_idx]] += 1
+            assigned[d_idx] = self.ids[t_idx]
+
+        new = np.flatnonzero(assigned < 0)
+        if len(new):
+            new_ids = np.arange(self._next_id, self._next_id + len(new))
+            self._next_id += len(new)
+            self.boxes = np.vstack([self.boxes, dets[new]])
+            self.velocity = np.vstack([self.velocity, np.zeros((len(new), 2))])
+            self.last_frame = np.concatenate([self.last_frame, np.full(len(new), frame_idx, dtype=np.int64)])
+            self.hits = np.concatenate([self.hits, np.ones(len(new), dtype=np.int64)])
+            self.classes = np.concatenate([self.classes, det_classes[new]])
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.track_hits = np.concatenate([self.track_hits, np.ones(len(new), dtype=np.int64)])
+            self.track_classes = np.concatenate([self.track_classes, det_classes[new]])
+            assigned[new] = new_ids
+
+        return assigned.tolist()
+
+    # Sample jarang (atau baru satu frame): kerusakan nyata pun hanya terlihat sekali, jadi tidak bisa dikonfirmasi
+    def effective_min_hits(self):
+        if not self._gaps or np.median(self._gaps) > CONFIRM_MAX_STRIDE: return 1
+        return self.min_hits
+
+    # Jumlah track per kelas yang mencapai min_hits
+    def counts(self):
+        names = {i: name for name, i in self._class_ids.items()}
+        confirmed = self.track_classes[self.track_hits >= self.effective_min_hits()]
+        return Counter({names[c]: int(n) for c, n in zip(*np.unique(confirmed, return_counts=True))})
@@ -1,74 +1,137 @@
 import cv2
 import numpy as np
-from inference_sdk import InferenceHTTPClient
 import streamlit as st
 import sys
+import threading
+import time
+import backends
 
-# --- KONFIGURASI ROBOFLOW (LOAD DARI SECRETS) ---
-try:
-    # Mengambil value dari .streamlit/secrets.toml
-    API_KEY = st.secrets["ROBOFLOW_API_KEY"]
-    WORKSPACE_NAME = st.secrets["ROBOFLOW_WORKSPACE"]
-    WORKFLOW_ID = st.secrets["ROBOFLOW_WORKFLOW"]
-except FileNotFoundError:
-    st.error("❌ File .streamlit/secrets.toml tidak ditemukan!")
-    st.stop()
-except KeyError as e:
-    st.error(f"❌ Key {e} tidak ditemukan di secrets.toml")
-    st.stop()
-
-# Inisialisasi Client
-client = InferenceHTTPClient(
-    api_url="https://detect.roboflow.com",
-    api_key=API_KEY
-)
+# --- KONFIGURASI BACKEND INFERENCE (LOAD DARI SECRETS) ---
+# INFERENCE_BACKEND = "remote" (Roboflow workflow, default) atau "local" (model ONNX di CPU, bisa offline)
+# Backend dibuat saat pertama kali dibutuhkan (bukan saat import) dan dipakai ulang per proses,
+# sehingga halaman lain tetap jalan walau secrets belum diisi.
+class BackendConfigError(RuntimeError):
+    pass
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            try:
+                # Mengambil value dari .streamlit/secrets.toml
+                _backend = backends.create_backend(st.secrets)
+            except FileNotFoundError:
+                raise BackendConfigError("❌ File .streamlit/secrets.toml tidak ditemukan!")
+            except KeyError as e:
+                raise BackendConfigError(f"❌ Key {e} tidak ditemukan di secrets.toml")
+        return _backend
+
+# Pasang backend secara eksplisit (CLI, benchmark, test) tanpa membaca secrets
+def set_backend(backend):
+    global _backend
+    with _backend_lock:
+        _backend = backend
 
 # Warna Bounding Box
 COLOR_BOX = (0, 0, 255) 
 
-def run_ai_workflow(frame): 
-    predictions = []
+# --- PARSING HASIL WORKFLOW ---
+def parse_workflow_result(result):
+    prediction_result = result[0]
+    raw_preds = prediction_result.get("predictions", [])
     
-    try:
-        result = client.run_workflow(
-            workspace_name=WORKSPACE_NAME,
-            workflow_id=WORKFLOW_ID,
-            images={"image": frame}
-        )
+    if not raw_preds:
+        for key, val in prediction_result.items():
+            if isinstance(val, dict) and "predictions" in val:
+                raw_preds = val["predictions"]
+                break
+
+    return [
+        {"class": p['class'], "confidence": p['confidence'], "x": p['x'], "y": p['y'], "width": p['width'], "height": p['height']}
+        for p in raw_preds
+    ]
+
+# Prediksi lengkap (dengan box), TANPA menggambar. Error dilempar ke pemanggil.
+def detect(frame):
+    return parse_workflow_result(get_backend().infer(frame))
+
+def detect_batch(frames):
+    return [parse_workflow_result(r) for r in get_backend().infer_batch(frames)]
+
+def draw_predictions(frame, boxes):
+    for p in boxes:
+        x, y, w, h = p['x'], p['y'], p['width'], p['height']
+        label = p['class']
+        conf = p['confidence']
+
+        x1 = int(x - w/2)
+        y1 = int(y - h/2)
+        x2 = int(x + w/2)
+        y2 = int(y + h/2)
         
-        # ... (Lanjutkan kode parsing seperti sebelumnya) ...
-        prediction_result = result[0]
-        raw_preds = prediction_result.get("predictions", [])
+        cv2.rectangle(frame, (x1, y1), (x2, y2), COLOR_BOX, 2)
         
-        if not raw_preds:
-            for key, val in prediction_result.items():
-                if isinstance(val, dict) and "predictions" in val:
-                    raw_preds = val["predictions"]
-                    break
+        text = f"{label} {int(conf*100)}%"
+        (tw, th), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+        cv2.rectangle(frame, (x1, y1 - 20), (x1 + tw, y1), COLOR_BOX, -1)
+        cv2.putText(frame, text, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,255,255), 1)
+    return frame
+
+# Hasil frame yang GAGAL dianalisis (error API / backend). Tetap list kosong agar agregasi dan tampilan
+# berjalan seperti biasa, tapi bisa dibedakan dari "tidak ada kerusakan" (mis. tidak di-checkpoint).
+class FailedPredictions(list):
+    def __init__(self, error=None):
+        super().__init__()
+        self.error = error
+
+def is_failed(preds):
+    return isinstance(preds, FailedPredictions)
+
+# detect_fn bisa diganti (mis. versi ber-cache), default: panggil workflow langsung
+# `metrics` (opsional): metrics.Metrics, mencatat durasi "draw" dan jumlah error
+# Error -> (frame, FailedPredictions), bukan exception: satu frame gagal tidak menghentikan analisis video.
+def run_ai_workflow(frame, detect_fn=None, metrics=None): 
+    predictions = []
+    
+    try:
+        boxes = (detect_fn or detect)(frame)
         
-        for p in raw_preds:
-            x, y, w, h = p['x'], p['y'], p['width'], p['height']
-            label = p['class']
-            conf = p['confidence']
-            
+        # Box ikut dikembalikan (x, y = pusat box) untuk tracker kerusakan unik
+        for p in boxes:
             predictions.append({
-                "class": label,
-                "confidence": conf
+                "class": p['class'],
+                "confidence": p['confidence'],
+                "x": p['x'], "y": p['y'], "width": p['width'], "height": p['height'],
             })
 
-            x1 = int(x - w/2)
-            y1 = int(y - h/2)
-            x2 = int(x + w/2)
-            y2 = int(y + h/2)
-            
-            cv2.rectangle(frame, (x1, y1), (x2, y2), COLOR_BOX, 2)
-            
-            text = f"{label} {int(conf*100)}%"
-            (tw, th), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
-            cv2.rectangle(frame, (x1, y1 - 20), (x1 + tw, y1), COLOR_BOX, -1)
-            cv2.putText(frame, text, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,255,255), 1)
+        if metrics:
+            with metrics.time("draw"): draw_predictions(frame, boxes)
+        else:
+            draw_predictions(frame, boxes)
 
     except Exception as e:
         print(f"Workflow Error: {e}")
+        if metrics: metrics.inc("workflow_errors")
+        return frame, FailedPredictions(e)
     
-    return frame, predictions
\ No newline at end of file
+    return frame, predictions
+
+# Versi batch: satu panggilan backend untuk beberapa frame (efisien untuk backend lokal)
+def run_ai_workflow_batch(frames, detect_batch_fn=None, metrics=None):
+    try:
+        all_boxes = (detect_batch_fn or detect_batch)(frames)
+    except Exception as e:
+        print(f"Workflow Error: {e}")
+        if metrics: metrics.inc("workflow_errors", len(frames))
+        return [(frame, FailedPredictions(e)) for frame in frames]
+
+    results = []
+    for frame, boxes in zip(frames, all_boxes):
+        start = time.perf_counter()
+        draw_predictions(frame, boxes)
+        if metrics: metrics.observe("draw", time.perf_counter() - start)
+        results.append((frame, [dict(p) for p in boxes]))
+    return results
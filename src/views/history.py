@@ -1,45 +1,117 @@
+from datetime import datetime
 import streamlit as st
 import database as db
 import pandas as pd
+import export
+import spool
 
-def show():
-    db.init_db()
-    st.title("📂 Database Laporan")
-    
-    # Refresh data setiap kali halaman dibuka
-    df = db.get_all_laporan_as_df()
-    
+# --- KONFIGURASI TABEL ---
+PAGE_SIZES = [25, 50, 100, 250]
+SORT_OPTIONS = {
+    "Terbaru": ("timestamp", True),
+    "Terlama": ("timestamp", False),
+    "Skor Terendah": ("confidence_score", False),
+    "Skor Tertinggi": ("confidence_score", True),
+}
+
+# --- QUERY TER-CACHE ---
+# `version` (db.get_data_version) hanya dipakai sebagai kunci cache: naik setiap create_laporan,
+# sehingga cache otomatis kadaluarsa begitu ada laporan baru (termasuk dari job background).
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_stats(version):
+    return db.get_summary_stats()
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_options(version):
+    return db.get_filter_options()
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_count(version, filters):
+    return db.count_laporan(**dict(filters))
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_page(version, filters, sort, descending, limit, offset):
+    df = db.query_laporan(**dict(filters), sort=sort, descending=descending, limit=limit, offset=offset)
     if not df.empty and 'timestamp' in df.columns:
         df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+# --- EXPORT ---
+# Chunk query ditulis ke file sementara di spool (memori query tidak bergantung ukuran tabel), lalu dibaca sebagai bytes
+# dan file langsung dihapus. Jalur UI tetap in-memory: st.download_button menyimpan seluruh isi file di memori server
+# (media file manager) sebelum dikirim. Export tabel sangat besar tanpa menampung di memori: pakai CLI src/export.py.
+def export_bytes(fmt, filters):
+    manager = spool.get_manager()
+    manager.cleanup()
+    path = manager.new_path(f".{fmt}", kind="export")
+    try:
+        export.export_laporan(path, fmt, **dict(filters))
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        manager.release(path)
+
+def show():
+    st.title("📂 Database Laporan")
+
+    # Cek versi data setiap rerun (1 query ringan); data baru dibaca hanya jika versinya berubah
+    version = db.get_data_version()
+    total, critical = cached_stats(version)
 
     # --- Metrics Section ---
-    if not df.empty:
-        total, critical = db.get_summary_stats()
+    if total:
         c1, c2, c3 = st.columns(3)
         c1.metric("Total Laporan", total)
         c2.metric("Status Critical", critical)
-        
+
         try:
-            latest = df.iloc[0]['timestamp'].strftime("%d %b %H:%M")
+            latest = cached_page(version, (), "timestamp", True, 1, 0).iloc[0]['timestamp'].strftime("%d %b %H:%M")
         except:
             latest = "-"
         c3.metric("Update Terakhir", latest)
-    
+
     st.divider()
 
     # --- Table Section ---
-    if not df.empty:
+    if total:
+        options = cached_options(version)
+
         # Pindahkan Filter ke Expander agar rapi
         with st.expander("🔎 Filter Data", expanded=False):
-            status_opts = df['status'].unique().tolist()
-            sel_status = st.multiselect("Status:", status_opts, default=status_opts)
-            
-            gedung_opts = df['gedung'].unique().tolist()
-            sel_gedung = st.multiselect("Gedung:", gedung_opts, default=gedung_opts)
+            sel_status = st.multiselect("Status:", options["status"], default=options["status"])
+            sel_gedung = st.multiselect("Gedung:", options["gedung"], default=options["gedung"])
+            date_range = st.date_input("Rentang Tanggal:", value=(), format="DD/MM/YYYY")
+
+            c1, c2 = st.columns(2)
+            sort_label = c1.selectbox("Urutkan:", list(SORT_OPTIONS))
+            page_size = c2.selectbox("Baris per halaman:", PAGE_SIZES, index=1)
+
+        # Filter dikirim ke SQL; semua opsi terpilih = tanpa filter
+        filters = {}
+        if set(sel_status) != set(options["status"]): filters["status"] = tuple(sorted(sel_status))
+        if set(sel_gedung) != set(options["gedung"]): filters["gedung"] = tuple(sorted(sel_gedung))
+        if len(date_range) >= 1: filters["date_from"] = date_range[0]
+        if len(date_range) == 2: filters["date_to"] = date_range[1]
+        filters = tuple(sorted(filters.items()))
+
+        n_rows = cached_count(version, filters)
+        n_pages = max(1, -(-n_rows // page_size))
+
+        c1, c2 = st.columns([1, 3])
+        page = c1.number_input("Halaman", min_value=1, max_value=n_pages, value=1, step=1)
+        c2.caption(f"{n_rows} laporan cocok • halaman {page} dari {n_pages}")
+
+        sort, descending = SORT_OPTIONS[sort_label]
+        df_show = cached_page(version, filters, sort, descending, page_size, (page - 1) * page_size)
+
+        # --- Export (semua baris yang cocok dengan filter, bukan hanya halaman ini) ---
+        c1, c2 = st.columns([1, 3])
+        fmt = c1.selectbox("Format export:", export.available_formats(), label_visibility="collapsed")
 
-        # Logic Filter
-        mask = df['status'].isin(sel_status) & df['gedung'].isin(sel_gedung)
-        df_show = df[mask]
+        # Dijalankan saat tombol diklik (bukan di setiap rerun)
+        c2.download_button(f"⬇️ Export {n_rows} laporan ({fmt.upper()})", data=lambda: export_bytes(fmt, filters),
+                           file_name=f"laporan-{datetime.now():%Y%m%d-%H%M}.{fmt}", mime=export.FORMATS[fmt],
+                           on_click="ignore", disabled=not n_rows)
 
         st.dataframe(
             df_show,
@@ -53,4 +125,4 @@ def show():
             }
         )
     else:
-        st.info("Belum ada data laporan. Silakan upload video di menu Scanner.")
\ No newline at end of file
+        st.info("Belum ada data laporan. Silakan upload video di menu Scanner.")
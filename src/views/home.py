@@ -1,4 +1,8 @@
 import streamlit as st
+import html
+from datetime import datetime
+import database as db
+from scoring import STATUS_LAYAK, STATUS_PERLU_PERBAIKAN, STATUS_RUSAK_BERAT
 # Jika styles.py Anda masih digunakan, tetap import. 
 # Namun kode di bawah ini sudah saya buat self-contained (mandiri) agar desainnya konsisten.
 # from styles import render_glass_metric 
@@ -82,10 +86,46 @@ def render_metric_card(label, value, delta, delta_color="#4ade80"):
         </div>
     """, unsafe_allow_html=True)
 
+# --- DATA AKTIVITAS ---
+N_ACTIVITIES = 5
+STATUS_STYLE = {
+    STATUS_RUSAK_BERAT: ("🛑", "#ef4444"),
+    STATUS_PERLU_PERBAIKAN: ("⚠️", "#f59e0b"),
+    STATUS_LAYAK: ("✅", "#4ade80"),
+}
+
+def time_ago(ts):
+    seconds = max(0, (datetime.now() - ts).total_seconds())
+    if seconds < 60: return "baru saja"
+    if seconds < 3600: return f"{int(seconds // 60)} menit lalu"
+    if seconds < 86400: return f"{int(seconds // 3600)} jam lalu"
+    return f"{int(seconds // 86400)} hari lalu"
+
+def recent_activities():
+    df = db.query_laporan(limit=N_ACTIVITIES)
+    activities = []
+    for row in df.itertuples():
+        icon, color = STATUS_STYLE.get(row.status, ("📸", "#29B5E8"))
+        activities.append({
+            # Input pengguna -> di-escape sebelum masuk ke markdown HTML
+            "user": html.escape(str(row.gedung)), "action": "dilaporkan", "item": html.escape(f"{row.ruangan} ({row.status})"),
+            "time": time_ago(row.timestamp.to_pydatetime() if hasattr(row.timestamp, "to_pydatetime") else row.timestamp),
+            "icon": icon, "color": color,
+        })
+    return activities
+
 def show():
     # Load CSS Lokal
     local_css()
 
+    # Semua angka dari tabel ringkasan (beberapa baris), bukan scan laporan_kerusakan
+    total = db.get_ringkasan("total").get("", {"jumlah": 0, "perlu_tindakan": 0, "total_skor": 0})
+    hari_ini = datetime.now().strftime("%Y-%m-%d")
+    today = db.get_ringkasan("hari", hari_ini).get(hari_ini, {"jumlah": 0})
+    per_gedung = db.get_ringkasan("gedung")
+    avg_score = total["total_skor"] / total["jumlah"] if total["jumlah"] else 0
+    layak = db.get_ringkasan("status").get(STATUS_LAYAK, {"jumlah": 0})["jumlah"]
+
     # --- HERO SECTION ---
     st.markdown("""
         <div class="hero-container">
@@ -98,11 +138,11 @@ def show():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        render_metric_card("Total Laporan", "1,248", "↗ +12 Hari ini", "#29B5E8") # Biru
+        render_metric_card("Total Laporan", f"{total['jumlah']:,}", f"↗ +{today['jumlah']} Hari ini", "#29B5E8") # Biru
     with col2:
-        render_metric_card("Fasilitas Rusak", "86", "⚠ Perlu Tindakan", "#ef4444") # Merah
+        render_metric_card("Fasilitas Rusak", f"{total['perlu_tindakan']:,}", "⚠ Perlu Tindakan", "#ef4444") # Merah
     with col3:
-        render_metric_card("Efisiensi Perbaikan", "94%", "⚡ High Performance", "#4ade80") # Hijau
+        render_metric_card("Rata-rata Skor", f"{avg_score:.0f}%", f"✅ {layak:,} Layak Pakai", "#4ade80") # Hijau
 
     st.markdown("---")
 
@@ -113,11 +153,9 @@ def show():
     with c_left:
         st.subheader("⚡ Aktivitas Terbaru")
         
-        activities = [
-            {"user": "Mahasiswa Ilkom", "action": "melaporkan", "item": "Kursi R. W-204", "time": "2 menit lalu", "icon": "📸", "color": "#29B5E8"},
-            {"user": "Staff Sarpras", "action": "memperbaiki", "item": "Meja Lab A", "time": "1 jam lalu", "icon": "🛠️", "color": "#4ade80"},
-            {"user": "System AI", "action": "mendeteksi", "item": "Retakan Dinding", "time": "3 jam lalu", "icon": "🤖", "color": "#f59e0b"},
-        ]
+        activities = recent_activities()
+        if not activities:
+            st.caption("Belum ada laporan. Mulai audit dari menu Scanner AI.")
 
         for act in activities:
             st.markdown(f"""
@@ -139,7 +177,12 @@ def show():
         # Menggunakan st.info native tapi tetap rapi
         st.info("**Scan Kerusakan**\nGunakan menu 'Scanner' untuk deteksi otomatis menggunakan kamera.")
         
-        st.warning("**Prioritas Tinggi**\nCek Gedung JICA Lt. 3 karena ada laporan kebocoran atap.")
+        # Gedung dengan laporan perlu tindakan terbanyak
+        prioritas = max(per_gedung.items(), key=lambda kv: kv[1]["perlu_tindakan"], default=None)
+        if prioritas and prioritas[1]["perlu_tindakan"]:
+            st.warning(f"**Prioritas Tinggi**\nCek Gedung {prioritas[0]}: {prioritas[1]['perlu_tindakan']} laporan perlu tindakan.")
+        else:
+            st.success("**Prioritas Tinggi**\nBelum ada fasilitas yang perlu tindakan.")
 
         st.markdown("""
             <div style="margin-top: 20px; padding: 15px; background: rgba(41, 181, 232, 0.1); border-radius: 10px; border: 1px dashed #29B5E8;">
@@ -1,8 +1,22 @@
 import streamlit as st
 import database as db
 import utils 
+import pipeline
+import keyframe
+import cache
+import cascade
+import spool
+import live
+import audit
+import jobs
+import preview
+import metrics
+import framestore
+import shmring
+from sampler import SamplingPolicy
+from scoring import calculate_score, get_rules
+import json
 import cv2
-import tempfile
 import time
 import os
 from collections import Counter
@@ -10,30 +24,37 @@ from streamlit_webrtc import webrtc_streamer, VideoTransformerBase, WebRtcMode
 
 # --- CONFIG ---
 RECORD_TIME = 15 # Detik
+JOB_POLL_INTERVAL = 1.0 # Detik, jeda polling progress job background
+PREVIEW_MODES = {"Normal": preview.PREVIEW_FPS, "Hemat (1 fps)": 1, "Tanpa preview (tercepat)": 0}
+COUNT_MODES = {"Maksimum per frame": "max", "Lacak objek unik (tracker)": "track"}
 
 # --- LOGIKA PEREKAMAN (TANPA AI - SUPAYA LANCAR) ---
+# Default: hanya frame yang akan dianalisis yang disimpan (sudah diperkecil) di ring buffer memori.
+# `archive_path`: tulis juga video kualitas penuh (mp4v) sebagai arsip.
 class RecorderProcessor(VideoTransformerBase):
-    def __init__(self):
+    def __init__(self, stride=audit.REC_SAMPLE_EVERY, archive_path=None):
         self.frame_count = 0
         self.out = None
-        self.temp_filename = tempfile.NamedTemporaryFile(delete=False, suffix='.mp4').name
+        self.ring = framestore.FrameRing(stride, audit.INFER_WIDTH, metrics=metrics.get_registry())
+        self.temp_filename = archive_path
         self.is_recording = True
         self.start_time = time.time()
 
     def transform(self, frame):
         # Konversi format WebRTC ke OpenCV
         img = frame.to_ndarray(format="bgr24")
-        
-        # Inisialisasi VideoWriter pada frame pertama
-        if self.out is None:
+
+        # Inisialisasi VideoWriter arsip pada frame pertama
+        if self.temp_filename and self.out is None:
             h, w = img.shape[:2]
             # Gunakan 'mp4v' agar kompatibel
             fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            self.out = cv2.VideoWriter(self.temp_filename, fourcc, 20.0, (w, h))
-        
-        # Tulis frame ke file (Sangat Cepat, Tidak Lag)
+            self.out = cv2.VideoWriter(self.temp_filename, fourcc, framestore.RECORD_FPS, (w, h))
+
+        # Simpan frame sample (kecil) + arsip jika aktif (Sangat Cepat, Tidak Lag)
         if self.is_recording:
-            self.out.write(img)
+            self.ring.offer(img)
+            if self.out: self.out.write(img)
             self.frame_count += 1
             
         return img # Kembalikan gambar asli agar user melihat dirinya (Mirror)
@@ -43,38 +64,126 @@ class RecorderProcessor(VideoTransformerBase):
         if self.out:
             self.out.release()
             self.out = None
+            framestore.release_archive(self.temp_filename)
 
-# --- LOGIKA SKOR ---
-def calculate_score(unique_counts):
-    deduction = 0
-    is_critical_failure = False
-    
-    if unique_counts.get("dudukan_rusak", 0) > 0:
-        is_critical_failure = True
-        deduction = 90
-    elif unique_counts.get("tanpa_meja", 0) > 0:
-        is_critical_failure = True
-        deduction = 70
-
-    if not is_critical_failure:
-        sobek_count = unique_counts.get("sobek", 0)
-        deduction += sobek_count * 15
-    
-    deduction = min(100, deduction)
-    final_score = max(0, 100 - deduction)
-    
-    if is_critical_failure or final_score < 50:
-        status = "Rusak Berat 🛑"
-    elif final_score < 85:
-        status = "Perlu Perbaikan ⚠️"
-    else:
-        status = "Layak Pakai ✅"
-    
-    return final_score, deduction, status
+# --- LOGIKA LIVE (AI BERJALAN SELAMA MEREKAM) ---
+# transform() hanya mengecilkan frame & memasukkannya ke antrian "frame terbaru menang";
+# inference berjalan di thread worker sehingga callback WebRTC tidak pernah menunggu API.
+class LiveProcessor(VideoTransformerBase):
+    def __init__(self, detect_fn, workers=1, selector=None, draw_overlay=True):
+        self.analyzer = live.LiveAnalyzer(detect_fn, workers=workers, selector=selector)
+        self.draw_overlay = draw_overlay
+        self.is_recording = False
+        self.frame_count = 0
+
+    def start_recording(self):
+        self.analyzer.start()
+        self.is_recording = True
+
+    def transform(self, frame):
+        img = frame.to_ndarray(format="bgr24")
+
+        if self.is_recording:
+            h, w = img.shape[:2]
+            self.analyzer.submit(cv2.resize(img, (audit.INFER_WIDTH, int(h * (audit.INFER_WIDTH / w)))))
+            self.frame_count += 1
+
+        # Gambar box hasil analisis terakhir (diskalakan dari frame kecil ke frame asli)
+        if self.draw_overlay:
+            boxes, shape = self.analyzer.overlay()
+            if boxes and shape:
+                sx = img.shape[1] / shape[1]
+                sy = img.shape[0] / shape[0]
+                utils.draw_predictions(img, [
+                    {**b, "x": b["x"] * sx, "y": b["y"] * sy, "width": b["width"] * sx, "height": b["height"] * sy}
+                    for b in boxes
+                ])
+        return img
+
+    def stop_recording(self, timeout=10):
+        self.is_recording = False
+        return self.analyzer.finish(timeout)
+
+# --- PENGATURAN ANALISIS ---
+def analysis_settings():
+    cfg = {}
+    with st.expander("⚙️ Pengaturan Analisis", expanded=False):
+        cfg["max_inflight"] = st.slider("Request AI paralel", 1, 16, pipeline.DEFAULT_MAX_INFLIGHT,
+                                        help="Jumlah frame yang dikirim ke API bersamaan. 1 = berurutan (seperti sebelumnya).")
+        sampling_mode = st.selectbox("Sampling frame", ["Default", "Tiap N frame", "Tiap T detik", "Maksimal K frame", "Adaptif (anggaran waktu / API)"])
+        cfg["sampling_policy"] = None # Default: REC_SAMPLE_EVERY / UPLOAD_SAMPLE_EVERY
+        if sampling_mode == "Tiap N frame":
+            cfg["sampling_policy"] = SamplingPolicy.every_n(st.number_input("N (frame)", 1, 600, audit.UPLOAD_SAMPLE_EVERY))
+        elif sampling_mode == "Tiap T detik":
+            cfg["sampling_policy"] = SamplingPolicy.every(st.number_input("T (detik)", 0.1, 60.0, 1.0, step=0.5))
+        elif sampling_mode == "Maksimal K frame":
+            cfg["sampling_policy"] = SamplingPolicy.budget(st.number_input("K (frame per video)", 1, 1000, 30))
+        elif sampling_mode == "Adaptif (anggaran waktu / API)":
+            # Stride dihitung ulang dari latensi API yang terukur; frame dirapatkan di bagian yang deteksinya berubah
+            target = st.number_input("Target waktu analisis (detik, 0 = tanpa batas)", 0, 3600, 60)
+            calls = st.number_input("Maksimal panggilan API (0 = tanpa batas)", 0, 10000, 0)
+            if target or calls:
+                cfg["sampling_policy"] = SamplingPolicy.adaptive(float(target) if target else None, int(calls) if calls else None)
+            else:
+                st.caption("Isi salah satu anggaran; tanpa anggaran dipakai sampling default.")
+
+        cfg["keyframe"] = st.checkbox("Lewati frame yang mirip (hemat panggilan API)", value=False,
+                                      help="Frame sample yang hampir sama dengan frame terakhir yang dikirim tidak dianalisis ulang.")
+        cfg["keyframe_threshold"] = keyframe.DEFAULT_THRESHOLD
+        if cfg["keyframe"]:
+            cfg["keyframe_threshold"] = st.slider("Ambang perubahan frame", 1.0, 40.0, keyframe.DEFAULT_THRESHOLD, step=0.5)
+        count_label = st.selectbox("Hitung kerusakan", list(COUNT_MODES),
+                                   help="Lacak objek: box dicocokkan antar frame sehingga tiap kerusakan fisik dihitung sekali; "
+                                        "akurat walau frame yang dianalisis lebih jarang.")
+        cfg["count_mode"] = COUNT_MODES[count_label]
+        cfg["preview_fps"] = PREVIEW_MODES[st.selectbox("Preview saat analisis", list(PREVIEW_MODES),
+                                                        help="Batasi refresh gambar ke browser; pilih tanpa preview jika koneksi lambat.")]
+        cfg["record_archive"] = st.checkbox("Simpan arsip video penuh saat rekam", value=False,
+                                            help="Tanpa arsip, hanya frame yang dianalisis yang disimpan (kecil, tanpa encode/decode video).")
+        cfg["cascade"] = st.checkbox("Cek ulang kerusakan kecil di resolusi asli (cascade)", value=False,
+                                     help="Deteksi kecil / ragu dianalisis ulang dari potongan frame asli (mode upload). Menambah panggilan API per frame.")
+        cfg["live_overlay"] = st.checkbox("Tampilkan box deteksi saat Live AI", value=True)
+        cfg["background"] = st.checkbox("Proses di background (job)", value=False,
+                                         help="Analisis berjalan di proses worker; halaman hanya memantau progress.")
+        cfg["use_cache"] = st.checkbox("Gunakan cache hasil analisis", value=True,
+                                       help="Video/frame yang pernah dianalisis diambil dari cache tanpa memanggil API.")
+        if cfg["use_cache"]:
+            cs = cache.get_cache().stats
+            st.caption(f"Cache sesi ini — video hit/miss: {cs['video_hit']}/{cs['video_miss']}, frame hit/miss: {cs['frame_hit']}/{cs['frame_miss']}")
+    return cfg
+
+# --- PROGRESS JOB BACKGROUND ---
+# Tampilkan progress job; selama masih berjalan halaman di-rerun berkala (polling).
+# Mengembalikan dict job jika sudah selesai/gagal.
+def poll_job(job_id):
+    db.fail_orphaned_jobs()  # Worker / server yang memegang job sudah mati -> job gagal, bukan polling selamanya
+    job = db.get_job(job_id)
+    if job is None or job["status"] in ("done", "failed"):
+        return job
+
+    c_vid, c_res = st.columns([1.8, 1])
+    with c_vid:
+        if job["preview_path"] and os.path.exists(job["preview_path"]):
+            st.image(job["preview_path"], width='stretch')
+    with c_res:
+        label = "⏳ Menunggu worker..." if job["status"] == "queued" else f"⚙️ Menganalisis... {int((job['progress'] or 0) * 100)}%"
+        st.progress(job["progress"] or 0.0, text=label)
+        st.caption(f"Job #{job_id} berjalan di background — aman untuk berpindah halaman.")
+        if job["result"]:
+            st.json(json.loads(job["result"]).get("defects", {}))
+
+    time.sleep(JOB_POLL_INTERVAL)
+    st.rerun()
 
 # --- UI UTAMA ---
 def show():
-    db.init_db()
+    # Client inference dibuat di sini (sekali per proses), bukan saat aplikasi dibuka
+    try:
+        utils.get_backend()
+    except utils.BackendConfigError as e:
+        st.error(str(e))
+        st.stop()
+    spool.get_manager().cleanup() # Buang video sementara yang sudah kadaluarsa / melebihi kuota
     st.title("📹 AI Facility Audit")
     
     with st.container():
@@ -82,17 +191,22 @@ def show():
         lokasi_gedung = c1.selectbox("Gedung", ["FPMIPA A", "FPMIPA B", "FPMIPA C"])
         lokasi_ruang = c2.text_input("Ruangan", placeholder="Contoh: S-304")
 
+    cfg = analysis_settings()
+
     st.divider()
-    mode = st.radio("Metode Input:", ["Kamera HP (Rekam -> Proses)", "Upload Video File"], horizontal=True)
+    mode = st.radio("Metode Input:", ["Kamera HP (Rekam -> Proses)", "Kamera HP (Live AI)", "Upload Video File"], horizontal=True)
 
     # ==========================================
     # MODE 1: REKAM DULU -> BARU PROSES
+    # (Live AI: analisis berjalan selama merekam, fase PROCESSING dilewati)
     # ==========================================
-    if mode == "Kamera HP (Rekam -> Proses)":
+    if mode in ["Kamera HP (Rekam -> Proses)", "Kamera HP (Live AI)"]:
+        is_live = (mode == "Kamera HP (Live AI)")
         
         # State Management
         if "phase" not in st.session_state: st.session_state.phase = "IDLE" # IDLE, RECORDING, PROCESSING, DONE
         if "recorded_file" not in st.session_state: st.session_state.recorded_file = None
+        if "recorded_frames" not in st.session_state: st.session_state.recorded_frames = None
         if "start_rec_time" not in st.session_state: st.session_state.start_rec_time = 0
 
         # 1. FASE IDLE / RECORDING
@@ -101,9 +215,22 @@ def show():
             
             with col_cam:
                 # WebRTC Streamer
+                if is_live:
+                    def factory():
+                        selector = keyframe.KeyframeSelector(cfg["keyframe_threshold"]) if cfg["keyframe"] else None
+                        return LiveProcessor(audit.make_detect_fn(cfg, metrics.get_registry()), cfg["max_inflight"], selector, cfg["live_overlay"])
+                else:
+                    # Stride rekam dihitung dari FPS acuan rekaman, sama seperti saat video arsip dianalisis
+                    stride = audit.resolve_policy(cfg, audit.REC_SAMPLE_EVERY).stride(framestore.RECORD_FPS, int(RECORD_TIME * framestore.RECORD_FPS))
+                    def factory():
+                        archive = None
+                        if cfg["record_archive"]:
+                            archive = framestore.new_archive_path()
+                        return RecorderProcessor(stride, archive)
+
                 ctx = webrtc_streamer(
-                    key="scanner-recorder", 
-                    video_processor_factory=RecorderProcessor,
+                    key="scanner-live" if is_live else "scanner-recorder", 
+                    video_processor_factory=factory,
                     mode=WebRtcMode.SENDRECV,
                     rtc_configuration={"iceServers": [{"urls": ["stun:stun.l.google.com:19302"]}]},
                     media_stream_constraints={
@@ -119,7 +246,10 @@ def show():
 
             with col_info:
                 st.markdown("##### 📸 Instruksi")
-                st.info(f"1. Arahkan kamera.\n2. Klik **MULAI REKAM**.\n3. Tunggu {RECORD_TIME} detik.\n4. AI akan memproses video setelah selesai.")
+                if is_live:
+                    st.info(f"1. Arahkan kamera.\n2. Klik **MULAI REKAM**.\n3. AI menganalisis selama {RECORD_TIME} detik perekaman.\n4. Hasil langsung tersimpan saat selesai.")
+                else:
+                    st.info(f"1. Arahkan kamera.\n2. Klik **MULAI REKAM**.\n3. Tunggu {RECORD_TIME} detik.\n4. AI akan memproses video setelah selesai.")
                 
                 # Logic Tombol Start
                 if st.session_state.phase == "IDLE":
@@ -137,12 +267,41 @@ def show():
                     remaining = RECORD_TIME - elapsed
                     
                     st.progress(min(elapsed / RECORD_TIME, 1.0), text=f"🎥 Merekam... {int(remaining)}s")
+
+                    # Live AI: mulai kirim frame ke worker begitu processor siap
+                    proc = ctx.video_transformer if is_live else None
+                    if proc and not proc.is_recording and elapsed < RECORD_TIME:
+                        proc.start_recording()
+                    if proc:
+                        st.json(dict(proc.analyzer.snapshot()))
                     
                     # Cek Waktu Habis
-                    if elapsed >= RECORD_TIME:
-                        # Ambil file dari processor
+                    if elapsed >= RECORD_TIME and is_live:
+                        # Hasil sudah terkumpul selama merekam, tinggal menunggu frame terakhir
+                        video_defects = proc.stop_recording() if proc else Counter()
+                        # Tanpa frame yang berhasil dianalisis jangan simpan laporan "Layak Pakai" untuk ruangan yang tidak diaudit
+                        problem = proc.analyzer.incomplete_reason() if proc else "Kamera belum aktif"
+                        if problem:
+                            st.error(f"⚠️ {problem}. Laporan tidak disimpan, silakan rekam ulang.")
+                            st.session_state.phase = "IDLE"
+                            st.stop()
+                        rules = get_rules()
+                        score, deduc, stat = calculate_score(video_defects, rules)
+                        confidences = proc.analyzer.confidence_snapshot()
+                        with metrics.get_registry().time("db_write"):
+                            db.create_laporan(lokasi_gedung, lokasi_ruang, str(dict(video_defects)), score, stat, "Live-AI Audit",
+                                              detections=video_defects, confidences=confidences, rule_version=rules.version)
+
+                        st.session_state.final_results = video_defects
+                        st.session_state.api_saved = proc.analyzer.selector.saved if proc.analyzer.selector else None
+                        st.session_state.cascade = None
+                        st.session_state.phase = "DONE"
+                        st.rerun()
+                    elif elapsed >= RECORD_TIME:
+                        # Ambil frame sample (dan path arsip) dari processor
                         if ctx.video_transformer:
                             ctx.video_transformer.stop_recording()
+                            st.session_state.recorded_frames = ctx.video_transformer.ring
                             st.session_state.recorded_file = ctx.video_transformer.temp_filename
                         
                         st.session_state.phase = "PROCESSING"
@@ -154,12 +313,49 @@ def show():
         # 2. FASE PROCESSING (AI BEKERJA DI SINI)
         elif st.session_state.phase == "PROCESSING":
             st.info("⚙️ Video tersimpan! Sekarang sedang memindai kerusakan (AI Processing)...")
+
+            # Background: job sudah berjalan -> cukup pantau progress
+            if st.session_state.get("rec_job_id"):
+                job = poll_job(st.session_state.rec_job_id)
+                st.session_state.rec_job_id = None
+                if job is None or job["status"] == "failed":
+                    st.error(f"Analisis gagal: {job['error'] if job else 'job tidak ditemukan'}")
+                    st.session_state.phase = "IDLE"
+                    st.stop()
+
+                result = json.loads(job["result"])
+                st.session_state.final_results = Counter(result["defects"])
+                st.session_state.api_saved = result.get("api_saved")
+                st.session_state.cascade = result.get("cascade")
+                st.session_state.phase = "DONE"
+                st.rerun()
             
-            video_path = st.session_state.recorded_file
-            if not video_path or not os.path.exists(video_path):
-                st.error("Gagal menyimpan video. Coba lagi.")
+            ring = st.session_state.recorded_frames
+            if ring is None or not ring.frames:
+                st.error("Gagal menyimpan rekaman. Coba lagi.")
                 st.session_state.phase = "IDLE"
                 st.stop()
+            if ring.dropped:
+                st.warning(f"Buffer rekaman penuh: {ring.dropped} frame awal tidak ikut dianalisis.")
+
+            if cfg["background"]:
+                # Worker di proses lain -> frame sample diserahkan lewat shared memory (tanpa pickle / file),
+                # fallback ke file frame ringkas jika shared memory tidak tersedia.
+                # Segmen menjadi milik job: worker menghapusnya setelah selesai (lihat jobs.run_job), sesi ini hanya melepas mapping.
+                shm = None
+                try:
+                    shm = shmring.publish_frames(ring.snapshot(), ring.total_frames)
+                    source, cleanup = shm.handle, False
+                except OSError as e:
+                    print(f"⚠️ Shared memory tidak tersedia, pakai file frame: {e}")
+                    source, cleanup = ring.save(spool.get_manager().new_path(framestore.FRAME_FILE_EXT, kind="rec")), True
+                st.session_state.rec_job_id = jobs.submit_audit(source, lokasi_gedung, lokasi_ruang, cfg, audit.REC_SAMPLE_EVERY,
+                                                                "Live-Rec Audit", cleanup=cleanup)
+                if shm is not None:
+                    if st.session_state.rec_job_id: shm.detach()
+                    else: shm.unlink()  # Job tidak terbuat -> tidak ada worker yang akan menghapus segmen
+                st.session_state.recorded_frames = None
+                st.rerun()
 
             # UI Progress
             c_vid, c_res = st.columns([1.8, 1])
@@ -169,49 +365,26 @@ def show():
                 txt_stat = st.empty()
                 live_json = st.empty()
 
-            # Loop Processing (Sama seperti Upload Video)
-            vf = cv2.VideoCapture(video_path)
-            total_frames = int(vf.get(cv2.CAP_PROP_FRAME_COUNT))
-            video_defects = Counter()
-            curr = 0
-            
-            while vf.isOpened():
-                ret, frame = vf.read()
-                if not ret: break
-                curr += 1
-                
-                # Update UI
-                if curr % 5 == 0: 
-                    prog_bar.progress(min(curr/total_frames, 1.0))
-                    txt_stat.caption(f"Analyzing Frame: {curr}/{total_frames}")
-                
-                # Skip Frame (Biar agak cepat, tapi tetap detil)
-                if curr % 15 != 0: continue 
-
-                # Resize & AI
-                h, w = frame.shape[:2]
-                new_h = int(h * (480 / w))
-                frame_small = cv2.resize(frame, (480, new_h))
-                
-                annotated, preds = utils.run_ai_workflow(frame_small)
-                
-                # Aggregasi
-                frame_c = Counter([p['class'] for p in preds])
-                for k, v in frame_c.items():
-                    if v > video_defects[k]: video_defects[k] = v
-                
-                # Tampilkan Bounding Box
-                stframe.image(cv2.cvtColor(annotated, cv2.COLOR_BGR2RGB), width='stretch')
-                live_json.json(dict(video_defects))
+            on_frame = preview.PreviewRenderer(stframe, prog_bar, txt_stat, live_json, max_fps=cfg["preview_fps"])
 
-            vf.release()
+            # Loop Processing (Sama seperti Upload Video)
+            # Frame sample sudah ada di memori -> langsung inference, tanpa decode video
+            analysis = audit.analyze_video(ring.source(), cfg, audit.REC_SAMPLE_EVERY, on_frame=on_frame, metrics=metrics.get_registry())
+            video_defects = analysis["defects"]
+            st.session_state.recorded_frames = None
             
             # Auto Save
-            score, deduc, stat = calculate_score(video_defects)
-            db.create_laporan(lokasi_gedung, lokasi_ruang, str(dict(video_defects)), score, stat, "Live-Rec Audit")
+            rules = get_rules()
+            score, deduc, stat = calculate_score(video_defects, rules)
+            with metrics.get_registry().time("db_write"):
+                db.create_laporan(lokasi_gedung, lokasi_ruang, str(dict(video_defects)), score, stat, "Live-Rec Audit",
+                                 detections=video_defects, confidences=analysis["confidences"],
+                                 sampling_stride=analysis["stride"], api_calls=analysis["api_calls"], rule_version=rules.version)
             
             # Pindah ke Fase Selesai
             st.session_state.final_results = video_defects
+            st.session_state.api_saved = analysis["api_saved"]
+            st.session_state.cascade = analysis["cascade"]
             st.session_state.phase = "DONE"
             st.rerun()
 
@@ -229,10 +402,17 @@ def show():
             c3.metric("Status", stat)
             
             st.json(dict(res))
+            if st.session_state.get("api_saved") is not None:
+                st.caption(f"⚡ Panggilan API dihemat oleh seleksi keyframe: {st.session_state.api_saved}")
+            if st.session_state.get("cascade"):
+                st.caption(f"🔍 Cascade: {cascade.describe(st.session_state.cascade)}")
+            if st.session_state.recorded_file:
+                st.caption(f"🎞️ Arsip rekaman: {st.session_state.recorded_file}")
             
             if st.button("🔄 Audit Ruangan Lain"):
                 st.session_state.phase = "IDLE"
                 st.session_state.recorded_file = None
+                st.session_state.recorded_frames = None
                 st.rerun()
 
     # ==========================================
@@ -242,13 +422,17 @@ def show():
         uploaded_video = st.file_uploader("Pilih video (.mp4)", type=["mp4", "avi"])
         
         # State Management
-        if "last_video_name" not in st.session_state: st.session_state.last_video_name = None
+        if "last_video_key" not in st.session_state: st.session_state.last_video_key = None
+        if "upload_hashes" not in st.session_state: st.session_state.upload_hashes = {}
         if "video_results" not in st.session_state: st.session_state.video_results = None
         if "upload_success" not in st.session_state: st.session_state.upload_success = False
 
         if uploaded_video:
-            # Cek apakah video ini BARU?
-            is_new_video = (st.session_state.last_video_name != uploaded_video.name)
+            # Cek apakah video ini BARU? (berdasarkan isi file + setting analisis, bukan nama file)
+            if uploaded_video.file_id not in st.session_state.upload_hashes:
+                st.session_state.upload_hashes[uploaded_video.file_id] = cache.hash_content(uploaded_video)
+            video_key = cache.video_key(st.session_state.upload_hashes[uploaded_video.file_id], audit.video_settings(cfg, audit.UPLOAD_SAMPLE_EVERY))
+            is_new_video = (st.session_state.last_video_key != video_key)
             
             if is_new_video:
                 # --- BLOK PROSES (Hanya jalan 1x per file) ---
@@ -256,9 +440,53 @@ def show():
                     st.error("⚠️ Mohon isi Nama Ruangan di atas terlebih dahulu!")
                     st.stop()
 
-                tfile = tempfile.NamedTemporaryFile(delete=False) 
-                tfile.write(uploaded_video.read())
-                vf = cv2.VideoCapture(tfile.name)
+                # Video ini sedang dianalisis di background -> pantau progress
+                upload_job = st.session_state.get("upload_job")
+                if upload_job and upload_job["key"] == video_key:
+                    st.write("---")
+                    job = poll_job(upload_job["id"])
+                    st.session_state.upload_job = None
+                    if job is None or job["status"] == "failed":
+                        st.error(f"Analisis gagal: {job['error'] if job else 'job tidak ditemukan'}")
+                        st.stop()
+
+                    result = json.loads(job["result"])
+                    st.session_state.last_video_key = video_key
+                    st.session_state.video_results = Counter(result["defects"])
+                    st.session_state.api_saved = result.get("api_saved")
+                    st.session_state.cascade = result.get("cascade")
+                    st.session_state.upload_success = True
+                    st.rerun()
+
+                cached = cache.get_cache().get_video(video_key) if cfg["use_cache"] else None
+                if cached is not None:
+                    # Video yang sama pernah dianalisis -> langsung pakai hasilnya, tanpa panggilan API
+                    rules = get_rules()
+                    final_score, deduction, status = calculate_score(cached, rules)
+                    db.create_laporan(lokasi_gedung, lokasi_ruang, str(cached), final_score, status, f"Auto-Video: {uploaded_video.name}", detections=cached, api_calls=0,
+                                      rule_version=rules.version)
+
+                    st.session_state.last_video_key = video_key
+                    st.session_state.video_results = Counter(cached)
+                    st.session_state.api_saved = None
+                    st.session_state.cascade = None
+                    st.session_state.upload_success = True
+                    st.rerun()
+
+                # Salin ke disk per chunk; container streamable sudah bisa di-decode sebelum penulisan selesai
+                suffix = os.path.splitext(uploaded_video.name)[1] or ".mp4"
+                tfile = spool.spool_upload(uploaded_video, suffix=suffix)
+
+                if cfg["background"]:
+                    # Worker di proses lain membaca file dari disk -> tunggu penulisan selesai
+                    video_path = tfile.wait()
+                    job_id = jobs.submit_audit(video_path, lokasi_gedung, lokasi_ruang, cfg, audit.UPLOAD_SAMPLE_EVERY,
+                                               f"Auto-Video: {uploaded_video.name}", video_key=video_key if cfg["use_cache"] else None,
+                                               checkpoint_key=video_key)
+                    st.session_state.upload_job = {"id": job_id, "key": video_key}
+                    st.rerun()
+
+                tfile.wait_ready()
                 
                 st.write("---")
                 col_video, col_prog = st.columns([1.8, 1])
@@ -266,46 +494,46 @@ def show():
                 with col_prog:
                     st.info("⚙️ Menganalisis Video & Auto-Save...")
                     prog_bar = st.progress(0)
+                    # Analisis sebelumnya terputus (rerun / koneksi / API gagal) -> lanjutkan dari checkpoint
+                    resume = db.get_checkpoint(video_key)
+                    if resume:
+                        st.caption(f"♻️ Melanjutkan dari frame {resume['last_frame']} ({resume['frames']} frame tersimpan)")
                 
                 with col_video:
                     stframe = st.empty()
 
-                video_defects = Counter()
-                total_frames = int(vf.get(cv2.CAP_PROP_FRAME_COUNT))
-                curr = 0
-                
-                while vf.isOpened():
-                    ret, frame = vf.read()
-                    if not ret: break
-                    curr += 1
-                    
-                    if curr % 5 == 0: prog_bar.progress(min(curr/total_frames, 1.0))
-                    if curr % 30 != 0: continue # Skip frame
-                    
-                    h, w = frame.shape[:2]
-                    new_h = int(h * (480 / w))
-                    frame_small = cv2.resize(frame, (480, new_h))
-                    
-                    annotated, preds = utils.run_ai_workflow(frame_small)
-                    
-                    # Aggregation
-                    frame_c = Counter([p['class'] for p in preds])
-                    for k, v in frame_c.items():
-                        if v > video_defects[k]: video_defects[k] = v
-                    
-                    stframe.image(cv2.cvtColor(annotated, cv2.COLOR_BGR2RGB), width='stretch')
+                on_frame = preview.PreviewRenderer(stframe, prog_bar, max_fps=cfg["preview_fps"])
 
-                vf.release()
+                try:
+                    analysis = audit.analyze_video(tfile.path, cfg, audit.UPLOAD_SAMPLE_EVERY,
+                                                   growing=tfile if tfile.streamable else None, on_frame=on_frame,
+                                                   metrics=metrics.get_registry(), checkpoint_key=video_key)
+                except audit.AuditIncomplete as e:
+                    # Laporan tidak disimpan; checkpoint tetap ada -> audit berikutnya melanjutkan & mencoba ulang frame gagal
+                    tfile.release()
+                    st.error(f"⚠️ {e}")
+                    st.stop()
+                video_defects = analysis["defects"]
+                tfile.release()
                 
                 # --- AUTO SAVE LOGIC (Di sini kuncinya) ---
-                final_score, deduction, status = calculate_score(video_defects)
+                rules = get_rules()
+                final_score, deduction, status = calculate_score(video_defects, rules)
                 
                 # 1. Simpan DB
-                db.create_laporan(lokasi_gedung, lokasi_ruang, str(dict(video_defects)), final_score, status, f"Auto-Video: {uploaded_video.name}")
+                with metrics.get_registry().time("db_write"):
+                    laporan_id = db.create_laporan(lokasi_gedung, lokasi_ruang, str(dict(video_defects)), final_score, status, f"Auto-Video: {uploaded_video.name}",
+                                                   detections=video_defects, confidences=analysis["confidences"],
+                                                   sampling_stride=analysis["stride"], api_calls=analysis["api_calls"], rule_version=rules.version)
+                if laporan_id: db.clear_checkpoint(video_key)
+                
+                if cfg["use_cache"]: cache.get_cache().put_video(video_key, dict(video_defects))
                 
                 # 2. Update Session State (Agar tidak looping)
-                st.session_state.last_video_name = uploaded_video.name
+                st.session_state.last_video_key = video_key
                 st.session_state.video_results = video_defects
+                st.session_state.api_saved = analysis["api_saved"]
+                st.session_state.cascade = analysis["cascade"]
                 st.session_state.upload_success = True
                 
                 # 3. Rerun untuk refresh UI ke mode "Tampil Hasil"
@@ -313,7 +541,7 @@ def show():
 
             else:
                 # --- BLOK TAMPIL HASIL (Statik) ---
-                # Masuk sini jika nama video sama dengan yang di memori
+                # Masuk sini jika isi video sama dengan yang di memori
                 
                 if st.session_state.upload_success:
                     st.success(f"✅ Analisis Selesai. Data Kursi di {lokasi_ruang} Tersimpan Otomatis!")
@@ -330,4 +558,8 @@ def show():
                 c3.metric("Status", stat)
                 
                 st.json(dict(res))
+                if st.session_state.get("api_saved") is not None:
+                    st.caption(f"⚡ Panggilan API dihemat oleh seleksi keyframe: {st.session_state.api_saved}")
+                if st.session_state.get("cascade"):
+                    st.caption(f"🔍 Cascade: {cascade.describe(st.session_state.cascade)}")
                 st.caption("ℹ️ Untuk memproses video lain, silakan klik 'Browse files' dan pilih file baru.")
\ No newline at end of file
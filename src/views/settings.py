@@ -0,0 +1,104 @@
+import streamlit as st
+import database as db
+import metrics
+import spool
+import scoring
+import json
+import os
+import pandas as pd
+from metrics import Metrics
+
+# --- KONFIGURASI METRIK ---
+METRICS_PORT = 9108
+METRICS_EXPORT_PATH = os.path.join(spool.SPOOL_DIR, "smartreport.prom")
+N_JOBS = 20
+
+# Gabungan metrik proses ini (analisis inline / live) dan seluruh job background dari DB
+def collect_metrics(include_process=True, include_jobs=True):
+    m = Metrics()
+    if include_process: m.merge(metrics.get_registry())
+    if include_jobs:
+        for snap in db.get_job_metrics():
+            m.merge(json.loads(snap))
+    return m
+
+def job_rows(limit=N_JOBS):
+    rows = []
+    for job in db.get_recent_jobs(limit):
+        m = Metrics.from_snapshot(json.loads(job["metrics"])) if job["metrics"] else Metrics()
+        frame = m.histograms.get("frame")
+        rows.append({
+            "job": job["id"], "status": job["status"], "waktu": job["created_at"],
+            "frame": m.counters.get("frames", 0), "fps": round(m.fps(), 2),
+            "api_calls": m.counters.get("api_calls", 0),
+            "error": m.counters.get("api_errors", 0) + m.counters.get("workflow_errors", 0) + m.counters.get("job_errors", 0),
+            "p95_frame_ms": round(frame.quantile(0.95) * 1000, 1) if frame else None,
+        })
+    return pd.DataFrame(rows)
+
+def show():
+    st.title("⚙️ Pengaturan")
+
+    # --- METRIK PIPELINE ---
+    st.subheader("📊 Metrik Pipeline Audit")
+    scope = st.radio("Sumber", ["Semua", "Proses ini (inline / live)", "Job background"], horizontal=True)
+    m = collect_metrics(include_process=scope != "Job background", include_jobs=scope != "Proses ini (inline / live)")
+
+    c = m.counters
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Frame dianalisis", f"{int(c.get('frames', 0)):,}")
+    c2.metric("Frame / detik", f"{m.fps():.1f}")
+    c3.metric("Panggilan API", f"{int(c.get('api_calls', 0)):,}")
+    c4.metric("Error", int(c.get("api_errors", 0) + c.get("workflow_errors", 0) + c.get("job_errors", 0)))
+
+    stages = m.stage_table()
+    if stages:
+        st.dataframe(
+            pd.DataFrame(stages), width='stretch', hide_index=True,
+            column_config={
+                "rata2_ms": st.column_config.NumberColumn("Rata-rata (ms)", format="%.1f"),
+                "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+                "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+                "total_s": st.column_config.NumberColumn("Total (s)", format="%.1f"),
+            },
+        )
+    else:
+        st.info("Belum ada metrik. Jalankan audit dari menu Scanner AI.")
+
+    with st.expander("🧾 Metrik per job", expanded=False):
+        df = job_rows()
+        if df.empty: st.caption("Belum ada job background.")
+        else: st.dataframe(df, width='stretch', hide_index=True)
+
+    # --- EXPORT PROMETHEUS ---
+    st.subheader("📤 Export Prometheus")
+    text = m.to_prometheus()
+    c1, c2 = st.columns(2)
+    c1.download_button("Download .prom", text, file_name="smartreport.prom", mime="text/plain")
+    if c2.button("Simpan ke file"):
+        st.success(f"Tersimpan: {collect_metrics().export(METRICS_EXPORT_PATH)}")
+
+    if st.toggle(f"Endpoint lokal /metrics (port {METRICS_PORT})", value=False,
+                 help="Server HTTP kecil di proses ini untuk di-scrape Prometheus; tetap aktif sampai aplikasi berhenti."):
+        try:
+            metrics.start_http_server(collect_metrics, METRICS_PORT)
+            st.caption(f"Aktif: http://127.0.0.1:{METRICS_PORT}/metrics")
+        except OSError as e:
+            st.error(f"Gagal membuka port {METRICS_PORT}: {e}")
+
+    # --- ATURAN SKOR ---
+    st.subheader("🧮 Aturan Skor")
+    try:
+        versions, active = scoring.list_rules()
+    except (OSError, ValueError, KeyError) as e:
+        st.error(f"File aturan skor tidak valid ({scoring.RULES_PATH}): {e}")
+        return
+    st.dataframe(pd.DataFrame([{**r.to_dict(), "aktif": r.version == active} for r in versions]), width='stretch', hide_index=True)
+    per_version = db.count_by_rule_version()
+    outdated = sum(n for v, n in per_version.items() if v != active)
+    st.caption("Laporan per versi aturan: " + ", ".join(f"{'lama' if v is None else f'v{v}'}: {n}" for v, n in per_version.items()))
+
+    if st.button(f"Hitung ulang {outdated} laporan dengan aturan v{active}", disabled=not outdated):
+        with st.spinner("Menghitung ulang skor..."):
+            result = db.rescore_laporan(scoring.get_rules(active))
+        st.success(f"{result['rows']} laporan diproses, {result['changed']} skor/status berubah.")
@@ -0,0 +1,21 @@
+import os
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+# Database & cache test terpisah dari data aplikasi; harus di-set sebelum modul database/cache di-import
+TEST_DIR = tempfile.mkdtemp(prefix="smartreport-test-")
+os.environ.setdefault("SMARTREPORT_DB_PATH", os.path.join(TEST_DIR, "test.db"))
+os.environ.setdefault("SMARTREPORT_CACHE_PATH", os.path.join(TEST_DIR, "cache.db"))
+
+import synth_video
+
+# Video sintetis kecil: 100 frame, 10 fps
+@pytest.fixture(scope="session")
+def video(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("video") / "100f.mp4")
+    return synth_video.make_video(path, 160, 120, 10, fps=10)
@@ -0,0 +1,70 @@
+import time
+import pytest
+import audit
+import backends
+import database as db
+import utils
+from sampler import SamplingPolicy
+
+# Backend palsu: satu box per frame (`varying`: hanya di panggilan ganjil); `fail_after` panggilan berikutnya error (API mati)
+class FlakyBackend(backends.InferenceBackend):
+    name = "flaky"
+
+    def __init__(self, fail_after=None, latency=0, varying=False):
+        self.calls = 0
+        self.fail_after = fail_after
+        self.latency = latency
+        self.varying = varying
+
+    def infer(self, frame):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise ConnectionError("API down")
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.varying and not self.calls % 2:
+            return [{"predictions": []}]
+        return [{"predictions": [{"class": "sobek", "confidence": 0.9, "x": 50, "y": 50, "width": 20, "height": 20}]}]
+
+def settings(**overrides):
+    return {**audit.DEFAULT_SETTINGS, "max_inflight": 1, "use_cache": False,
+            "sampling_policy": SamplingPolicy.every_n(10), **overrides}
+
+@pytest.fixture
+def backend():
+    def use(**kwargs):
+        b = FlakyBackend(**kwargs)
+        utils.set_backend(b)
+        return b
+    yield use
+    utils.set_backend(None)
+
+def test_resume_after_outage_retries_failed_frames(video, backend):
+    db.init_db()
+    key = "test-outage"
+    db.clear_checkpoint(key)
+
+    down = backend(fail_after=2)
+    with pytest.raises(audit.AuditIncomplete):
+        audit.analyze_video(video, settings(), 10, checkpoint_key=key)
+    assert down.calls == 2
+    assert db.get_checkpoint(key)["frames"] == 2  # Frame gagal tidak di-checkpoint
+
+    up = backend()
+    result = audit.analyze_video(video, settings(), 10, checkpoint_key=key)
+    assert result["resumed"] == 2
+    assert up.calls == 8  # Semua frame yang gagal dicoba lagi
+    assert result["sampled"] == 10 and result["failed"] == 0
+    assert dict(result["defects"]) == {"sobek": 1}
+
+@pytest.mark.parametrize("cascade", [False, True])
+def test_failure_without_checkpoint_is_reported(video, backend, cascade):
+    backend(fail_after=3)
+    result = audit.analyze_video(video, settings(cascade=cascade), 10)
+    assert result["failed"] == 7 and result["sampled"] == 3
+
+# Deteksi berubah tiap frame -> StrideController merapatkan stride saat frame lain sudah in-flight / di-prefetch
+def test_max_calls_not_exceeded_by_inflight_frames(video, backend):
+    b = backend(latency=0.02, varying=True)
+    result = audit.analyze_video(video, settings(max_inflight=4, sampling_policy=SamplingPolicy.adaptive(max_calls=10)), 10)
+    assert b.calls <= 10 and result["api_calls"] <= 10
+    assert result["sampled"] == b.calls  # Tanpa cache: satu panggilan per frame
@@ -0,0 +1,148 @@
+import cv2
+import numpy as np
+import pytest
+import audit
+import backends
+import utils
+from sampler import SamplingPolicy
+from stub_server import StubServer, canned_predictions
+
+CLASSES = ["sobek", "tanpa_meja", "dudukan_rusak"]
+
+# --- REMOTE (stub HTTP server) ---
+@pytest.fixture
+def stub():
+    srv = StubServer(port=0, latency_ms=0, boxes=2).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+def test_remote_backend_against_stub(stub):
+    backend = backends.create_backend({"ROBOFLOW_API_KEY": "test", "ROBOFLOW_WORKSPACE": "ws", "ROBOFLOW_WORKFLOW": "wf",
+                                       "ROBOFLOW_API_URL": stub.url})
+    assert isinstance(backend, backends.RemoteWorkflowBackend)
+    assert backend.identity == "remote:ws/wf"
+
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    preds = utils.parse_workflow_result(backend.infer(frame))
+    expected = canned_predictions(2)
+    assert [p["class"] for p in preds] == [p["class"] for p in expected]
+    assert preds[0]["x"] == expected[0]["x"] and preds[0]["confidence"] == expected[0]["confidence"]
+
+    assert len(backend.infer_batch([frame, frame, frame])) == 3
+    assert stub.requests == 4
+
+# Pipeline penuh (sampler -> pipeline -> backend remote -> agregasi) terhadap stub HTTP
+def test_remote_backend_end_to_end(stub, video):
+    backend = backends.create_backend({"ROBOFLOW_API_KEY": "test", "ROBOFLOW_WORKSPACE": "ws", "ROBOFLOW_WORKFLOW": "wf",
+                                       "ROBOFLOW_API_URL": stub.url})
+    utils.set_backend(backend)
+    try:
+        cfg = {**audit.DEFAULT_SETTINGS, "use_cache": False, "max_inflight": 4, "sampling_policy": SamplingPolicy.every_n(10)}
+        result = audit.analyze_video(video, cfg, 10)
+    finally:
+        utils.set_backend(None)
+    assert stub.requests == result["api_calls"] == result["sampled"] == 10
+    assert dict(result["defects"]) == {"sobek": 1, "tanpa_meja": 1}
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        backends.create_backend({"INFERENCE_BACKEND": "gpu"})
+
+# --- LOKAL (tanpa model: net OpenCV palsu, _letterbox / _decode pada tensor sintetis) ---
+def make_local(input_size=640, conf=0.4, iou=0.5):
+    backend = backends.LocalOnnxBackend.__new__(backends.LocalOnnxBackend)
+    backend.class_names, backend.input_size = CLASSES, input_size
+    backend.conf_threshold, backend.iou_threshold = conf, iou
+    return backend
+
+# Box (cx, cy, w, h, kelas, skor) di koordinat input model -> output ala YOLOv8 (1, 4+nc, N) / YOLOv5 (1, N, 5+nc)
+def yolov8_output(boxes):
+    out = np.zeros((len(boxes), 4 + len(CLASSES)), dtype=np.float32)
+    for i, (cx, cy, w, h, cls, score) in enumerate(boxes):
+        out[i, :4] = cx, cy, w, h
+        out[i, 4 + cls] = score
+    return out.T[None]
+
+def yolov5_output(boxes, objectness=0.9):
+    out = np.zeros((len(boxes), 5 + len(CLASSES)), dtype=np.float32)
+    for i, (cx, cy, w, h, cls, score) in enumerate(boxes):
+        out[i, :5] = cx, cy, w, h, objectness
+        out[i, 5 + cls] = score / objectness
+    return out[None]
+
+BOXES = [
+    (100, 100, 40, 40, 0, 0.9),   # sobek
+    (102, 101, 40, 40, 0, 0.7),   # duplikat sobek -> dibuang NMS
+    (300, 200, 80, 60, 1, 0.8),   # tanpa_meja
+    (500, 500, 30, 30, 2, 0.2),   # di bawah threshold
+]
+
+@pytest.mark.parametrize("make_output", [yolov8_output, yolov5_output])
+def test_decode_yolo_outputs(make_output):
+    preds = make_local()._decode(make_output(BOXES), scale=0.5)
+    preds = sorted(preds, key=lambda p: p["class"])
+    assert [p["class"] for p in preds] == ["sobek", "tanpa_meja"]
+    sobek, meja = preds
+    assert sobek["confidence"] == pytest.approx(0.9, abs=1e-5)
+    # Koordinat dikembalikan ke frame asli (dibagi scale letterbox)
+    assert (sobek["x"], sobek["y"], sobek["width"], sobek["height"]) == pytest.approx((200, 200, 80, 80))
+    assert (meja["x"], meja["y"]) == pytest.approx((600, 400))
+
+def test_decode_nothing_above_threshold():
+    assert make_local(conf=0.95)._decode(yolov8_output(BOXES), scale=1.0) == []
+
+def test_letterbox_keeps_aspect_ratio():
+    frame = np.full((720, 1280, 3), 255, dtype=np.uint8)
+    canvas, scale = make_local()._letterbox(frame)
+    assert canvas.shape == (640, 640, 3)
+    assert scale == pytest.approx(0.5)
+    assert (canvas[:360] == 255).all()
+    assert (canvas[360:] == 114).all()  # Padding
+
+# Net palsu pengganti cv2.dnn.readNetFromONNX: tiap gambar di blob -> output YOLOv8 dengan BOXES
+class FakeNet:
+    def __init__(self):
+        self.blobs = []
+
+    def setPreferableBackend(self, backend): pass
+    def setPreferableTarget(self, target): pass
+
+    def setInput(self, blob):
+        self.blobs.append(blob)
+
+    def forward(self):
+        return np.concatenate([yolov8_output(BOXES)] * len(self.blobs[-1]))
+
+@pytest.fixture
+def local(monkeypatch):
+    net = FakeNet()
+    monkeypatch.setattr(cv2.dnn, "readNetFromONNX", lambda path: net)
+    backend = backends.create_backend({"INFERENCE_BACKEND": "local", "LOCAL_MODEL_PATH": "model.onnx",
+                                       "LOCAL_MODEL_CLASSES": CLASSES, "LOCAL_BATCH_SIZE": 2})
+    return backend, net
+
+def test_local_infer_batch(local):
+    backend, net = local
+    assert backend.identity == "local:model.onnx"
+    frames = [np.zeros((720, 1280, 3), dtype=np.uint8)] * 3
+    results = backend.infer_batch(frames)
+    # 3 frame, batch 2 -> 2 forward: blob (2, 3, 640, 640) lalu (1, 3, 640, 640)
+    assert [b.shape for b in net.blobs] == [(2, 3, 640, 640), (1, 3, 640, 640)]
+    assert len(results) == 3
+    preds = sorted(utils.parse_workflow_result(results[2]), key=lambda p: p["class"])
+    assert [p["class"] for p in preds] == ["sobek", "tanpa_meja"]
+    assert (preds[0]["x"], preds[0]["width"]) == pytest.approx((200, 80))  # Letterbox 1280 -> 640: scale 0.5
+
+def test_local_backend_end_to_end(local, video):
+    backend, net = local
+    utils.set_backend(backend)
+    try:
+        cfg = {**audit.DEFAULT_SETTINGS, "use_cache": False, "sampling_policy": SamplingPolicy.every_n(10)}
+        result = audit.analyze_video(video, cfg, 10)
+    finally:
+        utils.set_backend(None)
+    # Backend lokal dipanggil per batch (run_inference -> utils.detect_batch -> infer_batch)
+    assert sum(len(b) for b in net.blobs) == result["sampled"] == 10
+    assert len(net.blobs) == result["api_calls"] == 5
+    assert dict(result["defects"]) == {"sobek": 1, "tanpa_meja": 1}
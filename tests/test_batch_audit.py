@@ -0,0 +1,48 @@
+import json
+import shutil
+import pytest
+import batch_audit
+import database as db
+from stub_server import StubServer
+
+def test_scan_directory_uses_folder_and_file_names(tmp_path):
+    folder = tmp_path / "FPMIPA A"
+    folder.mkdir()
+    for name in ["R-2.mp4", "R-1.MOV", "catatan.txt"]:
+        (folder / name).write_bytes(b"")
+    items = batch_audit.scan_directory(str(folder))
+    assert [(i["gedung"], i["ruangan"]) for i in items] == [("FPMIPA A", "R-1"), ("FPMIPA A", "R-2")]
+
+def test_load_manifest_resolves_relative_paths(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps([{"video": "a.mp4", "gedung": "G", "ruangan": "R", "deskripsi": "d"}]))
+    assert batch_audit.load_manifest(str(manifest)) == [
+        {"video": str(tmp_path / "a.mp4"), "gedung": "G", "ruangan": "R", "deskripsi": "d"}]
+
+def test_parse_args_rejects_mixed_sampling():
+    with pytest.raises(SystemExit):
+        batch_audit.parse_args(["videos", "--every-n", "5", "--max-calls", "10"])
+
+# CLI penuh: worker spawn -> backend remote (stub HTTP) -> laporan di DB
+def test_main_saves_reports(tmp_path, video):
+    folder = tmp_path / "Gedung Batch"
+    folder.mkdir()
+    for name in ["R-1.mp4", "R-2.mp4"]:
+        shutil.copy(video, folder / name)
+    srv = StubServer(port=0, latency_ms=0, boxes=2).start()
+    try:
+        secrets = tmp_path / "secrets.toml"
+        secrets.write_text(f'ROBOFLOW_API_KEY = "test"\nROBOFLOW_WORKSPACE = "ws"\nROBOFLOW_WORKFLOW = "wf"\n'
+                           f'ROBOFLOW_API_URL = "{srv.url}"\n')
+        db.init_db()
+        before = db.count_laporan(gedung=["Gedung Batch"])
+        code = batch_audit.main([str(folder), "--workers", "2", "--every-n", "10", "--no-cache", "--secrets", str(secrets)])
+    finally:
+        srv.shutdown()
+        srv.server_close()
+    assert code == 0
+    assert db.count_laporan(gedung=["Gedung Batch"]) == before + 2
+    assert srv.requests == 20
+    page = db.query_laporan(gedung=["Gedung Batch"], limit=2)
+    assert sorted(page["ruangan"]) == ["R-1", "R-2"]
+    assert set(page["api_calls"]) == {10}
@@ -0,0 +1,51 @@
+import multiprocessing
+import cache
+
+def make_cache(tmp_path, max_bytes=cache.MAX_CACHE_BYTES):
+    return cache.InferenceCache(str(tmp_path / "cache.db"), max_bytes=max_bytes)
+
+def test_overwrite_does_not_double_count(tmp_path):
+    c = make_cache(tmp_path)
+    for _ in range(5):
+        c.put_frame("k", [{"class": "sobek"}])
+    assert c._total == c.total_bytes()
+    c.put_frame("k", [])
+    assert c._total == c.total_bytes() == len("[]")
+
+def test_failed_write_is_not_counted(tmp_path):
+    c = make_cache(tmp_path)
+    c.put_frame("a", [1, 2, 3])
+    before = c._total
+    with c.engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE cache_frame")  # Tulis berikutnya gagal di DB
+    c.put_frame("b", [4, 5, 6])
+    assert c._total == before
+    c.put_video("c", [1])
+    assert c._total == before + len("[1]")
+
+def test_no_early_eviction_on_overwrite(tmp_path):
+    c = make_cache(tmp_path, max_bytes=100)
+    for _ in range(50):
+        c.put_frame("k", "x" * 40)
+    assert c.stats["evicted"] == 0
+    assert c.get_frame("k") == "x" * 40
+
+def test_default_path_outside_source():
+    assert not cache.CACHE_PATH.startswith(cache.os.path.dirname(cache.__file__))
+
+def _open_cache(args):
+    path, barrier = args
+    barrier.wait()
+    try:
+        cache.InferenceCache(path)
+    except Exception as e:
+        return repr(e)
+
+# Worker batch_audit / job membuka file cache baru bersamaan: tidak boleh gagal "table already exists"
+def test_concurrent_processes_create_tables(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Manager() as manager, ctx.Pool(4) as pool:
+        for i in range(3):
+            barrier = manager.Barrier(4)
+            path = str(tmp_path / f"race{i}.db")
+            assert pool.map(_open_cache, [(path, barrier)] * 4) == [None] * 4
@@ -0,0 +1,99 @@
+import database as db
+from scoring import calculate_score
+
+def save(detections):
+    score, _, status = calculate_score(detections)
+    return db.create_laporan("Gedung Test", "R1", str(detections), score, status, detections=detections)
+
+def test_summary_stats_counts_rusak_berat():
+    db.init_db()
+    total, critical = db.get_summary_stats()
+    save({"dudukan_rusak": 1})
+    save({"sobek": 1})
+    assert db.get_summary_stats() == (total + 2, critical + 1)
+
+def test_ringkasan_single_key():
+    db.init_db()
+    today = db.datetime.now().strftime("%Y-%m-%d")
+    before = db.get_ringkasan("hari", today).get(today, {"jumlah": 0})["jumlah"]
+    save({"sobek": 2})
+    assert db.get_ringkasan("hari", today) == {today: db.get_ringkasan("hari")[today]}
+    assert db.get_ringkasan("hari", today)[today]["jumlah"] == before + 1
+
+def test_summary_stats_matches_table():
+    db.init_db()
+    save({"dudukan_rusak": 1})
+    with db.engine.connect() as conn:
+        total = conn.execute(db.text("SELECT COUNT(*) FROM laporan_kerusakan")).scalar()
+        critical = conn.execute(db.text("SELECT COUNT(*) FROM laporan_kerusakan WHERE status = :s"),
+                                {"s": db.STATUS_RUSAK_BERAT}).scalar()
+    assert db.get_summary_stats() == (total, critical)
+
+def test_optimize_only_after_growth():
+    db.init_db()
+    db.optimize()
+    assert db.optimize() is False
+
+def test_bench_fixture_uses_real_statuses():
+    import bench_database
+    from scoring import STATUS_LAYAK, STATUS_PERLU_PERBAIKAN, STATUS_RUSAK_BERAT
+    assert set(bench_database.STATUSES) == {STATUS_LAYAK, STATUS_PERLU_PERBAIKAN, STATUS_RUSAK_BERAT}
+
+def seed(gedung, statuses):
+    db.init_db()
+    for status in statuses:
+        db.create_laporan(gedung, "R1", "{}", 100, status, "test")
+
+def test_keyset_pages_match_offset_pages():
+    seed("Gedung Paging", [db.STATUS_LAYAK, db.STATUS_RUSAK_BERAT] * 6)
+    pages, after = [], None
+    while True:
+        page = db.query_laporan(gedung=["Gedung Paging"], limit=5, after=after)
+        if page.empty: break
+        pages.append(list(page["id"]))
+        last = page.iloc[-1]
+        after = (last["timestamp"], last["id"])
+    offset = [list(db.query_laporan(gedung=["Gedung Paging"], limit=5, offset=o)["id"]) for o in (0, 5, 10)]
+    assert pages == offset
+    ids = [i for page in pages for i in page]
+    assert len(ids) == len(set(ids)) == 12
+
+def test_count_and_query_share_filters():
+    seed("Gedung Filter", [db.STATUS_LAYAK, db.STATUS_RUSAK_BERAT, db.STATUS_RUSAK_BERAT])
+    filters = {"gedung": ["Gedung Filter"], "status": [db.STATUS_RUSAK_BERAT]}
+    assert db.count_laporan(**filters) == 2
+    page = db.query_laporan(**filters, sort="timestamp", descending=False)
+    assert list(page["status"]) == [db.STATUS_RUSAK_BERAT] * 2
+    assert list(page["id"]) == sorted(page["id"])
+
+def test_create_laporan_writes_deteksi_rows():
+    db.init_db()
+    laporan_id = db.create_laporan("Gedung Deteksi", "R1", "{'sobek': 2}", 80, db.STATUS_LAYAK,
+                                   detections={"sobek": 2, "coretan": 1, "kaki_patah": 0}, confidences={"sobek": 0.9})
+    assert db.get_deteksi(laporan_id) == {
+        "coretan": {"jumlah": 1, "max_confidence": None},
+        "sobek": {"jumlah": 2, "max_confidence": 0.9},
+    }
+
+def test_create_laporan_parses_jenis_kerusakan_by_default():
+    db.init_db()
+    laporan_id = db.create_laporan("Gedung Deteksi", "R1", "{'sobek': 3, 'coretan': 0}", 80, db.STATUS_LAYAK)
+    assert db.get_deteksi(laporan_id) == {"sobek": {"jumlah": 3, "max_confidence": None}}
+
+def test_parse_jenis_kerusakan_ignores_bad_values():
+    assert db.parse_jenis_kerusakan("{'sobek': 2, 'coretan': 'x', 'noda': -1}") == {"sobek": 2}
+    assert db.parse_jenis_kerusakan("bukan dict") == {}
+    assert db.parse_jenis_kerusakan(None) == {}
+
+def test_backfill_deteksi_fills_old_reports():
+    db.init_db()
+    with db.engine.begin() as conn:
+        laporan_id = conn.execute(db.text(
+            "INSERT INTO laporan_kerusakan (timestamp, gedung, ruangan, jenis_kerusakan, confidence_score, status, deskripsi) "
+            "VALUES (:ts, 'Gedung Lama', 'R1', :jenis, 50, :status, '')"),
+            {"ts": db.datetime.now(), "jenis": "{'dudukan_rusak': 1}", "status": db.STATUS_RUSAK_BERAT}).lastrowid
+        conn.execute(db.text("DELETE FROM data_version WHERE name = 'deteksi_backfill'"))
+    assert db.get_deteksi(laporan_id) == {}
+    assert db.backfill_deteksi() >= 1
+    assert db.get_deteksi(laporan_id) == {"dudukan_rusak": {"jumlah": 1, "max_confidence": None}}
+    assert db.backfill_deteksi() == 0
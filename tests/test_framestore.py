@@ -0,0 +1,24 @@
+import os
+import time
+import framestore
+import spool
+
+def test_archive_dir_outside_source():
+    src = os.path.dirname(os.path.abspath(framestore.__file__))
+    assert not os.path.abspath(framestore.ARCHIVE_DIR).startswith(src)
+
+def test_archives_follow_quota(tmp_path, monkeypatch):
+    manager = spool.TempArtifactManager(str(tmp_path), quota_bytes=250, max_age=3600)
+    monkeypatch.setattr(framestore, "_archive_manager", manager)
+    paths = []
+    for i in range(3):
+        path = framestore.new_archive_path()
+        with open(path, "wb") as f: f.write(b"x" * 100)
+        os.utime(path, (time.time() - 100 + i,) * 2)  # Urutan umur pasti
+        paths.append(path)
+    # Arsip yang masih direkam tidak dihapus demi kuota
+    assert manager.cleanup() == 0
+    for path in paths: framestore.release_archive(path)
+    assert os.path.exists(paths[0])
+    assert manager.cleanup() == 1
+    assert not os.path.exists(paths[0]) and os.path.exists(paths[2])
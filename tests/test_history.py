@@ -0,0 +1,32 @@
+import io
+import os
+import pytest
+import database as db
+import export
+import spool
+from views import history
+
+def spool_exports():
+    root = spool.get_manager().root
+    return {name for name in os.listdir(root) if name.startswith("export-")} if os.path.isdir(root) else set()
+
+def test_export_bytes_leaves_no_spool_file():
+    db.init_db()
+    db.create_laporan("G", "R1", "{}", 85, "Layak Pakai ✅", detections={"sobek": 1})
+    filters = (("gedung", ("G",)),)
+    buf = io.BytesIO()
+    export.export_laporan(buf, "csv", gedung=("G",))
+
+    before = spool_exports()
+    assert history.export_bytes("csv", filters) == buf.getvalue()
+    assert spool_exports() == before
+
+def test_export_bytes_removes_file_on_error(monkeypatch):
+    def broken(path, fmt, **filters):
+        with open(path, "w") as f: f.write("setengah")
+        raise RuntimeError("query gagal")
+    monkeypatch.setattr(history.export, "export_laporan", broken)
+    before = spool_exports()
+    with pytest.raises(RuntimeError):
+        history.export_bytes("csv", ())
+    assert spool_exports() == before
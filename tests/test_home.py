@@ -0,0 +1,9 @@
+import database as db
+from views import home
+
+def test_recent_activities_escape_user_input():
+    db.init_db()
+    db.create_laporan("<b>G</b>", "<script>alert(1)</script>", "{}", 100, "Layak Pakai ✅", detections={})
+    act = home.recent_activities()[0]
+    assert "<script>" not in act["item"] and "&lt;script&gt;" in act["item"]
+    assert act["user"] == "&lt;b&gt;G&lt;/b&gt;"
@@ -0,0 +1,65 @@
+import json
+import subprocess
+import sys
+import pytest
+import audit
+import database as db
+import jobs
+from sampler import SamplingPolicy
+from test_audit import backend  # noqa: F401 (fixture)
+
+def submit(video, checkpoint_key=None, **kwargs):
+    cfg = {**audit.DEFAULT_SETTINGS, "max_inflight": 1, "use_cache": False, "sampling_policy": SamplingPolicy.every_n(10)}
+    db.init_db()
+    settings = {**json.loads(audit.settings_to_json(cfg)), "default_every": 10, "cleanup": False, "checkpoint_key": checkpoint_key}
+    return db.create_job(video, "G", "R-job", json.dumps(settings), **kwargs)
+
+# Catat urutan status yang ditulis run_job
+@pytest.fixture
+def statuses(monkeypatch):
+    seen = []
+    update = db.update_job
+    def record(job_id, **fields):
+        if "status" in fields: seen.append(fields["status"])
+        return update(job_id, **fields)
+    monkeypatch.setattr(db, "update_job", record)
+    return seen
+
+def test_job_runs_to_done(video, backend, statuses):
+    backend()
+    job_id = submit(video)
+    assert db.get_job(job_id)["status"] == "queued"
+    jobs.run_job(job_id)
+    job = db.get_job(job_id)
+    assert statuses == ["running", "done"]
+    assert job["progress"] == 1.0 and job["laporan_id"]
+    assert db.get_deteksi(job["laporan_id"])["sobek"]["jumlah"] == 1
+
+def test_job_fails_when_report_not_saved(video, backend, statuses, monkeypatch):
+    backend()
+    monkeypatch.setattr(db, "create_laporan", lambda *a, **k: False)
+    job_id = submit(video)
+    jobs.run_job(job_id)
+    job = db.get_job(job_id)
+    assert statuses == ["running", "failed"]
+    assert job["laporan_id"] is None and "gagal disimpan" in job["error"]
+
+def test_job_fails_on_incomplete_audit(video, backend, statuses):
+    backend(fail_after=2)
+    db.clear_checkpoint("test-job")
+    job_id = submit(video, checkpoint_key="test-job")
+    jobs.run_job(job_id)
+    assert statuses == ["running", "failed"]
+    assert "frame gagal" in db.get_job(job_id)["error"]
+    assert db.get_checkpoint("test-job")["frames"] == 2
+
+def test_orphaned_jobs_are_failed(video):
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    orphan = submit(video)
+    db.update_job(orphan, status="running", owner_pid=proc.pid)  # Worker / server sudah mati
+    alive = submit(video)  # Dipegang proses ini
+    assert db.fail_orphaned_jobs() >= 1
+    assert db.get_job(orphan)["status"] == "failed"
+    assert db.get_job(orphan)["error"] == db.ORPHANED_JOB_ERROR
+    assert db.get_job(alive)["status"] == "queued"
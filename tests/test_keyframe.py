@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+import pytest
+import audit
+import keyframe
+import utils
+from test_audit import FlakyBackend, settings
+
+# Video 60 frame, 10 fps: latar kotak-kotak acak diam, atau digeser 12 piksel per frame (kamera panning)
+def make_video(path, pan):
+    rng = np.random.default_rng(0)
+    base = cv2.resize(rng.integers(0, 255, (6, 16, 3), dtype=np.uint8), (320, 120), interpolation=cv2.INTER_NEAREST)
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 10, (160, 120))
+    for f in range(60):
+        out.write(np.ascontiguousarray(np.roll(base, -12 * f * pan, axis=1)[:, :160]))
+    out.release()
+    return path
+
+def audit_calls(path, use_keyframe):
+    b = FlakyBackend()
+    utils.set_backend(b)
+    try:
+        cfg = settings(keyframe=use_keyframe, sampling_policy=None)
+        result = audit.analyze_video(path, cfg, 10)
+        return b.calls, result
+    finally:
+        utils.set_backend(None)
+
+@pytest.mark.parametrize("pan", [0, 1])
+def test_keyframe_never_costs_more_calls(tmp_path, pan):
+    path = make_video(str(tmp_path / f"pan{pan}.mp4"), pan)
+    baseline, _ = audit_calls(path, False)
+    calls, result = audit_calls(path, True)
+    assert baseline == 6
+    if pan:
+        assert calls <= baseline
+    else:
+        assert calls == 1
+    assert result["api_saved"] == baseline - calls  # Penghematan dihitung dari stride default
+
+def test_selector_skips_similar_frames():
+    sel = keyframe.KeyframeSelector(threshold=8.0)
+    a = np.zeros((64, 64, 3), np.uint8)
+    b = np.full((64, 64, 3), 100, np.uint8)
+    assert [idx for idx, _ in sel.filter([(1, a), (2, a + 2), (3, b), (4, b)])] == [1, 3]
+    assert sel.seen == 4 and sel.saved == 2
@@ -0,0 +1,44 @@
+import numpy as np
+import live
+
+FRAME = np.zeros((48, 64, 3), dtype=np.uint8)
+
+def run(detect_fn, frames=5):
+    analyzer = live.LiveAnalyzer(detect_fn, queue_size=frames)
+    for _ in range(frames): analyzer.submit(FRAME)
+    analyzer.start()
+    return analyzer, analyzer.finish(timeout=5)
+
+def box(cls, conf=0.8):
+    return {"class": cls, "confidence": conf, "x": 10, "y": 10, "width": 5, "height": 5}
+
+def test_aggregates_max_per_frame():
+    results = iter([[box("sobek")], [box("sobek"), box("sobek", 0.9)], [box("tanpa_meja")]])
+    analyzer, defects = run(lambda f: next(results), frames=3)
+    assert dict(defects) == {"sobek": 2, "tanpa_meja": 1}
+    assert analyzer.confidence_snapshot()["sobek"] == 0.9
+    assert analyzer.incomplete_reason() is None
+
+def test_not_saved_without_analyzed_frames():
+    analyzer = live.LiveAnalyzer(lambda f: [])
+    assert analyzer.finish(timeout=1) == {}
+    assert "Tidak ada frame" in analyzer.incomplete_reason()
+
+def test_not_saved_when_inference_fails():
+    def down(frame): raise ConnectionError("API down")
+    analyzer, defects = run(down)
+    assert analyzer.errors == 5 and not defects
+    assert "5 error API" in analyzer.incomplete_reason()
+
+def test_error_ratio_threshold():
+    calls = iter(range(10))
+    def flaky(frame):
+        if next(calls) < 3: raise ConnectionError("API down")
+        return []
+    analyzer, _ = run(flaky, frames=10)
+    assert analyzer.incomplete_reason() == "3 dari 10 frame gagal dianalisis (error API)"
+
+def test_latest_frame_wins():
+    q = live.LatestFrameQueue(maxsize=1)
+    for i in range(3): q.put(i)
+    assert q.get(timeout=0) == 2 and q.dropped == 2
@@ -0,0 +1,55 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+import database as db
+import utils
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Proses terpisah: sys.modules bersih, sehingga terlihat modul halaman mana yang benar-benar di-import
+APP_SCRIPT = """
+import json, sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("main.py", default_timeout=60).run()
+print(json.dumps({"exception": [e.value for e in at.exception], "caption": [c.value for c in at.caption],
+                  "views": sorted(m for m in sys.modules if m.startswith("views."))}))
+"""
+
+def test_dashboard_imports_only_its_page(tmp_path):
+    env = {**os.environ, "SMARTREPORT_DB_PATH": str(tmp_path / "app.db")}
+    out = subprocess.run([sys.executable, "-c", APP_SCRIPT], cwd=SRC, env=env, check=True,
+                         capture_output=True, text=True, timeout=120).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    assert result["exception"] == []
+    assert result["views"] == ["views.home"]
+    assert any(c.startswith("⏱️ Import") for c in result["caption"])
+
+def test_backend_created_once_on_first_use(monkeypatch):
+    created = []
+    monkeypatch.setattr(utils.backends, "create_backend", lambda secrets: created.append(1) or object())
+    utils.set_backend(None)
+    try:
+        assert created == []
+        assert utils.get_backend() is utils.get_backend()
+        assert created == [1]
+    finally:
+        utils.set_backend(None)
+
+def test_missing_secrets_raise_config_error(monkeypatch):
+    def missing(secrets): raise KeyError("ROBOFLOW_API_KEY")
+    monkeypatch.setattr(utils.backends, "create_backend", missing)
+    utils.set_backend(None)
+    with pytest.raises(utils.BackendConfigError, match="ROBOFLOW_API_KEY"):
+        utils.get_backend()
+
+def test_init_db_runs_once_unless_forced(monkeypatch):
+    db.init_db()
+    calls = []
+    monkeypatch.setattr(db, "upgrade_schema", lambda: calls.append(1))
+    db.init_db()
+    db.init_db()
+    assert calls == []
+    db.init_db(force=True)
+    assert calls == [1]
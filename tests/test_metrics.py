@@ -0,0 +1,68 @@
+import urllib.request
+import pytest
+import metrics
+from metrics import Histogram, Metrics
+
+def test_histogram_quantile_interpolates_in_bucket():
+    h = Histogram()
+    for _ in range(10): h.observe(0.003)   # Bucket (0.0025, 0.005]
+    for _ in range(10): h.observe(0.05)    # Bucket (0.025, 0.05] (batas atas termasuk)
+    assert h.count == 20 and h.mean() == pytest.approx(0.0265)
+    assert h.quantile(0.25) == pytest.approx(0.00375)
+    assert h.quantile(1.0) == pytest.approx(0.05)
+    assert Histogram().quantile(0.5) == 0.0
+
+def test_histogram_overflow_bucket():
+    h = Histogram()
+    h.observe(60.0)
+    assert h.counts[-1] == 1
+    assert h.quantile(0.95) == metrics.BUCKETS[-1]
+
+def test_parent_receives_observations_and_snapshot_roundtrip():
+    parent = Metrics()
+    child = Metrics(parent=parent)
+    child.inc("api_calls", 3)
+    with child.time("inference"): pass
+    assert parent.counters["api_calls"] == 3 and parent.histograms["inference"].count == 1
+
+    merged = Metrics.from_snapshot(child.snapshot()).merge(child)
+    assert merged.counters["api_calls"] == 6 and merged.histograms["inference"].count == 2
+
+def test_timed_counts_calls_and_errors():
+    m = Metrics()
+    def boom(): raise ValueError("x")
+    with pytest.raises(ValueError):
+        m.timed("inference", boom, calls="api_calls", errors="api_errors")()
+    assert m.counters == {"api_calls": 1, "api_errors": 1}
+    assert m.histograms["inference"].count == 1
+
+def test_prometheus_output():
+    m = Metrics()
+    m.inc("frames", 5)
+    m.observe("decode", 0.002)
+    m.observe("decode", 20.0)
+    lines = m.to_prometheus().splitlines()
+    assert "# TYPE smartreport_frames_total counter" in lines
+    assert "smartreport_frames_total 5" in lines
+    assert "# TYPE smartreport_stage_seconds histogram" in lines
+    # Bucket kumulatif, diakhiri +Inf = count
+    assert 'smartreport_stage_seconds_bucket{stage="decode",le="0.001"} 0' in lines
+    assert 'smartreport_stage_seconds_bucket{stage="decode",le="0.0025"} 1' in lines
+    assert 'smartreport_stage_seconds_bucket{stage="decode",le="10.0"} 1' in lines
+    assert 'smartreport_stage_seconds_bucket{stage="decode",le="+Inf"} 2' in lines
+    assert 'smartreport_stage_seconds_count{stage="decode"} 2' in lines
+
+def test_http_endpoint(monkeypatch):
+    monkeypatch.setattr(metrics, "_server", None)
+    m = Metrics()
+    m.inc("frames")
+    server = metrics.start_http_server(lambda: m, port=0)
+    try:
+        assert metrics.start_http_server(lambda: m, port=0) is server
+        host, port = server.server_address[:2]
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as resp:
+            assert resp.headers["Content-Type"].startswith("text/plain")
+            assert "smartreport_frames_total 1" in resp.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
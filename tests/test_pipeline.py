@@ -0,0 +1,44 @@
+import threading
+import time
+import pipeline
+
+# infer palsu: catat jumlah request yang berjalan bersamaan
+class Probe:
+    def __init__(self, latency=0.02):
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, frame):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.latency * (1 + frame % 3))  # Selesai tidak berurutan
+        with self._lock:
+            self.active -= 1
+        return f"annotated-{frame}", [frame]
+
+def frames(n):
+    return ((i, i) for i in range(n))
+
+def test_keeps_n_requests_in_flight_and_yields_in_order():
+    probe = Probe()
+    results = list(pipeline.iter_inference(frames(20), probe, max_inflight=4))
+    assert [idx for idx, _, _ in results] == list(range(20))
+    assert all(ann == f"annotated-{i}" and preds == [i] for i, ann, preds in results)
+    assert probe.peak == 4
+
+def test_single_inflight_is_serial():
+    probe = Probe(latency=0.005)
+    list(pipeline.iter_inference(frames(5), probe, max_inflight=1))
+    assert probe.peak == 1
+
+def test_batched_groups_frames():
+    sizes = []
+    def batch_fn(fs):
+        sizes.append(len(fs))
+        return [(f, [f]) for f in fs]
+    results = list(pipeline.iter_inference_batched(frames(10), batch_fn, batch_size=4, max_inflight=2))
+    assert [idx for idx, _, _ in results] == list(range(10))
+    assert sorted(sizes) == [2, 4, 4]
@@ -0,0 +1,52 @@
+import cv2
+import numpy as np
+import preview
+
+class Slot:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda value, **kwargs: self.calls.append((name, value))
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+def renderer(monkeypatch, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(preview.time, "monotonic", clock)
+    slots = {k: Slot() for k in ["image_slot", "progress_slot", "text_slot", "json_slot"]}
+    return preview.PreviewRenderer(**slots, **kwargs), slots, clock
+
+def test_encode_jpeg_downscales_bgr():
+    frame = np.zeros((480, 960, 3), dtype=np.uint8)
+    frame[:, :, 2] = 255  # Merah (BGR)
+    jpeg = preview.encode_jpeg(frame, width=480)
+    decoded = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+    assert decoded.shape == (240, 480, 3)
+    assert decoded[..., 2].mean() > 240 and decoded[..., 0].mean() < 15
+    assert len(jpeg) < frame.nbytes / 50
+
+def test_updates_throttled_to_max_fps(monkeypatch):
+    r, slots, clock = renderer(monkeypatch, max_fps=4)
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    for i in range(40):  # 40 frame dalam 1 detik
+        r(i, 40, frame, {"sobek": 1})
+        clock.now += 0.025
+    assert r.rendered == 4 and r.skipped == 36
+    assert [name for name, _ in slots["image_slot"].calls] == ["image"] * 4
+    # JSON hanya dikirim saat isinya berubah
+    assert slots["json_slot"].calls == [("json", {"sobek": 1})]
+
+def test_force_and_progress_only_mode(monkeypatch):
+    r, slots, clock = renderer(monkeypatch, max_fps=0)
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    r(1, 10, frame, {})
+    r(2, 10, frame, {})
+    assert r.update(10, 10, frame, {}, force=True)
+    assert slots["image_slot"].calls == [] and slots["json_slot"].calls == []
+    assert slots["progress_slot"].calls == [("progress", 0.1), ("progress", 1.0)]
@@ -0,0 +1,25 @@
+import json
+import os
+import subprocess
+import sys
+
+SUITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "run_suite.py")
+
+# Suite kecil end to end (proses terpisah: suite memakai database sendiri)
+def test_suite_smoke(tmp_path):
+    out = tmp_path / "bench.json"
+    subprocess.run([sys.executable, SUITE, "--out", str(out), "--videos-dir", str(tmp_path / "videos"),
+                    "--spec", "160x120x2", "--latency", "0", "--jitter", "0", "--inflight", "1", "4",
+                    "--every", "5", "--db-sizes", "500", "--db-writes", "5", "--repeat", "1"],
+                   check=True, capture_output=True, timeout=300)
+    report = json.loads(out.read_text())
+
+    assert report["meta"]["args"]["inflight"] == [1, 4]
+    pipeline = report["pipeline"]
+    assert [r["max_inflight"] for r in pipeline] == [1, 4]
+    for row in pipeline:
+        assert row["api_calls"] == row["sampled"] > 0
+        assert row["stages"]["inference"]["n"] == row["api_calls"]
+    (db_row,) = report["database"]
+    assert db_row["rows"] == 500
+    assert db_row["create_laporan_ms"] > 0 and db_row["query_laporan_page_ms"] >= 0
@@ -0,0 +1,34 @@
+import pytest
+from sampler import FrameSampler, SamplingPolicy
+
+def sample(video, policy, **kwargs):
+    with FrameSampler(video, policy, **kwargs) as sampler:
+        return [idx for idx, _ in sampler]
+
+@pytest.mark.parametrize("k", [30, 40, 60, 100, 150])
+def test_budget_takes_at_most_k_frames(video, k):
+    frames = sample(video, SamplingPolicy.budget(k))
+    assert 0 < len(frames) <= k
+    assert frames == sorted(frames)
+
+def test_budget_stride_rounds_up():
+    assert SamplingPolicy.budget(30).stride(30, 100) == 4
+    assert SamplingPolicy.budget(60).stride(30, 100) == 2
+    assert SamplingPolicy.budget(100).stride(30, 100) == 1
+
+def test_every_n(video):
+    assert sample(video, SamplingPolicy.every_n(10)) == list(range(10, 101, 10))
+
+def test_resumed_samples_count_toward_budget(video):
+    # Budget 5 dari 100 frame (stride 20), 4 sample sudah ada di checkpoint -> tinggal 1
+    assert sample(video, SamplingPolicy.budget(5), start_frame=20, resumed=4) == [40]
+
+def test_resume_continues_after_start_frame(video):
+    assert sample(video, SamplingPolicy.every_n(10), start_frame=50) == [60, 70, 80, 90, 100]
+
+def test_failed_read_after_seek_waits_at_target(video, monkeypatch):
+    # Stride >= SEEK_MIN_STRIDE: sample 190 di luar video (100 frame) -> read gagal setelah seek, tunggu di posisi target
+    waited = []
+    monkeypatch.setattr(FrameSampler, "_wait_for_data", lambda self, curr: waited.append(curr) or False)
+    assert sample(video, SamplingPolicy.every_n(95)) == [95]
+    assert waited == [189]
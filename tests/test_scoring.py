@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+import batch_audit
+import database as db
+import jobs
+import scoring
+from scoring import ScoringRules
+from test_audit import backend  # noqa: F401 (fixture)
+from test_jobs import submit
+
+# Versi di scoring_rules.json + aturan sintetis untuk kasus tepi (tanpa critical, potongan kembar, skor terpotong ke 0)
+RULES = [*scoring.load_rules(scoring.RULES_PATH)[0].values(), *(ScoringRules.from_dict(r) for r in [
+    {"version": 90, "critical": {}, "per_item": {"sobek": 15, "coretan": 5}, "rusak_berat_below": 50, "layak_from": 85},
+    {"version": 91, "critical": {"dudukan_rusak": 60, "tanpa_meja": 60, "kaki_patah": 95}, "per_item": {"sobek": 40},
+     "rusak_berat_below": 30, "layak_from": 70},
+    {"version": 92, "critical": {"tanpa_meja": 20}, "per_item": {"sobek": 35, "noda": 1}, "rusak_berat_below": 0, "layak_from": 100},
+])]
+
+def random_counts(rules, seed, n=300):
+    rng = np.random.default_rng(seed)
+    classes = [*rules.classes, "kelas_lain"]
+    # Banyak nol agar kombinasi "tidak ada kerusakan" / hanya per_item / critical semuanya muncul
+    data = rng.integers(0, 8, (n, len(classes))) * (rng.random((n, len(classes))) < 0.3)
+    return pd.DataFrame(data, columns=classes)
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("rules", RULES, ids=repr)
+def test_score_counts_matches_score(rules, seed):
+    counts = random_counts(rules, seed)
+    score, deduction, status = rules.score_counts(counts)
+    for i, row in enumerate(counts.to_dict("records")):
+        assert (score[i], deduction[i], status[i]) == rules.score({k: v for k, v in row.items() if v})
+
+def test_score_counts_missing_columns(rules=RULES[0]):
+    score, _, status = rules.score_counts(pd.DataFrame({"kelas_lain": [3]}))
+    assert (score[0], status[0]) == (100, scoring.STATUS_LAYAK)
+
+# rule_version yang disimpan = versi yang dipakai menghitung skor (bukan versi aktif saat create_laporan)
+def test_job_stores_rule_version_used_for_score(video, backend, monkeypatch):
+    backend()
+    rules = RULES[-1]
+    monkeypatch.setattr(jobs, "get_rules", lambda: rules)
+    job_id = submit(video)
+    jobs.run_job(job_id)
+    saved = db.query_laporan(gedung=["G"], limit=1).iloc[0]
+    assert int(saved["rule_version"]) == rules.version != scoring.get_rules().version
+    assert saved["status"] == rules.score({"sobek": 1})[2]
+
+def test_batch_report_carries_rule_version():
+    result = {"gedung": "G", "ruangan": "R", "deskripsi": "", "defects": {"sobek": 2}, "confidences": {},
+              "stride": 10, "api_calls": 3}
+    report = batch_audit._report(result)
+    assert report["rule_version"] == scoring.get_rules().version
+    assert (report["confidence_score"], report["status"]) == scoring.calculate_score({"sobek": 2})[::2]
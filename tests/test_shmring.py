@@ -0,0 +1,108 @@
+import json
+import numpy as np
+import pytest
+import audit
+import database as db
+import jobs
+import shmring
+from shmring import SharedFrameRing, SharedFrameSource
+from test_audit import backend  # noqa: F401 (fixture)
+
+SHAPE = (12, 16, 3)
+
+def frame(value):
+    return np.full(SHAPE, value, dtype=np.uint8)
+
+def exists(handle):
+    name, _, _ = shmring.parse_handle(handle)
+    try:
+        shmring.shared_memory.SharedMemory(name=name).close()
+        return True
+    except FileNotFoundError:
+        return False
+
+@pytest.fixture
+def ring():
+    r = SharedFrameRing.create(SHAPE, slots=2)
+    yield r
+    r.unlink()
+
+def test_publish_claim_release(ring):
+    consumer = SharedFrameRing.attach(ring.handle)
+    assert ring.publish(5, frame(1)) == 0
+    assert ring.publish(10, frame(2)) == 1
+    # Ring penuh: non-blocking publish membuang frame
+    assert ring.publish(15, frame(3), block=False) is None and ring.dropped == 1
+
+    seq, idx, view = consumer.claim(timeout=1)
+    assert (seq, idx, int(view[0, 0, 0])) == (0, 5, 1)
+    assert ring.publish(15, frame(3), block=False) is None  # Belum di-release: slot tidak ditimpa
+    consumer.release(seq)
+    assert ring.publish(15, frame(3), block=False) == 2
+    assert int(consumer.claim(timeout=1)[2][0, 0, 0]) == 2
+
+    ring.close(total_frames=20)
+    consumer.release(1)
+    assert consumer.claim(timeout=1)[1] == 15
+    assert consumer.claim(timeout=1) is None
+    assert consumer.total_frames == 20
+    consumer.detach()
+
+def test_claim_times_out_while_open(ring):
+    consumer = SharedFrameRing.attach(ring.handle)
+    with pytest.raises(TimeoutError):
+        consumer.claim(timeout=0.01)
+    consumer.detach()
+
+def test_publish_resizes_other_resolution(ring):
+    ring.publish(1, np.zeros((24, 32, 3), dtype=np.uint8))
+    assert ring.data[0].shape == SHAPE
+
+def test_frame_source_holds_views_and_copies_when_ring_small():
+    frames = [(i * 10, frame(i)) for i in range(1, 5)]
+    shm = shmring.publish_frames(frames, total_frames=40)
+    try:
+        source = SharedFrameSource(shm.handle, hold=1)
+        assert [(idx, int(f[0, 0, 0])) for idx, f in source] == [(10, 1), (20, 2), (30, 3), (40, 4)]
+        assert source.decoded == 4 and source.total_frames == 40
+        source.close()
+        assert SharedFrameSource(shm.handle, hold=4).copy
+    finally:
+        shm.unlink()
+
+def test_unlink_handle():
+    shm = shmring.publish_frames([(1, frame(1))])
+    handle = shm.handle
+    shm.detach()
+    assert shmring.unlink_handle(handle)
+    assert not exists(handle)
+    assert not shmring.unlink_handle(handle)
+
+# Lifecycle: segmen diserahkan ke job -> dihapus worker setelah dipakai, berhasil maupun gagal
+def job_for(handle):
+    cfg = {**audit.DEFAULT_SETTINGS, "max_inflight": 1, "use_cache": False}
+    settings = {**json.loads(audit.settings_to_json(cfg)), "default_every": 1, "cleanup": False}
+    db.init_db()
+    return db.create_job(handle, "G", "R-shm", json.dumps(settings))
+
+@pytest.mark.parametrize("saved", [True, False])
+def test_job_unlinks_segment(backend, monkeypatch, saved):
+    backend()
+    if not saved: monkeypatch.setattr(db, "create_laporan", lambda *a, **k: False)
+    shm = shmring.publish_frames([(i, frame(i)) for i in range(1, 4)], total_frames=3)
+    handle = shm.handle
+    shm.detach()
+    job_id = job_for(handle)
+    jobs.run_job(job_id)
+    assert db.get_job(job_id)["status"] == ("done" if saved else "failed")
+    assert not exists(handle)
+
+def test_orphaned_job_unlinks_segment():
+    shm = shmring.publish_frames([(1, frame(1))])
+    handle = shm.handle
+    shm.detach()
+    job_id = job_for(handle)
+    db.update_job(job_id, owner_pid=None)
+    assert db.fail_orphaned_jobs() >= 1
+    assert db.get_job(job_id)["status"] == "failed"
+    assert not exists(handle)
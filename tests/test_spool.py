@@ -0,0 +1,60 @@
+import io
+import os
+import subprocess
+import sys
+import time
+import spool
+
+def make_manager(tmp_path, **kwargs):
+    return spool.TempArtifactManager(str(tmp_path), **{"quota_bytes": 10 ** 6, "max_age": 60, **kwargs})
+
+def write(path, size=10, age=0):
+    with open(path, "wb") as f: f.write(b"x" * size)
+    if age: os.utime(path, (time.time() - age,) * 2)
+    return path
+
+def dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+def test_active_file_is_never_aged_out(tmp_path):
+    m = make_manager(tmp_path)
+    path = write(m.new_path(".mp4", kind="upload"), age=3600)  # Job panjang: jauh melewati max_age
+    assert m.cleanup() == 0 and os.path.exists(path)
+    m.release(path, delete=False)
+    assert m.cleanup() == 1 and not os.path.exists(path)
+
+def test_release_from_another_process(tmp_path):
+    m = make_manager(tmp_path)
+    path = write(m.new_path(".mp4", kind="upload"))
+    code = ("import sys, spool; spool.TempArtifactManager(sys.argv[1]).release(sys.argv[2])")
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    subprocess.run([sys.executable, "-c", code, str(tmp_path), path], check=True, env=env)
+    assert not m.is_active(path) and not os.path.exists(path)
+    assert os.listdir(m.active_dir) == []
+
+def test_marker_of_dead_owner_is_stale(tmp_path):
+    m = make_manager(tmp_path)
+    path = write(os.path.join(str(tmp_path), "upload-crash.mp4"), age=3600)
+    with open(m._marker(path), "w") as f: f.write(str(dead_pid()))
+    assert not m.is_active(path)
+    assert m.cleanup() == 1
+    assert not os.path.exists(path) and os.listdir(m.active_dir) == []
+
+def test_quota_skips_active_files(tmp_path):
+    m = make_manager(tmp_path, quota_bytes=25)
+    old = write(os.path.join(str(tmp_path), "upload-old.mp4"), age=30)
+    active = write(m.new_path(".mp4"), age=40)
+    new = write(os.path.join(str(tmp_path), "upload-new.mp4"), age=10)
+    assert m.cleanup() == 1
+    assert not os.path.exists(old) and os.path.exists(active) and os.path.exists(new)
+
+def test_spool_upload_copies_and_releases(tmp_path):
+    m = make_manager(tmp_path)
+    data = os.urandom(3 * 1024 + 5)
+    s = spool.spool_upload(io.BytesIO(data), manager=m, chunk_size=1024)
+    with open(s.wait(), "rb") as f: assert f.read() == data
+    assert m.is_active(s.path)
+    s.release()
+    assert not os.path.exists(s.path) and not m.is_active(s.path)
@@ -0,0 +1,68 @@
+import numpy as np
+import bench_tracker
+from tracker import DefectTracker, iou_matrix
+
+def box(cls, x, y=100, size=40):
+    return {"class": cls, "x": x, "y": y, "width": size, "height": size}
+
+def test_iou_matrix():
+    a = np.array([[50, 50, 20, 20], [0, 0, 10, 10]], dtype=float)
+    b = np.array([[50, 50, 20, 20], [60, 50, 20, 20], [200, 200, 10, 10]], dtype=float)
+    iou = iou_matrix(a, b)
+    assert iou.shape == (2, 3)
+    assert iou[0, 0] == 1.0 and iou[0, 2] == 0.0
+    assert np.isclose(iou[0, 1], 200 / 600)
+
+def test_same_defect_across_frames_is_one_track():
+    tracker = DefectTracker()
+    ids = [tracker.update(f, [box("sobek", 100 + 2 * f)]) for f in range(0, 50, 5)]
+    assert len({i for (i,) in ids}) == 1
+    assert tracker.counts() == {"sobek": 1}
+
+def test_classes_never_matched():
+    tracker = DefectTracker()
+    (a,) = tracker.update(0, [box("sobek", 100)])
+    (b,) = tracker.update(5, [box("coretan", 100)])
+    assert a != b
+
+# Kamera menyapu: dua kerusakan bergerak bersama, id tetap walau posisi jauh dari frame sebelumnya
+def test_matching_follows_camera_motion():
+    tracker = DefectTracker()
+    first = tracker.update(0, [box("sobek", 100), box("sobek", 300)])
+    for f in range(10, 60, 10):
+        assert tracker.update(f, [box("sobek", 100 - 4 * f), box("sobek", 300 - 4 * f)]) == first
+    assert tracker.counts() == {"sobek": 2}
+
+def test_spurious_detection_not_counted_when_dense():
+    tracker = DefectTracker()
+    for f in range(0, 50, 5):
+        tracker.update(f, [box("sobek", 100)] + ([box("coretan", 300)] if f == 20 else []))
+    assert tracker.counts() == {"sobek": 1}
+
+# Sample jarang: kerusakan yang terlihat sekali tetap dihitung
+def test_single_hit_counted_when_sparse():
+    tracker = DefectTracker()
+    tracker.update(0, [box("sobek", 100)])
+    tracker.update(90, [box("coretan", 300)])
+    tracker.update(180, [])
+    assert tracker.counts() == {"sobek": 1, "coretan": 1}
+
+def test_lost_track_starts_new_one():
+    tracker = DefectTracker(max_age=30)
+    (a,) = tracker.update(0, [box("sobek", 100)])
+    tracker.update(5, [box("sobek", 100)])
+    for f in range(10, 100, 5): tracker.update(f, [])
+    (b,) = tracker.update(100, [box("sobek", 100)])
+    tracker.update(105, [box("sobek", 100)])
+    assert a != b
+    assert tracker.counts() == {"sobek": 2}
+
+def test_tracker_beats_max_count_on_benchmark():
+    rng = np.random.default_rng(0)
+    videos = [bench_tracker.make_video(rng) for _ in range(5)]
+    for stride in (5, 15):
+        track = sum(bench_tracker.error(bench_tracker.count_track(f, stride), bench_tracker.sampled_truth(v, stride))
+                    for f, _, v in videos)
+        best = sum(bench_tracker.error(bench_tracker.count_max(f, stride), bench_tracker.sampled_truth(v, stride))
+                   for f, _, v in videos)
+        assert track < best / 3